@@ -0,0 +1,510 @@
+import heapq
+import json
+import os
+import pickle
+import re
+import shutil
+import stat
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+# NumPy e scipy.sparse são importados com a aplicação (~0,3 s e ~30 MB), porque o
+# índice de habilidades e os indicadores os usam em rotas frequentes; com o
+# preload_app do gunicorn isso acontece uma vez, no master. Só o scikit-learn e o
+# scipy.optimize, usados em rotas raras, ficam para o primeiro uso.
+import numpy as np
+from scipy import sparse
+
+from changelog import ler_changelog
+
+# =============================================================================
+# ÍNDICE INVERTIDO DE HABILIDADES (habilidade -> colaboradores)
+# =============================================================================
+
+HABILIDADES_REGEX = re.compile(r'Habilidades Desejadas:\s*(.+)', re.IGNORECASE)
+
+
+def normalizar_habilidade(habilidade):
+    return (habilidade or '').strip().lower()
+
+
+def extrair_habilidades_projeto(objetivo, descricao):
+    """Extrai a lista de habilidades do trecho 'Habilidades Desejadas:' do projeto."""
+    project_text = f"{objetivo or ''} {descricao or ''}"
+    habilidades_match = HABILIDADES_REGEX.search(project_text)
+    if not habilidades_match:
+        return []
+    return [h for h in (normalizar_habilidade(h) for h in habilidades_match.group(1).split(',')) if h]
+
+
+class SkillIndex:
+    """Índice em memória dos colaboradores (nível de acesso COLABORADOR) e suas hard skills.
+
+    É carregado uma única vez por worker e atualizado incrementalmente pelas rotas
+    de usuário. Cada worker do gunicorn tem o seu próprio índice: `sync` o recarrega
+    quando a ChangeLog registra alterações em Colaborador ou ADM feitas em qualquer
+    worker (toda escrita em HardSkill acompanha uma delas), até o ponto seguro de
+    changelog.py.
+    """
+
+    def __init__(self, atraso=10):
+        self.atraso = atraso
+        self._lock = threading.RLock()
+        self._versao = None
+        self._colaboradores = {}            # idColaborador -> nome
+        self._skills = {}                   # idColaborador -> set(habilidades)
+        self._postings = defaultdict(set)   # habilidade -> set(idColaborador)
+        self._version = 0
+        self._matrix_cache = None
+
+    def load(self, cursor, versao=None):
+        if versao is None:
+            versao, _ = ler_changelog(cursor, None, self.atraso)
+        cursor.execute("""
+            SELECT c.idColaborador, c.nome, hs.habilidade
+            FROM Colaborador c
+            INNER JOIN ADM adm ON c.idColaborador = adm.idColaborador
+            INNER JOIN NivelAcesso na ON adm.idNivelAcesso = na.idNivelAcesso
+            LEFT JOIN HardSkill hs ON c.idColaborador = hs.idColaborador
+            WHERE na.nivel = 'COLABORADOR'
+        """)
+        colaboradores, skills, postings = {}, {}, defaultdict(set)
+        for row in cursor.fetchall():
+            colaborador_id = row['idColaborador']
+            colaboradores[colaborador_id] = row['nome']
+            skills.setdefault(colaborador_id, set())
+            habilidade = normalizar_habilidade(row['habilidade'])
+            if habilidade:
+                skills[colaborador_id].add(habilidade)
+                postings[habilidade].add(colaborador_id)
+        with self._lock:
+            self._colaboradores, self._skills, self._postings = colaboradores, skills, postings
+            self._versao = versao
+            self._version += 1
+
+    def sync(self, cursor):
+        """Carrega o índice na primeira chamada; depois, recarrega se houve alteração
+        de usuários registrada na ChangeLog desde a última sincronização."""
+        anterior = self._versao
+        if anterior is None:
+            return self.load(cursor)
+        versao, linhas = ler_changelog(cursor, anterior, self.atraso)
+        if not linhas:
+            return
+        # Um salto na sequência pode ser histórico já podado: na dúvida, recarrega
+        if linhas[0]['versao'] != anterior + 1 or any(row['tabela'] in ('Colaborador', 'ADM') for row in linhas):
+            return self.load(cursor, versao)
+        with self._lock:
+            if versao > self._versao:
+                self._versao = versao
+
+    def snapshot(self):
+        """Retorna [(idColaborador, nome, [habilidades])] ordenado por id."""
+        with self._lock:
+            return [(colaborador_id, self._colaboradores[colaborador_id], sorted(self._skills.get(colaborador_id, ())))
+                    for colaborador_id in sorted(self._colaboradores)]
+
+    def upsert(self, colaborador_id, nome, habilidades):
+        """Adiciona ou substitui um colaborador no índice."""
+        novas = {h for h in (normalizar_habilidade(h) for h in habilidades or []) if h}
+        with self._lock:
+            self._discard_postings(colaborador_id)
+            self._colaboradores[colaborador_id] = nome
+            self._skills[colaborador_id] = novas
+            for habilidade in novas:
+                self._postings[habilidade].add(colaborador_id)
+            self._version += 1
+
+    def remove(self, colaborador_id):
+        with self._lock:
+            self._discard_postings(colaborador_id)
+            self._colaboradores.pop(colaborador_id, None)
+            self._skills.pop(colaborador_id, None)
+            self._version += 1
+
+    def _discard_postings(self, colaborador_id):
+        for habilidade in self._skills.get(colaborador_id, ()):
+            ids = self._postings.get(habilidade)
+            if ids is not None:
+                ids.discard(colaborador_id)
+                if not ids:
+                    del self._postings[habilidade]
+
+    def matrix(self):
+        """Matriz binária colaboradores x habilidades (CSR), refeita só quando o índice muda.
+
+        Retorna (ids, nomes, vocabulario, matriz), em que vocabulario mapeia
+        habilidade -> coluna.
+        """
+        with self._lock:
+            if self._matrix_cache is not None and self._matrix_cache[0] == self._version:
+                return self._matrix_cache[1]
+            ids = sorted(self._colaboradores)
+            nomes = [self._colaboradores[colaborador_id] for colaborador_id in ids]
+            vocabulario = {habilidade: coluna for coluna, habilidade in enumerate(sorted(self._postings))}
+            linhas, colunas = [], []
+            for linha, colaborador_id in enumerate(ids):
+                for habilidade in self._skills.get(colaborador_id, ()):
+                    linhas.append(linha)
+                    colunas.append(vocabulario[habilidade])
+            matriz = sparse.csr_matrix(
+                (np.ones(len(linhas), dtype=np.float32), (linhas, colunas)),
+                shape=(len(ids), len(vocabulario))
+            )
+            resultado = (ids, nomes, vocabulario, matriz)
+            self._matrix_cache = (self._version, resultado)
+            return resultado
+
+    def top_k(self, habilidades_projeto, limit=None):
+        """Ranqueia os colaboradores pela fração das habilidades do projeto que possuem.
+
+        Só percorre as listas invertidas das habilidades pedidas; os colaboradores
+        sem nenhuma habilidade em comum completam o resultado com 0%.
+        """
+        with self._lock:
+            comuns = defaultdict(list)
+            for habilidade in habilidades_projeto:
+                for colaborador_id in self._postings.get(habilidade, ()):
+                    comuns[colaborador_id].append(habilidade)
+
+            total = len(habilidades_projeto)
+            chave = lambda item: (-len(item[1]), item[0])
+            if limit is None:
+                ranqueados = sorted(comuns.items(), key=chave)
+            else:
+                ranqueados = heapq.nsmallest(limit, comuns.items(), key=chave)
+            resultados = [{
+                'id': colaborador_id,
+                'nome': self._colaboradores[colaborador_id],
+                'aderencia': round(len(habilidades) / total * 100, 2),
+                'habilidades_comuns': habilidades
+            } for colaborador_id, habilidades in ranqueados]
+
+            faltantes = None if limit is None else limit - len(resultados)
+            if faltantes is None or faltantes > 0:
+                for colaborador_id in sorted(self._colaboradores):
+                    if colaborador_id in comuns:
+                        continue
+                    resultados.append({
+                        'id': colaborador_id,
+                        'nome': self._colaboradores[colaborador_id],
+                        'aderencia': 0.0,
+                        'habilidades_comuns': []
+                    })
+                    if faltantes is not None:
+                        faltantes -= 1
+                        if not faltantes:
+                            break
+            return resultados
+
+
+# Projetos pontuados por vez na aderência em lote: limita a matriz densa (e as
+# temporárias da ordenação) a LOTE_PROJETOS x colaboradores por requisição
+LOTE_PROJETOS = 256
+
+
+def _pontuar(vocabulario, colaboradores, projetos):
+    """Matriz densa len(projetos) x colaboradores com a fração de habilidades em comum."""
+    linhas, colunas, pedidas = [], [], np.zeros(len(projetos), dtype=np.float32)
+    for linha, (_, habilidades) in enumerate(projetos):
+        pedidas[linha] = len(habilidades)
+        for habilidade in habilidades:
+            coluna = vocabulario.get(habilidade)
+            if coluna is not None:
+                linhas.append(linha)
+                colunas.append(coluna)
+    # Habilidades repetidas no projeto somam, como na aderência individual
+    demanda = sparse.csr_matrix(
+        (np.ones(len(linhas), dtype=np.float32), (linhas, colunas)),
+        shape=(len(projetos), len(vocabulario))
+    )
+    scores = (demanda @ colaboradores.T).toarray()
+    # Divisão no próprio array; projetos sem habilidades já têm a linha toda zerada
+    np.divide(scores, pedidas[:, None], out=scores, where=pedidas[:, None] > 0)
+    return scores
+
+
+def matriz_aderencia(skill_index, projetos):
+    """Matriz de aderência projetos x colaboradores (frações entre 0 e 1).
+
+    `projetos` é uma lista de (idDemandas, [habilidades]). Monta a matriz
+    projetos x habilidades e multiplica pela transposta da matriz de colaboradores,
+    obtendo em uma única operação a contagem de habilidades em comum de cada par.
+    Retorna (ids, nomes, vocabulario, colaboradores, scores).
+    """
+    ids, nomes, vocabulario, colaboradores = skill_index.matrix()
+    return ids, nomes, vocabulario, colaboradores, _pontuar(vocabulario, colaboradores, projetos)
+
+
+def _habilidades_comuns(habilidades, vocabulario, colaboradores, posicao):
+    inicio, fim = colaboradores.indptr[posicao], colaboradores.indptr[posicao + 1]
+    skills_colaborador = set(colaboradores.indices[inicio:fim])
+    return [h for h in habilidades if vocabulario.get(h) in skills_colaborador]
+
+
+def aderencia_em_lote(skill_index, projetos, limit=5):
+    """Pontua vários projetos contra todos os colaboradores, LOTE_PROJETOS por vez.
+
+    Retorna {idDemandas: [sugestões]} com os `limit` melhores de cada projeto,
+    na mesma ordem de SkillIndex.top_k: aderência decrescente e, no empate, id.
+    """
+    if not projetos:
+        return {}
+    ids, nomes, vocabulario, colaboradores = skill_index.matrix()
+    if not ids:
+        return {project_id: [] for project_id, _ in projetos}
+
+    k = min(limit, len(ids))
+    resultado = {}
+    for inicio in range(0, len(projetos), LOTE_PROJETOS):
+        bloco = projetos[inicio:inicio + LOTE_PROJETOS]
+        scores = _pontuar(vocabulario, colaboradores, bloco)
+        # Ordenação estável: no empate vale a ordem das colunas, que é a dos ids
+        melhores = np.argsort(-scores, axis=1, kind='stable')[:, :k]
+        for linha, (project_id, habilidades) in enumerate(bloco):
+            resultado[project_id] = [{
+                'id': ids[posicao],
+                'nome': nomes[posicao],
+                'aderencia': round(float(scores[linha, posicao]) * 100, 2),
+                'habilidades_comuns': _habilidades_comuns(habilidades, vocabulario, colaboradores, posicao)
+            } for posicao in melhores[linha]]
+    return resultado
+
+
+def propor_alocacao(skill_index, projetos, capacidade):
+    """Propõe um responsável por projeto maximizando a aderência total.
+
+    `capacidade` mapeia idColaborador -> vagas livres no período (colaboradores
+    ausentes não recebem projetos). Cada vaga vira uma coluna da matriz de custo
+    e o problema é resolvido como uma atribuição linear (algoritmo húngaro, via
+    scipy), o que respeita a capacidade de cada pessoa por construção.
+    Retorna {idDemandas: sugestão ou None}.
+    """
+    # scipy.optimize é importado só aqui: o carregamento custa ~0,3 s e ~30 MB por worker
+    from scipy.optimize import linear_sum_assignment
+
+    if not projetos:
+        return {}
+    ids, nomes, vocabulario, colaboradores, scores = matriz_aderencia(skill_index, projetos)
+    vagas = np.asarray([max(int(capacidade.get(colaborador_id, 0)), 0) for colaborador_id in ids], dtype=np.int64)
+    # Ninguém precisa de mais vagas do que o número de projetos
+    vagas = np.minimum(vagas, len(projetos))
+    alocacao = {project_id: None for project_id, _ in projetos}
+    if not vagas.sum():
+        return alocacao
+
+    colunas = np.repeat(np.arange(len(ids)), vagas)
+    linhas_escolhidas, vagas_escolhidas = linear_sum_assignment(-scores[:, colunas])
+    for linha, vaga in zip(linhas_escolhidas, vagas_escolhidas):
+        posicao = colunas[vaga]
+        score = float(scores[linha, posicao])
+        if score <= 0:
+            continue
+        project_id, habilidades = projetos[linha]
+        alocacao[project_id] = {
+            'id': ids[posicao],
+            'nome': nomes[posicao],
+            'aderencia': round(score * 100, 2),
+            'habilidades_comuns': _habilidades_comuns(habilidades, vocabulario, colaboradores, posicao)
+        }
+    return alocacao
+
+
+# =============================================================================
+# MATRIZ TF-IDF PERSISTIDA (ADERÊNCIA SEMÂNTICA)
+# =============================================================================
+
+class SemanticSkillMatrix:
+    """Matriz TF-IDF (colaboradores x termos) ajustada uma vez e gravada em disco.
+
+    Cada versão é um diretório com os vetores CSR em arquivos .npy (que o
+    `np.load(mmap_mode='r')` consegue mapear em memória, ao contrário de um .npz),
+    o vetorizador já ajustado e os metadados dos colaboradores. O arquivo CURRENT
+    aponta para a versão publicada; todos os workers mapeiam os mesmos arquivos e
+    recarregam quando o CURRENT muda. A consulta é um único produto matriz-vetor.
+
+    O vetorizador é lido com pickle, então `base_dir` precisa ser exclusivo do
+    usuário da aplicação: é criado com permissão 0700 e recusado se pertencer a
+    outro usuário.
+    """
+
+    ARRAYS = ('data', 'indices', 'indptr')
+
+    def __init__(self, base_dir, max_age=300):
+        self.base_dir = base_dir
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._rebuild_pending = False
+        self._current_stamp = None
+        self._state = None   # (matriz, vetorizador, meta)
+        self._base_dir_ok = False
+
+    @property
+    def _current_path(self):
+        return os.path.join(self.base_dir, 'CURRENT')
+
+    def _preparar_base_dir(self):
+        if self._base_dir_ok:
+            return
+        os.makedirs(self.base_dir, mode=0o700, exist_ok=True)
+        info = os.lstat(self.base_dir)
+        if hasattr(os, 'getuid'):
+            if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+                raise RuntimeError(f'{self.base_dir} não é um diretório do usuário da aplicação; '
+                                   'defina ADERENCIA_CACHE_DIR para um diretório próprio.')
+            if stat.S_IMODE(info.st_mode) & 0o077:
+                os.chmod(self.base_dir, 0o700)
+        self._base_dir_ok = True
+
+    # ----- construção e publicação -----
+
+    def build(self, colaboradores):
+        """Ajusta o TF-IDF a partir de [(id, nome, [habilidades])] e publica uma nova versão."""
+        # O scikit-learn (~1 s e ~60 MB) só é carregado por quem usa a aderência
+        # semântica: aqui ou ao ler o vetorizador gravado em disco
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        documentos = [' '.join(habilidades) for _, _, habilidades in colaboradores]
+        vectorizer = TfidfVectorizer(strip_accents='unicode')
+        if any(documento.strip() for documento in documentos):
+            matriz = vectorizer.fit_transform(documentos).tocsr()
+        else:
+            # Nenhuma habilidade cadastrada: vocabulário vazio, todas as aderências ficam em 0%
+            vectorizer = None
+            matriz = sparse.csr_matrix((len(colaboradores), 0), dtype=np.float64)
+
+        self._preparar_base_dir()
+        versao = f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}"
+        destino = os.path.join(self.base_dir, versao)
+        os.makedirs(destino, exist_ok=True)
+        for nome in self.ARRAYS:
+            np.save(os.path.join(destino, f'{nome}.npy'), getattr(matriz, nome))
+        with open(os.path.join(destino, 'vectorizer.pkl'), 'wb') as f:
+            pickle.dump(vectorizer, f)
+        with open(os.path.join(destino, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({
+                'built_at': time.time(),
+                'shape': list(matriz.shape),
+                'ids': [colaborador_id for colaborador_id, _, _ in colaboradores],
+                'nomes': [nome for _, nome, _ in colaboradores],
+                'habilidades': [habilidades for _, _, habilidades in colaboradores],
+            }, f, ensure_ascii=False)
+
+        tmp = f"{self._current_path}.{versao}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(versao)
+        os.replace(tmp, self._current_path)
+        self._cleanup(keep=versao)
+        return versao
+
+    def _cleanup(self, keep, retain=2):
+        # Mantém as versões mais recentes; workers que ainda mapeiam uma versão
+        # removida continuam lendo normalmente até recarregar, e quem estava
+        # abrindo uma delas relê o CURRENT (ver _load_current)
+        versoes = sorted(d for d in os.listdir(self.base_dir)
+                         if os.path.isdir(os.path.join(self.base_dir, d)) and d != keep)
+        for versao in versoes[:max(len(versoes) - (retain - 1), 0)]:
+            shutil.rmtree(os.path.join(self.base_dir, versao), ignore_errors=True)
+
+    def schedule_rebuild(self, snapshot_fn):
+        """Reconstrói a matriz em uma thread de fundo (no máximo uma por vez por worker)."""
+        with self._rebuild_lock:
+            if self._rebuild_pending:
+                return
+            self._rebuild_pending = True
+
+        def run():
+            try:
+                self.build(snapshot_fn())
+            except Exception as e:
+                print(f"Erro ao reconstruir matriz TF-IDF: {e}")
+            finally:
+                with self._rebuild_lock:
+                    self._rebuild_pending = False
+
+        threading.Thread(target=run, name='tfidf-rebuild', daemon=True).start()
+
+    # ----- carga (memory-map) -----
+
+    def _load_current(self, tentativas=2):
+        self._preparar_base_dir()
+        try:
+            info = os.stat(self._current_path)
+            stamp = (info.st_ino, info.st_mtime_ns)
+        except FileNotFoundError:
+            return None
+        if stamp == self._current_stamp and self._state is not None:
+            return self._state
+        with self._lock:
+            with open(self._current_path) as f:
+                versao = f.read().strip()
+            origem = os.path.join(self.base_dir, versao)
+            try:
+                with open(os.path.join(origem, 'meta.json'), encoding='utf-8') as f:
+                    meta = json.load(f)
+                data, indices, indptr = (np.load(os.path.join(origem, f'{nome}.npy'), mmap_mode='r')
+                                         for nome in self.ARRAYS)
+                with open(os.path.join(origem, 'vectorizer.pkl'), 'rb') as f:
+                    vectorizer = pickle.load(f)
+            except FileNotFoundError:
+                # Outro worker publicou uma versão nova e apagou esta entre a leitura
+                # do CURRENT e a abertura dos arquivos: o CURRENT já aponta para a nova
+                if tentativas <= 1:
+                    raise
+            else:
+                matriz = sparse.csr_matrix((data, indices, indptr), shape=tuple(meta['shape']), copy=False)
+                self._state = (matriz, vectorizer, meta)
+                self._current_stamp = stamp
+                return self._state
+        return self._load_current(tentativas - 1)
+
+    def ensure_built(self, snapshot_fn):
+        """Garante uma versão publicada; se estiver velha, agenda a reconstrução em segundo plano."""
+        state = self._load_current()
+        if state is None:
+            self.build(snapshot_fn())
+            state = self._load_current()
+        elif self.max_age and time.time() - state[2]['built_at'] > self.max_age:
+            self.schedule_rebuild(snapshot_fn)
+        return state
+
+    # ----- consulta -----
+
+    def top_k(self, texto_projeto, snapshot_fn, limit=None):
+        matriz, vectorizer, meta = self.ensure_built(snapshot_fn)
+        total = matriz.shape[0]
+        if vectorizer is None or not total:
+            scores = np.zeros(total)
+            termos_projeto = set()
+        else:
+            consulta = vectorizer.transform([texto_projeto])
+            # Linhas já normalizadas (L2): o produto escalar é a similaridade de cosseno
+            scores = np.asarray((matriz @ consulta.T).todense()).ravel()
+            termos_projeto = set(vectorizer.build_analyzer()(texto_projeto))
+
+        if limit is not None and limit < total:
+            # Todos os empatados com o limit-ésimo score entram na ordenação, para que
+            # o desempate pelo id decida quem fica (argpartition escolheria qualquer um)
+            corte = -np.partition(-scores, limit - 1)[limit - 1]
+            candidatos = np.flatnonzero(scores >= corte)
+        else:
+            candidatos = np.arange(total)
+        # Ordena por aderência decrescente, desempatando pelo id do colaborador
+        ids = np.asarray(meta['ids'])
+        ordem = candidatos[np.lexsort((ids[candidatos], -scores[candidatos]))][:limit]
+
+        analyzer = vectorizer.build_analyzer() if vectorizer is not None else None
+        resultados = []
+        for posicao in ordem:
+            habilidades = meta['habilidades'][posicao]
+            comuns = [h for h in habilidades if analyzer and termos_projeto.intersection(analyzer(h))]
+            resultados.append({
+                'id': meta['ids'][posicao],
+                'nome': meta['nomes'][posicao],
+                'aderencia': round(float(scores[posicao]) * 100, 2),
+                'habilidades_comuns': comuns
+            })
+        return resultados
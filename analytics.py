@@ -0,0 +1,175 @@
+import threading
+from datetime import date
+
+import numpy as np
+
+from changelog import ler_changelog
+
+# =============================================================================
+# INDICADORES DE ENTREGA (SLA, ATRASO E TEMPO DE CICLO)
+# =============================================================================
+
+ETAPAS = ('reuniao_requisitos', 'coleta_preparacao_dados', 'criacao_relatorio_dashboard',
+          'validacao_refinamento', 'documentacao')
+AGRUPAMENTOS = ('status', 'prioridade', 'solicitante', 'periodo')
+PERCENTIS = (50, 85, 95)
+
+
+def _datas(valores):
+    return np.array([np.datetime64(v, 'D') if v else np.datetime64('NaT') for v in valores], dtype='datetime64[D]')
+
+
+def _dias(inicio, fim):
+    """Dias entre duas colunas de datas; NaN quando alguma das datas falta."""
+    delta = (fim - inicio).astype('float64')
+    delta[np.isnat(inicio) | np.isnat(fim)] = np.nan
+    return delta
+
+
+def percentis_por_grupo(grupos, valores, n_grupos, percentis=PERCENTIS):
+    """Percentis (interpolação linear, como np.percentile) de `valores` por grupo.
+
+    Ordena uma única vez por (grupo, valor) e calcula a posição de cada percentil
+    dentro do trecho de cada grupo, sem laço em Python por grupo. Retorna uma
+    matriz (n_grupos, len(percentis)) com NaN nos grupos sem valores.
+    """
+    validos = ~np.isnan(valores)
+    grupos, valores = grupos[validos], valores[validos]
+    ordem = np.lexsort((valores, grupos))
+    valores = valores[ordem]
+    contagem = np.bincount(grupos, minlength=n_grupos)
+    inicio = np.concatenate(([0], np.cumsum(contagem)[:-1]))
+
+    resultado = np.full((n_grupos, len(percentis)), np.nan)
+    com_valores = contagem > 0
+    for i, p in enumerate(percentis):
+        posicao = (contagem[com_valores] - 1) * (p / 100.0)
+        baixo = np.floor(posicao).astype(int)
+        alto = np.ceil(posicao).astype(int)
+        fracao = posicao - baixo
+        base = inicio[com_valores]
+        resultado[com_valores, i] = valores[base + baixo] * (1 - fracao) + valores[base + alto] * fracao
+    return resultado
+
+
+class DeliveryAnalytics:
+    """Colunas de Demandas carregadas em arrays NumPy e agregadas sob demanda.
+
+    Os dados são recarregados quando aparecem escritas em Demandas nas versões da
+    ChangeLog posteriores à última lida (uma consulta pelo índice a cada chamada,
+    até o ponto seguro; ver changelog.py), então o resultado vale até a próxima
+    escrita em qualquer worker, inclusive as que confirmam fora da ordem das
+    versões. Os agrupamentos já calculados ficam em cache até lá (ou até a virada
+    do dia, que muda o que está atrasado).
+    """
+
+    def __init__(self, atraso=10):
+        self.atraso = atraso
+        self._lock = threading.Lock()
+        self._versao = None
+        self._dados = None
+        self._rollups = {}
+
+    def load(self, cursor):
+        cursor.execute(f"""
+            SELECT s.status, p.prioridade, sol.nome as solicitante, sol.idColaborador as solicitante_colaborador,
+                   d.dataAbertura, d.inicio_projeto, d.dataConclusao, d.dataLimite, {', '.join('d.' + e for e in ETAPAS)}
+            FROM Demandas d
+            LEFT JOIN StatusDemanda s ON d.idStatusDemanda = s.idStatusDemanda
+            LEFT JOIN PrioridadeDemanda p ON d.idPrioridadeDemanda = p.idPrioridadeDemanda
+            LEFT JOIN Solicitante sol ON d.idSolicitante = sol.idSolicitante
+        """)
+        rows = cursor.fetchall()
+        abertura = _datas([r['dataAbertura'] for r in rows])
+        return {
+            'status': np.array([r['status'] or '' for r in rows], dtype=object),
+            'prioridade': np.array([r['prioridade'] or '' for r in rows], dtype=object),
+            'solicitante': np.array([r['solicitante'] or '' for r in rows], dtype=object),
+            'periodo': abertura.astype('datetime64[M]').astype(str).astype(object),
+            'solicitante_colaborador': np.array([r['solicitante_colaborador'] or 0 for r in rows], dtype=np.int64),
+            'abertura': abertura,
+            'inicio': _datas([r['inicio_projeto'] for r in rows]),
+            'conclusao': _datas([r['dataConclusao'] for r in rows]),
+            'limite': _datas([r['dataLimite'] for r in rows]),
+            'etapas': np.array([[r[e] == 'REALIZADO' for e in ETAPAS] for r in rows], dtype=bool).reshape(len(rows), len(ETAPAS)),
+        }
+
+    def rollup(self, cursor, agrupamento, solicitante_colaborador=None):
+        """Indicadores por `agrupamento` (ver AGRUPAMENTOS); com `solicitante_colaborador`,
+        considera só as demandas daquele solicitante."""
+        anterior = self._versao
+        versao, linhas = ler_changelog(cursor, anterior, self.atraso)
+        # Um salto na sequência pode ser histórico já podado: na dúvida, recarrega
+        alterou = (anterior is None or any(row['tabela'] == 'Demandas' for row in linhas)
+                   or bool(linhas) and linhas[0]['versao'] != anterior + 1)
+        hoje = date.today()
+        with self._lock:
+            if alterou or self._dados is None:
+                self._dados = self.load(cursor)
+                self._rollups = {}
+            if alterou or versao > (self._versao or 0):
+                self._versao = versao
+            chave = (agrupamento, solicitante_colaborador, hoje)
+            if chave not in self._rollups:
+                self._rollups[chave] = self._calcular(self._dados, agrupamento, solicitante_colaborador, hoje)
+            return dict(self._rollups[chave], versao=versao)
+
+    def _calcular(self, dados, agrupamento, solicitante_colaborador, hoje):
+        if solicitante_colaborador is not None:
+            mascara = dados['solicitante_colaborador'] == solicitante_colaborador
+            dados = {k: v[mascara] for k, v in dados.items()}
+
+        chaves = dados[agrupamento]
+        if agrupamento == 'periodo':
+            # Entregas são contadas no mês da conclusão, que pode não ter aberturas
+            conclusao_mes = dados['conclusao'][~np.isnat(dados['conclusao'])].astype('datetime64[M]').astype(str).astype(object)
+            rotulos = np.unique(np.concatenate((chaves, conclusao_mes))) if len(chaves) or len(conclusao_mes) else np.array([], dtype=object)
+        else:
+            rotulos = np.unique(chaves) if len(chaves) else np.array([], dtype=object)
+        n = len(rotulos)
+        grupos = np.searchsorted(rotulos, chaves).astype(np.int64)
+
+        hoje = np.datetime64(hoje, 'D')
+        concluido = ~np.isnat(dados['conclusao'])
+        com_limite = ~np.isnat(dados['limite'])
+        referencia = np.where(concluido, dados['conclusao'], hoje)
+        atrasado = com_limite & (referencia > dados['limite'])
+
+        total = np.bincount(grupos, minlength=n)
+        concluidos = np.bincount(grupos, weights=concluido, minlength=n)
+        atrasados = np.bincount(grupos, weights=atrasado, minlength=n)
+        no_prazo = np.bincount(grupos, weights=concluido & com_limite & ~atrasado, minlength=n)
+        concluidos_com_limite = np.bincount(grupos, weights=concluido & com_limite, minlength=n)
+        etapas = np.stack([np.bincount(grupos, weights=dados['etapas'][:, j], minlength=n)
+                           for j in range(len(ETAPAS))], axis=1) if n else np.zeros((0, len(ETAPAS)))
+
+        tempos = {
+            'lead_time_dias': percentis_por_grupo(grupos, _dias(dados['abertura'], dados['conclusao']), n),
+            'ciclo_dias': percentis_por_grupo(grupos, _dias(dados['inicio'], dados['conclusao']), n),
+            'espera_dias': percentis_por_grupo(grupos, _dias(dados['abertura'], dados['inicio']), n),
+        }
+        entregues = concluidos
+        if agrupamento == 'periodo':
+            entregues = np.bincount(np.searchsorted(rotulos, conclusao_mes).astype(np.int64), minlength=n)
+
+        def taxa(parte, todo):
+            return round(float(parte) / float(todo), 4) if todo else None
+
+        def arredondar(valor):
+            return None if np.isnan(valor) else round(float(valor), 1)
+
+        return {
+            'agrupamento': agrupamento,
+            'data_referencia': str(hoje),
+            'grupos': [{
+                'chave': str(rotulos[i]),
+                'total': int(total[i]),
+                'concluidos': int(concluidos[i]),
+                'entregues': int(entregues[i]),
+                'atrasados': int(atrasados[i]),
+                'sla_cumprido': taxa(no_prazo[i], concluidos_com_limite[i]),
+                'taxa_etapas': {etapa: taxa(etapas[i, j], total[i]) for j, etapa in enumerate(ETAPAS)},
+                **{nome: {f'p{p}': arredondar(valores[i, k]) for k, p in enumerate(PERCENTIS)}
+                   for nome, valores in tempos.items()},
+            } for i in range(n)]
+        }
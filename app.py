@@ -1,13 +1,31 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
-from flask_mysqldb import MySQL
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Flask, Response, render_template, request, jsonify, session, redirect, url_for
+from werkzeug.security import generate_password_hash
 import os
-from datetime import datetime
+import atexit
+import base64
+import csv
+import io
+import json
+import re
+import tempfile
+import time
+from datetime import datetime, date, timedelta
 from functools import wraps
 from unidecode import unidecode
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
+import MySQLdb
+import MySQLdb.cursors
+import metrics
+from db_pool import PooledMySQL
+from json_provider import OrjsonProvider
+from lookups import LookupCache
+from audit_log import AuditLogWriter
+from changelog import ler_changelog
+from event_broker import EventBroker
+from response_cache import ResponseCache
+from analytics import AGRUPAMENTOS, DeliveryAnalytics
+from disponibilidade import ScheduleIndex
+from senhas import HashingBusy, PasswordHasher
+from aderencia import SkillIndex, SemanticSkillMatrix, aderencia_em_lote, extrair_habilidades_projeto, propor_alocacao
 
 # =============================================================================
 # CONFIGURAÇÃO INICIAL DA APLICAÇÃO FLASK
@@ -15,6 +33,9 @@ import numpy as np
 
 app = Flask(__name__, template_folder='templates')
 
+# Respostas JSON via orjson; datas em ISO 8601, exceto as dos projetos, já formatadas no SQL (ver json_provider.py)
+app.json = OrjsonProvider(app)
+
 app.secret_key = os.environ.get('SECRET_KEY', 'ruby_alignment_kanban_secret_key_2024')
 
 app.config['MYSQL_HOST'] = os.environ.get('MYSQL_HOST', 'yamabiko.proxy.rlwy.net')
@@ -23,11 +44,73 @@ app.config['MYSQL_USER'] = os.environ.get('MYSQL_USER', 'root')
 app.config['MYSQL_PASSWORD'] = os.environ.get('MYSQL_PASSWORD', 'vAUtAghOOjnBQNAgtgbKYjKgxrxypBWN')
 app.config['MYSQL_DB'] = os.environ.get('MYSQL_DB', 'railway')
 app.config['MYSQL_CURSORCLASS'] = 'DictCursor'
+app.config['MYSQL_POOL_MIN_SIZE'] = int(os.environ.get('MYSQL_POOL_MIN_SIZE', 2))
+app.config['MYSQL_POOL_MAX_SIZE'] = int(os.environ.get('MYSQL_POOL_MAX_SIZE', 10))
+app.config['MYSQL_POOL_MAX_LIFETIME'] = int(os.environ.get('MYSQL_POOL_MAX_LIFETIME', 1800))
+app.config['MYSQL_POOL_TIMEOUT'] = float(os.environ.get('MYSQL_POOL_TIMEOUT', 10))
 
-mysql = MySQL(app)
+# Pool de conexões por worker; mysql.connection empresta uma conexão por requisição
+mysql = PooledMySQL(app, wrap_connection=metrics.InstrumentedConnection)
+if os.environ.get('MYSQL_POOL_WARMUP', '1') == '1':
+    mysql.pool.warm_up()
 
 DEFAULT_PASSWORD = "cah@123"
 
+# Número máximo de projetos simultâneos por colaborador usado na proposta de alocação
+MAX_PROJETOS_SIMULTANEOS = int(os.environ.get('MAX_PROJETOS_SIMULTANEOS', 3))
+
+# Ids das tabelas de referência (StatusDemanda, PrioridadeDemanda, NivelAcesso, ...)
+lookups = LookupCache(ttl=int(os.environ.get('LOOKUP_CACHE_TTL', 600)))
+
+# Latência e custo de SQL por rota em /metrics (agregado entre os workers do gunicorn)
+metrics.init_app(app, token=os.environ.get('METRICS_TOKEN'))
+
+# Tempo máximo entre o trigger gravar a versão na ChangeLog e o commit; quem lê a
+# ChangeLog não avança além de uma lacuna mais recente que isso (ver changelog.py)
+CHANGELOG_COMMIT_LAG = float(os.environ.get('CHANGELOG_COMMIT_LAG', 10))
+
+# Índice habilidade -> colaboradores usado no cálculo de aderência (um por worker,
+# sincronizado pela ChangeLog)
+skill_index = SkillIndex(atraso=CHANGELOG_COMMIT_LAG)
+
+# Matriz TF-IDF dos colaboradores, gravada em disco e mapeada em memória por todos os workers
+semantic_matrix = SemanticSkillMatrix(
+    os.environ.get('ADERENCIA_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'ruby_aderencia')),
+    max_age=int(os.environ.get('SKILL_INDEX_TTL', 300))
+)
+
+# Períodos dos projetos em andamento por colaborador (disponibilidade e conflito de agenda)
+schedule_index = ScheduleIndex(atraso=CHANGELOG_COMMIT_LAG)
+
+# Indicadores de entrega em arrays NumPy, recalculados após cada escrita em Demandas
+delivery_analytics = DeliveryAnalytics(atraso=CHANGELOG_COMMIT_LAG)
+
+# Broker local que distribui os eventos de alteração (SSE) entre os workers
+event_broker = EventBroker(
+    os.environ.get('EVENT_BROKER_PATH', os.path.join(tempfile.gettempdir(), 'ruby_eventos', 'eventos.db')),
+    poll_interval=float(os.environ.get('EVENT_BROKER_POLL_INTERVAL', 0.5)),
+    retention=int(os.environ.get('EVENT_BROKER_RETENTION', 300))
+)
+
+# Respostas das rotas de leitura por perfil/colaborador; as escritas as invalidam em todos os workers
+response_cache = ResponseCache(
+    os.environ.get('RESPONSE_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'ruby_cache', 'geracoes.db')),
+    max_bytes=int(os.environ.get('RESPONSE_CACHE_MAX_MB', 64)) * 1024 * 1024,
+    ttl=int(os.environ.get('RESPONSE_CACHE_TTL', 300))
+)
+
+# Hash de senhas em processos separados, com fila limitada (rajadas de login não ocupam as threads).
+# PASSWORD_HASH_WORKERS e PASSWORD_HASH_MAX_PENDING são totais da máquina, somando todos os
+# workers do gunicorn: as vagas são arquivos de trava em PASSWORD_HASH_LOCK_DIR (ver senhas.py)
+password_hasher = PasswordHasher(
+    method=os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000'),
+    workers=max(1, int(os.environ.get('PASSWORD_HASH_WORKERS') or os.cpu_count() or 1)),
+    max_pending=max(1, int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 16))),
+    timeout=float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10)),
+    diretorio=os.environ.get('PASSWORD_HASH_LOCK_DIR', os.path.join(tempfile.gettempdir(), 'ruby_senhas'))
+)
+atexit.register(password_hasher.shutdown)
+
 # =============================================================================
 # DECORATORS E FUNÇÕES AUXILIARES
 # =============================================================================
@@ -66,44 +149,144 @@ def colaborador_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def write_log_batch(rows):
+    # Executado pela thread do AuditLogWriter, fora do contexto de requisição
+    with metrics.track('audit_log'), mysql.pool.connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.executemany("INSERT INTO Logs (timestamp, usuario, acao, detalhes) VALUES (%s, %s, %s, %s)", rows)
+            conn.commit()
+        finally:
+            cur.close()
+
+audit_log = AuditLogWriter(
+    write_log_batch,
+    spill_dir=os.environ.get('AUDIT_LOG_SPILL_DIR', os.path.join(tempfile.gettempdir(), 'ruby_audit_log')),
+    max_queue=int(os.environ.get('AUDIT_LOG_MAX_QUEUE', 10000)),
+    batch_size=int(os.environ.get('AUDIT_LOG_BATCH_SIZE', 200)),
+    flush_interval=float(os.environ.get('AUDIT_LOG_FLUSH_INTERVAL', 2.0))
+)
+atexit.register(audit_log.close)
+
+@metrics.timed('log_change')
 def log_change(user, action, details):
-    cur = None
+    # Apenas enfileira; a gravação na tabela Logs é feita em lote pelo audit_log
+    audit_log.log(user, action, details)
+
+def reload_skill_snapshot():
+    # Executado pela thread que reconstrói a matriz TF-IDF, depois do commit: relê
+    # todos os colaboradores do banco, porque o índice deste worker pode nem ter
+    # sido carregado ainda (só conteria o colaborador recém-alterado)
+    with metrics.track('skill_index'), mysql.pool.connection() as conn:
+        cur = conn.cursor()
+        try:
+            skill_index.load(cur)
+        finally:
+            cur.close()
+    return skill_index.snapshot()
+
+EMAIL_DOMAIN = 'ruby.com'
+EMAIL_ALLOCATION_ATTEMPTS = 5
+
+def like_prefix(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + f"%@{EMAIL_DOMAIN}"
+
+def fetch_taken_emails(cursor, table, local_parts):
+    """E-mails já usados na tabela para os prefixos dados, em uma única consulta
+    (a busca por prefixo usa o índice único de email)."""
+    local_parts = list(dict.fromkeys(local_parts))
+    if not local_parts:
+        return set()
+    conditions = ' OR '.join(['email LIKE %s'] * len(local_parts))
+    cursor.execute(f"SELECT email FROM {table} WHERE {conditions}", tuple(like_prefix(p) for p in local_parts))
+    return {row['email'].lower() for row in cursor.fetchall()}
+
+def pick_free_email(local_part, taken):
+    """Menor e-mail livre no padrão base@, base01@, base02@... dado o conjunto `taken` (minúsculo)."""
+    pattern = re.compile(rf"{re.escape(local_part.lower())}(\d{{2,}})?@{re.escape(EMAIL_DOMAIN)}")
+    base_taken, used = False, set()
+    for email in taken:
+        match = pattern.fullmatch(email)
+        if not match:
+            continue
+        if match.group(1) is None:
+            base_taken = True
+        else:
+            used.add(int(match.group(1)))
+    if not base_taken:
+        return f"{local_part}@{EMAIL_DOMAIN}"
+    i = 1
+    while i in used:
+        i += 1
+    return f"{local_part}{i:02d}@{EMAIL_DOMAIN}"
+
+def next_free_email(cursor, table, local_part, exclude=()):
+    """Próximo e-mail livre para `local_part` com uma única consulta.
+
+    `exclude` recebe e-mails que falharam por chave duplicada em tentativas
+    anteriores, já que o snapshot da transação pode ainda não enxergar a linha
+    concorrente.
+    """
+    taken = fetch_taken_emails(cursor, table, [local_part]) | {e.lower() for e in exclude}
+    return pick_free_email(local_part, taken)
+
+def insert_with_unique_email(cursor, table, local_part, insert):
+    """Executa `insert(email)` com o próximo e-mail livre, repetindo se outra
+    requisição concorrente gravar o mesmo e-mail primeiro (erro 1062)."""
+    exclude = []
+    for attempt in range(EMAIL_ALLOCATION_ATTEMPTS):
+        email = next_free_email(cursor, table, local_part, exclude)
+        try:
+            insert(email)
+            return email
+        except MySQLdb.IntegrityError as e:
+            if e.args[0] != 1062 or 'email' not in str(e.args[-1]) or attempt == EMAIL_ALLOCATION_ATTEMPTS - 1:
+                raise
+            exclude.append(email)
+
+PASSWORD_HASH_RETRY_AFTER = 5
+
+def hashing_busy(template):
+    """Resposta para a fila de hashing cheia: 503 com Retry-After, em vez de erro interno."""
+    return (render_template(template, error='Muitos acessos simultâneos. Tente novamente em instantes.'),
+            503, {'Retry-After': str(PASSWORD_HASH_RETRY_AFTER)})
+
+def rehash_password(cur, user_id, senha_atual, password):
+    """Regrava o hash da senha com os parâmetros atuais (PASSWORD_HASH_METHOD).
+    Só altera se o hash não mudou desde a leitura; falhas não impedem o login."""
     try:
-        cur = mysql.connection.cursor()
-        cur.execute("INSERT INTO Logs (timestamp, usuario, acao, detalhes) VALUES (%s, %s, %s, %s)",
-                      (datetime.now(), user, action, details))
+        cur.execute("UPDATE ADM SET senha = %s WHERE idADM = %s AND senha = %s",
+                    (password_hasher.hash(password), user_id, senha_atual))
         mysql.connection.commit()
     except Exception as e:
-        print(f"ERRO CRÍTICO: Falha ao registrar log no banco de dados: {e}")
-    finally:
-        if cur: cur.close()
+        mysql.connection.rollback()
+        print(f"Aviso: falha ao atualizar o hash da senha: {e}")
 
-def generate_ruby_email(full_name, cursor):
+def ruby_email_local_part(full_name):
     parts = unidecode(full_name.lower()).replace('.', '').split()
-    base_email = f"{parts[0]}.{parts[-1]}" if len(parts) >= 2 else parts[0]
-    final_email = f"{base_email}@ruby.com"
-    
-    cursor.execute("SELECT email FROM Colaborador WHERE email = %s", (final_email,))
-    if not cursor.fetchone():
-        return final_email
-        
-    i = 1
-    while True:
-        numbered_email = f"{base_email}{i:02d}@ruby.com"
-        cursor.execute("SELECT email FROM Colaborador WHERE email = %s", (numbered_email,))
-        if not cursor.fetchone():
-            return numbered_email
-        i += 1
+    return f"{parts[0]}.{parts[-1]}" if len(parts) >= 2 else parts[0]
+
+# Cargos padrão por perfil, usados se a tabela Cargo não tiver um cargo com o nome do perfil
+CARGO_PADRAO = {'ADMINISTRADOR': 1, 'SOLICITANTE': 2, 'COLABORADOR': 3}
+
+def cargo_id_for_role(cursor, role_upper):
+    return lookups.get_id(cursor, 'cargo', role_upper) or CARGO_PADRAO.get(role_upper)
 
 # =============================================================================
 # ROTAS DE PÁGINAS E AUTENTICAÇÃO
 # =============================================================================
 
+# metrics.query_budget: máximo de comandos SQL por requisição no pior caminho em
+# regime, mais uma recarga quando a rota usa os caches (lookups, skill_index).
+# Conferido por scripts/orcamento_consultas.py.
+
 @app.route('/')
+@metrics.query_budget(0)
 def index():
     return redirect(url_for('login'))
 
 @app.route('/login', methods=['GET', 'POST'])
+@metrics.query_budget(2)
 def login():
     if 'user_id' in session:
         return redirect(url_for('dashboard'))
@@ -116,9 +299,13 @@ def login():
             cur.execute("SELECT a.idADM, a.nome, a.email, a.senha, a.status, na.nivel as perfil, a.idColaborador FROM ADM a JOIN NivelAcesso na ON a.idNivelAcesso = na.idNivelAcesso WHERE a.email = %s", (email,))
             user = cur.fetchone()
             if user:
-                is_valid = (user['status'] == 'TEMP' and user['senha'] == password) or \
-                           (user['status'] != 'TEMP' and check_password_hash(user['senha'], password))
+                if user['status'] == 'TEMP':
+                    is_valid, needs_rehash = user['senha'] == password, False
+                else:
+                    is_valid, needs_rehash = password_hasher.verify(user['senha'], password)
                 if is_valid:
+                    if needs_rehash:
+                        rehash_password(cur, user['idADM'], user['senha'], password)
                     session.permanent = True
                     session['user_id'] = user['idADM']
                     session['user_name'] = user['nome']
@@ -132,6 +319,8 @@ def login():
                     log_change(user['nome'], 'LOGIN', 'Login bem-sucedido.')
                     return redirect(url_for('dashboard'))
             return render_template('login.html', error='E-mail ou senha inválidos.')
+        except HashingBusy:
+            return hashing_busy('login.html')
         except Exception as e:
             print(f"Erro no login: {e}")
             return render_template('login.html', error='Erro interno do servidor.')
@@ -164,6 +353,7 @@ def login():
 #                           NEW
 # =========================================================
 @app.route('/change_password_first', methods=['GET', 'POST'])
+@metrics.query_budget(1)
 @login_required
 def change_password_first():
     if request.method == 'POST':
@@ -178,7 +368,7 @@ def change_password_first():
             )
 
         try:
-            hashed_password = generate_password_hash(new_password)
+            hashed_password = password_hasher.hash(new_password)
             cur = mysql.connection.cursor()
             cur.execute("""
                 UPDATE ADM
@@ -197,6 +387,8 @@ def change_password_first():
             # Redireciona após o sucesso
             return redirect(url_for('dashboard'))
 
+        except HashingBusy:
+            return hashing_busy('change_password_first.html')
         except Exception as e:
             print(f"Erro ao atualizar senha: {e}")
             return render_template(
@@ -208,11 +400,13 @@ def change_password_first():
     return render_template('change_password_first.html')
 
 @app.route('/dashboard')
+@metrics.query_budget(0)
 @login_required
 def dashboard():
     return render_template('dashboard.html')
 
 @app.route('/logout')
+@metrics.query_budget(0)
 def logout():
     log_change(session.get('user_name', 'Desconhecido'), 'LOGOUT', 'Sessão encerrada.')
     session.clear()
@@ -220,6 +414,7 @@ def logout():
 
 # ADICIONE ESTE NOVO BLOCO DE CÓDIGO AQUI
 @app.route('/api/session', methods=['GET'])
+@metrics.query_budget(0)
 @login_required
 def get_session_data():
     """Retorna os dados da sessão do usuário atual para o frontend."""
@@ -236,19 +431,56 @@ def get_session_data():
 # API - GERENCIAMENTO DE USUÁRIOS
 # =============================================================================
 
+USERS_QUERY = "SELECT a.idADM, a.nome, c.nome as nome_completo, a.email, n.nivel as perfil FROM ADM a JOIN NivelAcesso n ON a.idNivelAcesso = n.idNivelAcesso JOIN Colaborador c ON a.idColaborador = c.idColaborador"
+
 @app.route('/api/users', methods=['GET'])
+@metrics.query_budget(1)
 @login_required
 @admin_required
+@response_cache.cached('users')
 def get_users():
     cur = mysql.connection.cursor()
-    cur.execute("SELECT a.idADM, a.nome, c.nome as nome_completo, a.email, n.nivel as perfil FROM ADM a JOIN NivelAcesso n ON a.idNivelAcesso = n.idNivelAcesso JOIN Colaborador c ON a.idColaborador = c.idColaborador ORDER BY a.nome")
+    cur.execute(USERS_QUERY + " ORDER BY a.nome")
     users = cur.fetchall()
     cur.close()
     return jsonify({'data': users})
 
+@app.route('/api/users/changes', methods=['GET'])
+@metrics.query_budget(5)
+@login_required
+@admin_required
+def get_user_changes():
+    """Usuários inseridos, alterados ou removidos desde o token `since` (ver /api/projects/changes)."""
+    cur = None
+    try:
+        cur = mysql.connection.cursor()
+        token, reset, changes = read_changes(cur, parse_change_token(request.args.get('since')), ['ADM', 'Colaborador'])
+        if reset:
+            return jsonify({'token': str(token), 'reset': True, 'inserted': [], 'updated': [], 'deleted': []})
+
+        registros = dict(changes['ADM'])
+        if changes['Colaborador']:
+            # Alterar o Colaborador muda o nome completo exibido na lista de usuários
+            colaborador_ids = list(changes['Colaborador'])
+            cur.execute(f"SELECT idADM FROM ADM WHERE idColaborador IN ({', '.join(['%s'] * len(colaborador_ids))})", tuple(colaborador_ids))
+            for row in cur.fetchall():
+                registros.setdefault(row['idADM'], 'U')
+        rows = []
+        if registros:
+            cur.execute(USERS_QUERY + f" WHERE a.idADM IN ({', '.join(['%s'] * len(registros))})", tuple(registros))
+            rows = cur.fetchall()
+        return jsonify(dict(split_changes(registros, rows, 'idADM'), token=str(token), reset=False))
+    except Exception as e:
+        print(f"Erro em get_user_changes: {e}")
+        return jsonify({'error': f'Erro interno do servidor: {str(e)}'}), 500
+    finally:
+        if cur: cur.close()
+
 @app.route('/api/users/<int:user_id>', methods=['GET'])
+@metrics.query_budget(2)
 @login_required
 @admin_required
+@response_cache.cached('users')
 def get_user_details(user_id):
     cur = None
     try:
@@ -276,6 +508,7 @@ def get_user_details(user_id):
         if cur: cur.close()
 
 @app.route('/api/users', methods=['POST'])
+@metrics.query_budget(5)
 @login_required
 @admin_required
 def add_user():
@@ -287,33 +520,37 @@ def add_user():
             return jsonify({'error': 'Todos os campos de usuário são obrigatórios.'}), 400
         
         cur = mysql.connection.cursor()
-        corporate_email = generate_ruby_email(data['nome_completo'], cur)
         role_upper = data['role'].upper()
         
-        cargo_map = {'ADMINISTRADOR': 1, 'SOLICITANTE': 2, 'COLABORADOR': 3}
-        cur.execute("SELECT idDepartamento FROM Departamento WHERE nome = 'TI'")
-        departamento = cur.fetchone()
-        cur.execute("SELECT idStatusColaborador FROM StatusColaborador WHERE status = 'ativo'")
-        status = cur.fetchone()
+        departamento_id = lookups.get_id(cur, 'departamento', 'TI')
+        status_id = lookups.get_id(cur, 'status_colaborador', 'ativo')
 
-        if not all([departamento, status]):
+        if not all([departamento_id, status_id]):
             return jsonify({'error': 'Erro de configuração: Departamento ou Status não encontrado.'}), 500
         
-        cur.execute("INSERT INTO Colaborador (nome, email, telefone, dataAdmissao, idCargo, idDepartamento, idStatusColaborador) VALUES (%s, %s, %s, %s, %s, %s, %s)",
-                    (data['nome_completo'], corporate_email, data['phone'], data['admission_date'], cargo_map.get(role_upper), departamento['idDepartamento'], status['idStatusColaborador']))
+        cargo_id = cargo_id_for_role(cur, role_upper)
+        corporate_email = insert_with_unique_email(
+            cur, 'Colaborador', ruby_email_local_part(data['nome_completo']),
+            lambda email: cur.execute("INSERT INTO Colaborador (nome, email, telefone, dataAdmissao, idCargo, idDepartamento, idStatusColaborador) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                                      (data['nome_completo'], email, data['phone'], data['admission_date'], cargo_id, departamento_id, status_id))
+        )
         colaborador_id = cur.lastrowid
 
         skills = data.get('skills', [])
         if skills:
             cur.executemany("INSERT INTO HardSkill (idColaborador, habilidade) VALUES (%s, %s)", [(colaborador_id, skill) for skill in skills])
 
-        nivel_acesso_map = {'ADMINISTRADOR': 1, 'SOLICITANTE': 2, 'COLABORADOR': 3}
-        nivel_acesso_id = nivel_acesso_map.get(role_upper)
+        nivel_acesso_id = lookups.get_id(cur, 'nivel_acesso', role_upper)
         
         cur.execute("INSERT INTO ADM (nome, email, senha, dataCadastro, idColaborador, idNivelAcesso, status) VALUES (%s, %s, %s, %s, %s, %s, %s)",
                     (data['nome_login'], corporate_email, DEFAULT_PASSWORD, datetime.now(), colaborador_id, nivel_acesso_id, 'TEMP'))
+        user_id = cur.lastrowid
         
         mysql.connection.commit()
+        publish_user_event('I', user_id)
+        if role_upper == 'COLABORADOR':
+            skill_index.upsert(colaborador_id, data['nome_completo'], skills)
+            semantic_matrix.schedule_rebuild(reload_skill_snapshot)
         log_change(session['user_name'], 'USUÁRIO ADICIONADO', f"Usuário: {data['nome_completo']}, E-mail: {corporate_email}")
         return jsonify({'success': True, 'message': f'Usuário "{data["nome_completo"]}" criado com o e-mail {corporate_email}!'}), 201
 
@@ -325,6 +562,7 @@ def add_user():
         if cur: cur.close()
 
 @app.route('/api/users/<int:user_id>', methods=['PUT'])
+@metrics.query_budget(6)
 @login_required
 @admin_required
 def update_user(user_id):
@@ -346,11 +584,16 @@ def update_user(user_id):
             cur.executemany("INSERT INTO HardSkill (idColaborador, habilidade) VALUES (%s, %s)", [(colaborador_id, skill) for skill in skills])
 
         role_upper = data['role'].upper()
-        nivel_acesso_map = {'ADMINISTRADOR': 1, 'SOLICITANTE': 2, 'COLABORADOR': 3}
-        nivel_acesso_id = nivel_acesso_map.get(role_upper)
+        nivel_acesso_id = lookups.get_id(cur, 'nivel_acesso', role_upper)
         cur.execute("UPDATE ADM SET nome = %s, idNivelAcesso = %s WHERE idADM = %s", (data['nome_login'], nivel_acesso_id, user_id))
         
         mysql.connection.commit()
+        publish_user_event('U', user_id)
+        if role_upper == 'COLABORADOR':
+            skill_index.upsert(colaborador_id, data['nome_completo'], skills)
+        else:
+            skill_index.remove(colaborador_id)
+        semantic_matrix.schedule_rebuild(reload_skill_snapshot)
         log_change(session['user_name'], 'USUÁRIO ATUALIZADO', f"ID: {user_id}")
         return jsonify({'success': True, 'message': 'Usuário atualizado com sucesso!'})
 
@@ -362,6 +605,7 @@ def update_user(user_id):
         if cur: cur.close()
 
 @app.route('/api/users/<int:user_id>', methods=['DELETE'])
+@metrics.query_budget(3)
 @login_required
 @admin_required
 def delete_user(user_id):
@@ -378,6 +622,9 @@ def delete_user(user_id):
         cur.execute("DELETE FROM ADM WHERE idADM = %s", (user_id,))
         # O registro em Colaborador é mantido para integridade histórica
         mysql.connection.commit()
+        publish_user_event('D', user_id)
+        skill_index.remove(user['idColaborador'])
+        semantic_matrix.schedule_rebuild(reload_skill_snapshot)
         log_change(session['user_name'], 'USUÁRIO DELETADO', f"Usuário '{user['nome']}' (ID: {user_id}) foi deletado.")
         return jsonify({'success': True, 'message': f'Usuário "{user["nome"]}" deletado com sucesso!'})
     except Exception as e:
@@ -387,54 +634,568 @@ def delete_user(user_id):
     finally:
         if cur: cur.close()
 
+# Importação em lote de usuários (CSV ou JSONL)
+USER_IMPORT_CHUNK_SIZE = int(os.environ.get('USER_IMPORT_CHUNK_SIZE', 200))
+USER_IMPORT_MAX_ROWS = int(os.environ.get('USER_IMPORT_MAX_ROWS', 5000))
+USER_ROLES = ('ADMINISTRADOR', 'SOLICITANTE', 'COLABORADOR')
+
+def iter_import_rows(stream, formato):
+    """Lê o upload linha a linha, sem carregar o arquivo inteiro em memória.
+
+    Gera (número da linha, dicionário ou None, erro). No CSV, as habilidades vêm
+    na coluna `skills` separadas por ';'.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if formato == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            row = {k.strip(): (v or '').strip() for k, v in row.items() if k}
+            row['skills'] = [h.strip() for h in row.get('skills', '').split(';') if h.strip()]
+            yield reader.line_num, row, None
+    else:
+        for line_num, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+                if not isinstance(row, dict):
+                    raise ValueError('a linha não é um objeto JSON')
+            except ValueError as e:
+                yield line_num, None, f'JSON inválido: {e}'
+                continue
+            yield line_num, row, None
+
+def validate_import_row(row):
+    required = ['nome_login', 'nome_completo', 'role', 'admission_date', 'phone']
+    missing = [key for key in required if not str(row.get(key) or '').strip()]
+    if missing:
+        return f"Campos obrigatórios ausentes: {', '.join(missing)}"
+    for key in required:
+        row[key] = str(row[key]).strip()
+    if str(row['role']).upper() not in USER_ROLES:
+        return f"Perfil inválido: {row['role']}"
+    try:
+        datetime.strptime(str(row['admission_date']), '%Y-%m-%d')
+    except ValueError:
+        return 'Data de admissão inválida. Use aaaa-mm-dd.'
+    if not isinstance(row.get('skills', []), list):
+        return 'O campo skills deve ser uma lista.'
+    return None
+
+def import_user_chunk(cur, rows, ids):
+    """Grava um bloco de usuários já validados em uma transação, com executemany.
+
+    `rows` é uma lista de (número da linha, dados). Retorna [(linha, email, idColaborador, dados)].
+    """
+    local_parts = [ruby_email_local_part(data['nome_completo']) for _, data in rows]
+    taken = fetch_taken_emails(cur, 'Colaborador', local_parts)
+    emails = []
+    for local_part in local_parts:
+        email = pick_free_email(local_part, taken)
+        taken.add(email.lower())
+        emails.append(email)
+
+    now = datetime.now()
+    cur.executemany(
+        "INSERT INTO Colaborador (nome, email, telefone, dataAdmissao, idCargo, idDepartamento, idStatusColaborador) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+        [(data['nome_completo'], email, data['phone'], data['admission_date'],
+          ids['cargo'][data['role'].upper()], ids['departamento'], ids['status'])
+         for (_, data), email in zip(rows, emails)]
+    )
+    # Ids gerados buscados pelo e-mail: o AUTO_INCREMENT de um INSERT em lote
+    # não é garantidamente contíguo com innodb_autoinc_lock_mode = 2
+    cur.execute(f"SELECT idColaborador, email FROM Colaborador WHERE email IN ({', '.join(['%s'] * len(emails))})", tuple(emails))
+    colaborador_ids = {row['email'].lower(): row['idColaborador'] for row in cur.fetchall()}
+
+    created = [(line, email, colaborador_ids[email.lower()], data) for (line, data), email in zip(rows, emails)]
+    skills = [(colaborador_id, skill) for _, _, colaborador_id, data in created for skill in data.get('skills', [])]
+    if skills:
+        cur.executemany("INSERT INTO HardSkill (idColaborador, habilidade) VALUES (%s, %s)", skills)
+    cur.executemany(
+        "INSERT INTO ADM (nome, email, senha, dataCadastro, idColaborador, idNivelAcesso, status) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+        [(data['nome_login'], email, DEFAULT_PASSWORD, now, colaborador_id, ids['nivel'][data['role'].upper()], 'TEMP')
+         for _, email, colaborador_id, data in created]
+    )
+    return created
+
+# Por bloco de USER_IMPORT_CHUNK_SIZE linhas: e-mails ocupados, Colaborador, ids gerados,
+# HardSkill e ADM (ver import_user_chunk); mais uma recarga dos lookups
+USER_IMPORT_STATEMENTS_PER_CHUNK = 5
+
+@app.route('/api/users/import', methods=['POST'])
+@metrics.query_budget(USER_IMPORT_STATEMENTS_PER_CHUNK * -(-USER_IMPORT_MAX_ROWS // USER_IMPORT_CHUNK_SIZE) + 1)
+@login_required
+@admin_required
+def import_users():
+    """Cadastro em lote de usuários a partir de um CSV ou JSONL (campo `arquivo` ou corpo da requisição).
+
+    As linhas são validadas conforme chegam e gravadas em blocos de
+    USER_IMPORT_CHUNK_SIZE, cada bloco em sua própria transação. Se um bloco
+    falhar, ele é refeito linha a linha para isolar as linhas com erro.
+    """
+    cur = None
+    try:
+        upload = request.files.get('arquivo')
+        stream = upload.stream if upload else request.stream
+        filename = (upload.filename if upload else '') or ''
+        formato = request.args.get('formato') or ('csv' if filename.lower().endswith('.csv') or request.mimetype == 'text/csv' else 'jsonl')
+        if formato not in ('csv', 'jsonl'):
+            return jsonify({'error': 'Formato inválido. Use "csv" ou "jsonl".'}), 400
+
+        cur = mysql.connection.cursor()
+        ids = {
+            'departamento': lookups.get_id(cur, 'departamento', 'TI'),
+            'status': lookups.get_id(cur, 'status_colaborador', 'ativo'),
+            'cargo': {role: cargo_id_for_role(cur, role) for role in USER_ROLES},
+            'nivel': {role: lookups.get_id(cur, 'nivel_acesso', role) for role in USER_ROLES},
+        }
+        if not all([ids['departamento'], ids['status']]):
+            return jsonify({'error': 'Erro de configuração: Departamento ou Status não encontrado.'}), 500
+
+        results, created = [], []
+
+        def flush(chunk):
+            try:
+                created_chunk = import_user_chunk(cur, chunk, ids)
+                mysql.connection.commit()
+            except Exception as e:
+                mysql.connection.rollback()
+                print(f"Aviso: bloco da importação falhou ({e}); refazendo linha a linha")
+                created_chunk = []
+                for line, data in chunk:
+                    try:
+                        created_chunk += import_user_chunk(cur, [(line, data)], ids)
+                        mysql.connection.commit()
+                    except Exception as row_error:
+                        mysql.connection.rollback()
+                        results.append({'linha': line, 'status': 'erro', 'erro': str(row_error)})
+            for line, email, colaborador_id, data in created_chunk:
+                results.append({'linha': line, 'status': 'criado', 'nome': data['nome_completo'], 'email': email})
+            created.extend(created_chunk)
+
+        chunk, total = [], 0
+        for line, row, error in iter_import_rows(stream, formato):
+            total += 1
+            if total > USER_IMPORT_MAX_ROWS:
+                results.append({'linha': line, 'status': 'erro', 'erro': f'Limite de {USER_IMPORT_MAX_ROWS} linhas por importação atingido.'})
+                break
+            error = error or validate_import_row(row)
+            if error:
+                results.append({'linha': line, 'status': 'erro', 'erro': error})
+                continue
+            chunk.append((line, row))
+            if len(chunk) >= USER_IMPORT_CHUNK_SIZE:
+                flush(chunk)
+                chunk = []
+        if chunk:
+            flush(chunk)
+
+        for _, _, colaborador_id, data in created:
+            if data['role'].upper() == 'COLABORADOR':
+                skill_index.upsert(colaborador_id, data['nome_completo'], data.get('skills', []))
+        if created:
+            semantic_matrix.schedule_rebuild(reload_skill_snapshot)
+            publish_user_event('I')
+            log_change(session['user_name'], 'USUÁRIOS IMPORTADOS', f"{len(created)} usuário(s) criados via importação em lote.")
+
+        results.sort(key=lambda r: r['linha'])
+        return jsonify({
+            'success': True,
+            'message': f'{len(created)} usuário(s) criados, {len(results) - len(created)} linha(s) com erro.',
+            'criados': len(created),
+            'erros': len(results) - len(created),
+            'data': results
+        }), 201 if created else 200
+    except Exception as e:
+        if cur: mysql.connection.rollback()
+        print(f"Erro em import_users: {e}")
+        return jsonify({'error': f'Erro interno no servidor: {str(e)}'}), 500
+    finally:
+        if cur: cur.close()
+
 # =============================================================================
 # API - GERENCIAMENTO DE PROJETOS (DEMANDAS)
 # =============================================================================
 
+# Colunas que podem ser pedidas em GET /api/projects?fields=...
+PROJECT_FIELDS = {
+    'idDemandas': 'd.idDemandas',
+    'titulo': 'd.titulo',
+    'descricao': 'd.descricao',
+    'dataAbertura': "DATE_FORMAT(d.dataAbertura, '%%d/%%m/%%Y') as dataAbertura",
+    'dataConclusao': "DATE_FORMAT(d.dataConclusao, '%%d/%%m/%%Y') as dataConclusao",
+    'status_nome': 's.status as status_nome',
+    'urgencia': 'p.prioridade as urgencia',
+    'solicitante_nome': 'sol.nome as solicitante_nome',
+    'colaborador_nome': "CONCAT(d.estagiario_responsavel, IF(d.estagiario_corresponsavel != '', CONCAT(', ', d.estagiario_corresponsavel), '')) as colaborador_nome",
+    'dataLimite': "DATE_FORMAT(d.dataLimite, '%%d/%%m/%%Y') as dataLimite",
+    'supervisor_responsavel': 'd.supervisor_responsavel',
+    'objetivo': 'd.objetivo',
+}
+PROJECTS_MAX_LIMIT = 500
+
+# As datas saem formatadas do SQL (%% por causa da interpolação de parâmetros do
+# MySQLdb), então o cursor guarda só o id; a dataAbertura vem de uma subconsulta
+# pela chave primária (é fixada no cadastro e projetos não são excluídos)
+def encode_cursor(project_id):
+    raw = json.dumps([project_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+    project_id, = json.loads(raw)
+    return int(project_id)
+
+def visible_projects_query(selected):
+    """SELECT de Demandas com as colunas pedidas e as regras de visibilidade do perfil logado."""
+    query = f"""
+        SELECT {', '.join(PROJECT_FIELDS[f] for f in selected)}
+        FROM Demandas d
+        LEFT JOIN StatusDemanda s ON d.idStatusDemanda = s.idStatusDemanda
+        LEFT JOIN PrioridadeDemanda p ON d.idPrioridadeDemanda = p.idPrioridadeDemanda
+        LEFT JOIN Solicitante sol ON d.idSolicitante = sol.idSolicitante
+        WHERE 1=1
+    """
+    params = []
+    user_role = session.get('user_role')
+    if user_role == 'SOLICITANTE':
+        query += " AND sol.idColaborador = %s"
+        params.append(session.get('user_colaborador_id'))
+    elif user_role == 'COLABORADOR':
+        # Responsável e corresponsáveis ficam em DemandaIntegrante (índice por colaborador)
+        query += " AND d.idDemandas IN (SELECT di.idDemandas FROM DemandaIntegrante di WHERE di.idColaborador = %s)"
+        params.append(session.get('user_colaborador_id'))
+    return query, params
+
+# =============================================================================
+# SINCRONIZAÇÃO INCREMENTAL (ChangeLog alimentada por triggers)
+# =============================================================================
+
+def parse_change_token(token):
+    try:
+        return int(token)
+    except (TypeError, ValueError):
+        return None
+
+def read_changes(cur, since, tabelas):
+    """Lê a ChangeLog depois da versão `since` para as tabelas dadas.
+
+    Retorna (token, reset, {tabela: {idRegistro: 'I' | 'U' | 'D'}}). `reset` indica
+    que o token é mais antigo que o histórico retido (podado pelo evento
+    ev_changelog_retencao, ver migrations) e o cliente deve recarregar tudo.
+    O token para na primeira versão que ainda pode estar em uma transação aberta
+    (ver changelog.py), então a próxima chamada pode repetir registros já
+    enviados: o cliente aplica cada um pelo id (inserir ou substituir, remover).
+    """
+    cur.execute("SELECT MIN(versao) as minima, MAX(versao) as maxima FROM ChangeLog")
+    limits = cur.fetchone()
+    if since is None or (limits['minima'] is not None and since < limits['minima'] - 1) or since > (limits['maxima'] or 0):
+        token, _ = ler_changelog(cur, None, CHANGELOG_COMMIT_LAG)
+        return token, True, {}
+
+    token, linhas = ler_changelog(cur, since, CHANGELOG_COMMIT_LAG)
+    changes = {tabela: {} for tabela in tabelas}
+    for row in linhas:
+        if row['tabela'] not in changes:
+            continue
+        registros = changes[row['tabela']]
+        anterior = registros.get(row['idRegistro'])
+        # Um registro inserido e alterado dentro da janela continua sendo uma inserção
+        registros[row['idRegistro']] = 'I' if anterior == 'I' and row['operacao'] == 'U' else row['operacao']
+    return token, False, changes
+
+def split_changes(registros, visible_rows, key):
+    """Separa os registros alterados em inseridos/atualizados/removidos.
+
+    Registros que deixaram de ser visíveis para o usuário também vão em `deleted`.
+    """
+    visible = {row[key]: row for row in visible_rows}
+    result = {'inserted': [], 'updated': [], 'deleted': []}
+    for registro_id, operacao in registros.items():
+        row = visible.get(registro_id)
+        if operacao == 'D' or row is None:
+            result['deleted'].append(registro_id)
+        elif operacao == 'I':
+            result['inserted'].append(row)
+        else:
+            result['updated'].append(row)
+    return result
+
+@app.route('/api/projects/changes', methods=['GET'])
+@metrics.query_budget(4)
+@login_required
+def get_project_changes():
+    """Projetos inseridos, alterados ou removidos desde o token `since`.
+
+    Sem `since` (ou com um token expirado) retorna apenas o token atual e
+    reset=true: o cliente deve obter o token antes de carregar a lista completa e
+    então pedir só as mudanças a partir dele.
+    """
+    cur = None
+    try:
+        cur = mysql.connection.cursor()
+        token, reset, changes = read_changes(cur, parse_change_token(request.args.get('since')), ['Demandas'])
+        if reset:
+            return jsonify({'token': str(token), 'reset': True, 'inserted': [], 'updated': [], 'deleted': []})
+
+        registros = changes['Demandas']
+        rows = []
+        if registros:
+            query, params = visible_projects_query(list(PROJECT_FIELDS))
+            query += f" AND d.idDemandas IN ({', '.join(['%s'] * len(registros))})"
+            cur.execute(query, tuple(params) + tuple(registros))
+            rows = cur.fetchall()
+        return jsonify(dict(split_changes(registros, rows, 'idDemandas'), token=str(token), reset=False))
+    except Exception as e:
+        print(f"Erro em get_project_changes: {e}")
+        return jsonify({'error': f'Erro interno do servidor: {str(e)}'}), 500
+    finally:
+        if cur: cur.close()
+
+# =============================================================================
+# EVENTOS EM TEMPO REAL (SERVER-SENT EVENTS)
+# =============================================================================
+
+# Cada conexão SSE ocupa uma thread do worker (gthread): o número de conexões por
+# worker é limitado e cada conexão é encerrada após SSE_MAX_STREAM_SECONDS. O
+# navegador reconecta sozinho enviando Last-Event-ID, sem perder eventos.
+SSE_MAX_STREAMS_PER_WORKER = int(os.environ.get('SSE_MAX_STREAMS_PER_WORKER', 4))
+SSE_MAX_STREAM_SECONDS = int(os.environ.get('SSE_MAX_STREAM_SECONDS', 60))
+SSE_HEARTBEAT_SECONDS = 15
+SSE_RETRY_MS = 3000
+
+def project_audience(cur, project_id):
+    """Solicitante e integrantes que enxergam o projeto (ver visible_projects_query)."""
+    cur.execute("""
+        SELECT sol.idColaborador as solicitante, GROUP_CONCAT(di.idColaborador) as integrantes
+        FROM Demandas d
+        LEFT JOIN Solicitante sol ON d.idSolicitante = sol.idSolicitante
+        LEFT JOIN DemandaIntegrante di ON di.idDemandas = d.idDemandas
+        WHERE d.idDemandas = %s
+        GROUP BY d.idDemandas, sol.idColaborador
+    """, (project_id,))
+    row = cur.fetchone()
+    if not row:
+        return None
+    return {'solicitante': row['solicitante'],
+            'integrantes': [int(i) for i in (row['integrantes'] or '').split(',') if i]}
+
+# Chamadas depois do commit: invalidam o cache de respostas e avisam os clientes SSE
+def publish_project_event(project_id, operacao, *audiencias):
+    response_cache.bump('projects')
+    # Com mais de uma audiência (antes e depois da alteração), quem perdeu acesso também é avisado
+    event_broker.publish('projects', {
+        'id': project_id,
+        'operacao': operacao,
+        'audiencias': [a for a in audiencias if a]
+    })
+
+def publish_user_event(operacao, user_id=None):
+    response_cache.bump('users')
+    event_broker.publish('users', {'id': user_id, 'operacao': operacao})
+
+def event_filter(user_role, colaborador_id):
+    """Mesmas regras de visibilidade de get_projects, aplicadas em memória a cada evento."""
+    def visible(canal, dados):
+        if user_role == 'ADMINISTRADOR':
+            return True
+        if canal != 'projects':
+            return False
+        for audiencia in dados['audiencias']:
+            if user_role == 'SOLICITANTE' and audiencia['solicitante'] == colaborador_id:
+                return True
+            if user_role == 'COLABORADOR' and colaborador_id in audiencia['integrantes']:
+                return True
+        return False
+    return visible
+
+def format_sse(event_id, canal, dados):
+    return f"id: {event_id}\nevent: {canal}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
+
+@app.route('/api/events', methods=['GET'])
+@metrics.query_budget(0)
+@login_required
+def stream_events():
+    """Canal SSE com avisos de projetos e usuários alterados.
+
+    Cada evento traz apenas o id e a operação; o cliente busca os dados em
+    /api/projects/changes ou /api/users/changes. O evento `reset` pede uma
+    recarga completa (fila estourada ou Last-Event-ID fora da retenção).
+    """
+    if event_broker.subscriber_count() >= SSE_MAX_STREAMS_PER_WORKER:
+        response = jsonify({'error': 'Muitas conexões de eventos abertas, tente novamente.'})
+        response.headers['Retry-After'] = str(SSE_RETRY_MS // 1000)
+        return response, 503
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    filtro = event_filter(session.get('user_role'), session.get('user_colaborador_id'))
+    sub = event_broker.subscribe(filtro, parse_change_token(last_event_id))
+
+    def generate():
+        # Não usa o banco: a conexão SSE não prende uma conexão do pool
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            deadline = time.monotonic() + SSE_MAX_STREAM_SECONDS
+            while time.monotonic() < deadline:
+                if sub.overflow:
+                    yield format_sse(sub.last_id, 'reset', {})
+                    return
+                event = sub.get(timeout=min(SSE_HEARTBEAT_SECONDS, max(deadline - time.monotonic(), 0)))
+                if event is None:
+                    yield ": ping\n\n"
+                    continue
+                event_id, canal, dados = event
+                dados = {'id': dados['id'], 'operacao': dados['operacao']}
+                yield format_sse(event_id, canal, dados)
+        finally:
+            event_broker.unsubscribe(sub)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @app.route('/api/projects', methods=['GET'])
+@metrics.query_budget(2)
 @login_required
+@response_cache.cached('projects', 'users')
 def get_projects():
+    """Lista os projetos visíveis para o perfil logado.
+
+    Parâmetros opcionais: status, urgencia, solicitante, de/ate (dataAbertura,
+    aaaa-mm-dd), fields (lista separada por vírgulas) e limit/cursor para
+    paginação por chave em (dataAbertura, idDemandas). Sem limit, retorna tudo.
+    """
     cur = None
     try:
+        fields = request.args.get('fields')
+        if fields:
+            requested = [f.strip() for f in fields.split(',') if f.strip()]
+            invalid = [f for f in requested if f not in PROJECT_FIELDS]
+            if invalid:
+                return jsonify({'error': f"Campos inválidos: {', '.join(invalid)}"}), 400
+            # idDemandas é a chave do cursor
+            selected = list(dict.fromkeys(['idDemandas'] + requested))
+        else:
+            selected = list(PROJECT_FIELDS)
+
+        limit = request.args.get('limit', type=int)
+        if limit is not None and not 1 <= limit <= PROJECTS_MAX_LIMIT:
+            return jsonify({'error': f'O parâmetro limit deve estar entre 1 e {PROJECTS_MAX_LIMIT}.'}), 400
+
         cur = mysql.connection.cursor()
-        query = """
-            SELECT 
-                d.idDemandas, d.titulo, d.descricao, d.dataAbertura, d.dataConclusao,
-                s.status as status_nome, 
-                p.prioridade as urgencia,
-                sol.nome as solicitante_nome, 
-                CONCAT(d.estagiario_responsavel, IF(d.estagiario_corresponsavel != '', CONCAT(', ', d.estagiario_corresponsavel), '')) as colaborador_nome,
-                d.dataLimite, d.supervisor_responsavel, d.objetivo
-            FROM Demandas d
-            LEFT JOIN StatusDemanda s ON d.idStatusDemanda = s.idStatusDemanda
-            LEFT JOIN PrioridadeDemanda p ON d.idPrioridadeDemanda = p.idPrioridadeDemanda
-            LEFT JOIN Solicitante sol ON d.idSolicitante = sol.idSolicitante
-            WHERE 1=1
-        """
-        params = []
-        user_role = session.get('user_role')
-        if user_role == 'SOLICITANTE':
-            query += " AND sol.idColaborador = %s"
-            params.append(session.get('user_colaborador_id'))
-        elif user_role == 'COLABORADOR':
-            query += " AND (d.idColaborador = %s OR d.estagiario_corresponsavel LIKE %s)"
-            user_name_like = f"%{session.get('user_name')}%"
-            params.extend([session.get('user_colaborador_id'), user_name_like])
-        query += " ORDER BY d.dataAbertura DESC"
+        query, params = visible_projects_query(selected)
+
+        # Filtros no servidor
+        # Status e urgência viram ids (cache de referência) para usar os índices de Demandas
+        for arg, column, tabela in (('status', 'd.idStatusDemanda', 'status_demanda'),
+                                    ('urgencia', 'd.idPrioridadeDemanda', 'prioridade'),
+                                    ('solicitante', 'sol.nome', None)):
+            values = [v.strip() for v in request.args.get(arg, '').split(',') if v.strip()]
+            if tabela:
+                ids = [lookups.get_id(cur, tabela, v) for v in values]
+                invalidos = [v for v, id_ in zip(values, ids) if id_ is None]
+                if invalidos:
+                    return jsonify({'error': f"Valor inválido em {arg}: {', '.join(invalidos)}. "
+                                             f"Use: {', '.join(lookups.labels(cur, tabela))}."}), 400
+                values = ids
+            if values:
+                query += f" AND {column} IN ({', '.join(['%s'] * len(values))})"
+                params.extend(values)
+        try:
+            if request.args.get('de'):
+                query += " AND d.dataAbertura >= %s"
+                params.append(datetime.strptime(request.args['de'], '%Y-%m-%d'))
+            if request.args.get('ate'):
+                query += " AND d.dataAbertura < %s"
+                params.append(datetime.strptime(request.args['ate'], '%Y-%m-%d') + timedelta(days=1))
+        except ValueError:
+            return jsonify({'error': 'Formato de data inválido. Use aaaa-mm-dd.'}), 400
+
+        if request.args.get('cursor'):
+            try:
+                cursor_id = decode_cursor(request.args['cursor'])
+            except Exception:
+                return jsonify({'error': 'Cursor de paginação inválido.'}), 400
+            cursor_data = "(SELECT c.dataAbertura FROM Demandas c WHERE c.idDemandas = %s)"
+            query += f" AND (d.dataAbertura < {cursor_data} OR (d.dataAbertura = {cursor_data} AND d.idDemandas < %s))"
+            params.extend([cursor_id, cursor_id, cursor_id])
+
+        query += " ORDER BY d.dataAbertura DESC, d.idDemandas DESC"
+        if limit is not None:
+            # Busca um registro a mais para saber se existe próxima página
+            query += " LIMIT %s"
+            params.append(limit + 1)
         cur.execute(query, tuple(params))
         projects = cur.fetchall()
-        for p in projects:
-            if isinstance(p.get('dataAbertura'), datetime): p['dataAbertura'] = p['dataAbertura'].strftime('%d/%m/%Y')
-            if isinstance(p.get('dataLimite'), datetime): p['dataLimite'] = p['dataLimite'].strftime('%d/%m/%Y')
-            if isinstance(p.get('dataConclusao'), datetime): p['dataConclusao'] = p['dataConclusao'].strftime('%d/%m/%Y')
-        return jsonify({'data': projects})
+
+        next_cursor = None
+        if limit is not None and len(projects) > limit:
+            projects = projects[:limit]
+            next_cursor = encode_cursor(projects[-1]['idDemandas'])
+
+        return jsonify({'data': projects, 'next_cursor': next_cursor})
     except Exception as e:
         print(f"Erro em get_projects: {e}")
         return jsonify({'error': f'Erro interno do servidor: {str(e)}'}), 500
     finally:
         if cur: cur.close()
 
+# Busca textual (índice FULLTEXT ft_demandas_busca em titulo, descricao e objetivo)
+PROJECT_SEARCH_MAX_LIMIT = 100
+FULLTEXT_MIN_WORD = 3  # innodb_ft_min_token_size padrão
+
+def fulltext_terms(texto):
+    """Converte o texto digitado em uma busca booleana: todas as palavras são
+    obrigatórias e buscadas como prefixo (para funcionar enquanto se digita)."""
+    palavras = [p for p in re.findall(r'\w+', texto) if len(p) >= FULLTEXT_MIN_WORD]
+    return ' '.join(f'+{p}*' for p in palavras)
+
+@app.route('/api/projects/search', methods=['GET'])
+@metrics.query_budget(1)
+@login_required
+def search_projects():
+    """Busca projetos visíveis para o perfil logado por relevância.
+
+    Parâmetros: q (texto), limit (até PROJECT_SEARCH_MAX_LIMIT) e offset.
+    """
+    cur = None
+    try:
+        termos = fulltext_terms(request.args.get('q', ''))
+        if not termos:
+            return jsonify({'error': f'Digite ao menos uma palavra com {FULLTEXT_MIN_WORD} ou mais letras.'}), 400
+        limit = request.args.get('limit', 20, type=int)
+        offset = request.args.get('offset', 0, type=int)
+        if not 1 <= limit <= PROJECT_SEARCH_MAX_LIMIT or offset < 0:
+            return jsonify({'error': f'O parâmetro limit deve estar entre 1 e {PROJECT_SEARCH_MAX_LIMIT}.'}), 400
+
+        cur = mysql.connection.cursor()
+        query, params = visible_projects_query(list(PROJECT_FIELDS))
+        # O MATCH repetido no ORDER BY é calculado uma única vez pelo MySQL
+        query += """
+            AND MATCH(d.titulo, d.descricao, d.objetivo) AGAINST (%s IN BOOLEAN MODE)
+            ORDER BY MATCH(d.titulo, d.descricao, d.objetivo) AGAINST (%s IN BOOLEAN MODE) DESC, d.idDemandas DESC
+            LIMIT %s OFFSET %s
+        """
+        # Busca um registro a mais para saber se existe próxima página
+        params.extend([termos, termos, limit + 1, offset])
+        cur.execute(query, tuple(params))
+        projects = cur.fetchall()
+
+        next_offset = None
+        if len(projects) > limit:
+            projects = projects[:limit]
+            next_offset = offset + limit
+
+        return jsonify({'data': projects, 'next_offset': next_offset})
+    except Exception as e:
+        print(f"Erro em search_projects: {e}")
+        return jsonify({'error': f'Erro interno do servidor: {str(e)}'}), 500
+    finally:
+        if cur: cur.close()
+
 @app.route('/api/projects', methods=['POST'])
+@metrics.query_budget(6)
 @login_required
 @solicitante_required
 def create_project():
@@ -447,17 +1208,13 @@ def create_project():
         cur = mysql.connection.cursor()
         
         # Obter IDs necessários
-        cur.execute("SELECT idStatusDemanda FROM StatusDemanda WHERE status = 'NÃO INICIADO'")
-        status_result = cur.fetchone()
-        if not status_result:
+        status_id = lookups.get_id(cur, 'status_demanda', 'NÃO INICIADO')
+        if not status_id:
             return jsonify({'error': 'Status "NÃO INICIADO" não encontrado.'}), 500
-        status_id = status_result['idStatusDemanda']
         
-        cur.execute("SELECT idPrioridadeDemanda FROM PrioridadeDemanda WHERE prioridade = 'Média'")
-        prioridade_result = cur.fetchone()
-        if not prioridade_result:
+        prioridade_id = lookups.get_id(cur, 'prioridade', 'Média')
+        if not prioridade_id:
             return jsonify({'error': 'Prioridade "Média" não encontrada.'}), 500
-        prioridade_id = prioridade_result['idPrioridadeDemanda']
         
         # SOLUÇÃO MELHOR: Buscar solicitante existente ou criar com email único
         cur.execute("SELECT idSolicitante FROM Solicitante WHERE idColaborador = %s", (session['user_colaborador_id'],))
@@ -481,36 +1238,13 @@ def create_project():
             # Limitar o nome base para evitar emails muito longos
             if len(base_name) > 20:
                 base_name = base_name[:20]
-                
-            solicitante_email = f"{base_name}.solicitante@ruby.com"
-            
-            # Verificar se o email já existe e gerar um único se necessário
-            cur.execute("SELECT idSolicitante FROM Solicitante WHERE email = %s", (solicitante_email,))
-            if cur.fetchone():
-                # Se já existir, usar um email numerado
-                i = 1
-                while True:
-                    numbered_email = f"{base_name}.solicitante{i:02d}@ruby.com"
-                    # Garantir que o email não ultrapasse o limite
-                    if len(numbered_email) > 100:
-                        numbered_email = numbered_email[:100]
-                    cur.execute("SELECT idSolicitante FROM Solicitante WHERE email = %s", (numbered_email,))
-                    if not cur.fetchone():
-                        solicitante_email = numbered_email
-                        break
-                    i += 1
-                    if i > 99:  # Prevenir loop infinito
-                        solicitante_email = f"{session['user_id']}.solicitante@ruby.com"
-                        break
-            
-            # Garantir que o email final não ultrapasse o limite
-            if len(solicitante_email) > 100:
-                solicitante_email = solicitante_email[:100]
-            
-            print(f"📧 Criando solicitante com email: {solicitante_email}")  # Para debug
-            
-            cur.execute("INSERT INTO Solicitante (nome, email, dataCadastro, idColaborador) VALUES (%s, %s, %s, %s)",
-                        (colaborador_nome, solicitante_email, datetime.now(), session['user_colaborador_id']))
+
+            solicitante_email = insert_with_unique_email(
+                cur, 'Solicitante', f"{base_name}.solicitante",
+                lambda email: cur.execute("INSERT INTO Solicitante (nome, email, dataCadastro, idColaborador) VALUES (%s, %s, %s, %s)",
+                                          (colaborador_nome, email, datetime.now(), session['user_colaborador_id']))
+            )
+            print(f"📧 Solicitante criado com email: {solicitante_email}")  # Para debug
             solicitante_id = cur.lastrowid
         
         # Converter data do formato dd/mm/yyyy para yyyy-mm-dd
@@ -559,8 +1293,10 @@ def create_project():
             None,   # dataConclusao
             ''  # periodo
         ))
+        project_id = cur.lastrowid
         
         mysql.connection.commit()
+        publish_project_event(project_id, 'I', {'solicitante': session['user_colaborador_id'], 'integrantes': []})
         log_change(session['user_name'], 'PROJETO CADASTRADO', f"Projeto: {data['titulo']}")
         return jsonify({'success': True, 'message': 'Projeto cadastrado com sucesso!'}), 201
         
@@ -574,6 +1310,7 @@ def create_project():
         if cur: cur.close()
             
 @app.route('/api/projects/<int:project_id>/urgency', methods=['PUT'])
+@metrics.query_budget(4)
 @login_required
 @solicitante_required
 def update_urgency(project_id):
@@ -585,9 +1322,8 @@ def update_urgency(project_id):
         
         cur = mysql.connection.cursor()
         
-        cur.execute("SELECT idPrioridadeDemanda FROM PrioridadeDemanda WHERE prioridade = %s", (data['urgencia'],))
-        prioridade = cur.fetchone()
-        if not prioridade:
+        prioridade_id = lookups.get_id(cur, 'prioridade', data['urgencia'])
+        if not prioridade_id:
             return jsonify({'error': 'Valor de urgência inválido.'}), 400
         
         query_args = [project_id]
@@ -604,8 +1340,10 @@ def update_urgency(project_id):
             return jsonify({'error': 'Projeto não encontrado ou você não tem permissão para alterá-lo.'}), 404
             
         cur.execute("UPDATE Demandas SET idPrioridadeDemanda = %s WHERE idDemandas = %s", 
-                      (prioridade['idPrioridadeDemanda'], project_id))
+                      (prioridade_id, project_id))
+        audiencia = project_audience(cur, project_id)
         mysql.connection.commit()
+        publish_project_event(project_id, 'U', audiencia)
         
         log_change(session['user_name'], 'URGÊNCIA ATUALIZADA', f"Urgência do projeto '{project['titulo']}' alterada para '{data['urgencia']}'")
         return jsonify({'success': True, 'message': 'Urgência do projeto atualizada com sucesso!'})
@@ -618,6 +1356,7 @@ def update_urgency(project_id):
 
 
 @app.route('/api/projects/<int:project_id>/adhere', methods=['POST'])
+@metrics.query_budget(9)
 @login_required
 @solicitante_required
 def adhere_to_project(project_id):
@@ -634,13 +1373,44 @@ def adhere_to_project(project_id):
         responsavel_nome = integrantes_nomes[0]
         coresponsaveis_nomes = ", ".join(integrantes_nomes[1:])
 
-        cur.execute("SELECT idColaborador FROM Colaborador WHERE nome = %s", (responsavel_nome,))
-        responsavel = cur.fetchone()
-        if not responsavel:
-            return jsonify({'error': f"Colaborador '{responsavel_nome}' não encontrado."}), 404
+        cur.execute(f"SELECT idColaborador, nome FROM Colaborador WHERE nome IN ({', '.join(['%s'] * len(integrantes_nomes))}) ORDER BY idColaborador",
+                    tuple(integrantes_nomes))
+        ids_por_nome = {}
+        for row in cur.fetchall():
+            ids_por_nome.setdefault(row['nome'], row['idColaborador'])
+        faltando = [nome for nome in integrantes_nomes if nome not in ids_por_nome]
+        if faltando:
+            return jsonify({'error': f"Colaborador '{faltando[0]}' não encontrado."}), 404
+        responsavel_id = ids_por_nome[responsavel_nome]
 
-        cur.execute("SELECT idStatusDemanda FROM StatusDemanda WHERE status = 'EM ANDAMENTO'")
-        status_andamento = cur.fetchone()
+        try:
+            inicio = datetime.strptime(data['inicio_projeto'], '%Y-%m-%d').date()
+            fim = datetime.strptime(data['previsao_termino'], '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'error': 'Formato de data inválido. Use aaaa-mm-dd.'}), 400
+        if fim < inicio:
+            return jsonify({'error': 'A previsão de término deve ser posterior ao início.'}), 400
+
+        # Sem a demanda, os INSERTs em DemandaIntegrante falhariam na chave estrangeira
+        audiencia_anterior = project_audience(cur, project_id)
+        if audiencia_anterior is None:
+            return jsonify({'error': 'Projeto não encontrado.'}), 404
+
+        status_andamento_id = lookups.get_id(cur, 'status_demanda', 'EM ANDAMENTO')
+
+        # Conflito de agenda: integrantes que já estão no limite de projetos simultâneos no período
+        schedule_index.sync(cur, status_andamento_id)
+        conflitos = []
+        for nome in dict.fromkeys(integrantes_nomes):
+            projetos_simultaneos = schedule_index.carga(ids_por_nome[nome], inicio, fim, ignorar=project_id)
+            if projetos_simultaneos >= MAX_PROJETOS_SIMULTANEOS:
+                conflitos.append({'nome': nome, 'projetos_simultaneos': projetos_simultaneos})
+        if conflitos and not data.get('forcar'):
+            nomes = ', '.join(f"{c['nome']} ({c['projetos_simultaneos']})" for c in conflitos)
+            return jsonify({
+                'error': f'Integrantes já alocados em {MAX_PROJETOS_SIMULTANEOS} ou mais projetos no período: {nomes}.',
+                'conflitos': conflitos
+            }), 409
         
         cur.execute("""
             UPDATE Demandas SET 
@@ -652,16 +1422,25 @@ def adhere_to_project(project_id):
                 idStatusDemanda = %s
             WHERE idDemandas = %s
         """, (
-            responsavel['idColaborador'],
+            responsavel_id,
             responsavel_nome,
             coresponsaveis_nomes,
-            data['inicio_projeto'],
-            data['previsao_termino'],
-            status_andamento['idStatusDemanda'],
+            inicio,
+            fim,
+            status_andamento_id,
             project_id
         ))
+
+        # Os nomes continuam em Demandas para exibição; a pertinência fica em DemandaIntegrante
+        integrantes = {responsavel_id: 'RESPONSAVEL'}
+        for nome in integrantes_nomes[1:]:
+            integrantes.setdefault(ids_por_nome[nome], 'CORRESPONSAVEL')
+        cur.execute("DELETE FROM DemandaIntegrante WHERE idDemandas = %s", (project_id,))
+        cur.executemany("INSERT INTO DemandaIntegrante (idDemandas, idColaborador, papel) VALUES (%s, %s, %s)",
+                        [(project_id, colaborador_id, papel) for colaborador_id, papel in integrantes.items()])
         
         mysql.connection.commit()
+        publish_project_event(project_id, 'U', audiencia_anterior, dict(audiencia_anterior, integrantes=list(integrantes)))
         log_change(session['user_name'], 'ADESÃO REALIZADA', f"Projeto {project_id} atribuído a {responsavel_nome}")
         return jsonify({'success': True, 'message': 'Adesão ao projeto realizada com sucesso!'})
     except Exception as e:
@@ -672,6 +1451,7 @@ def adhere_to_project(project_id):
         if cur: cur.close()
 
 @app.route('/api/projects/<int:project_id>/status', methods=['PUT'])
+@metrics.query_budget(4)
 @login_required
 @colaborador_required
 def update_progress(project_id):
@@ -683,7 +1463,8 @@ def update_progress(project_id):
         permission_query = "SELECT idDemandas, titulo FROM Demandas WHERE idDemandas = %s"
         query_params = [project_id]
         if session.get('user_role') != 'ADMINISTRADOR':
-            permission_query += " AND (idColaborador = %s OR idSolicitante = (SELECT idSolicitante FROM Solicitante WHERE idColaborador = %s))"
+            permission_query += (" AND (idDemandas IN (SELECT idDemandas FROM DemandaIntegrante WHERE idColaborador = %s)"
+                                 " OR idSolicitante = (SELECT idSolicitante FROM Solicitante WHERE idColaborador = %s))")
             query_params.extend([session.get('user_colaborador_id'), session.get('user_colaborador_id')])
         
         cur.execute(permission_query, tuple(query_params))
@@ -704,11 +1485,11 @@ def update_progress(project_id):
                 update_values.append(data[json_field])
         
         if 'status_geral' in data:
-            cur.execute("SELECT idStatusDemanda FROM StatusDemanda WHERE status = %s", (data['status_geral'],))
-            status_result = cur.fetchone()
-            if status_result:
-                update_fields.append("idStatusDemanda = %s")
-                update_values.append(status_result['idStatusDemanda'])
+            status_id = lookups.get_id(cur, 'status_demanda', data['status_geral'])
+            if not status_id:
+                return jsonify({'error': f"Status inválido. Use: {', '.join(lookups.labels(cur, 'status_demanda'))}."}), 400
+            update_fields.append("idStatusDemanda = %s")
+            update_values.append(status_id)
         
         if 'dataConclusao' in data and data['dataConclusao']:
             update_fields.append("dataConclusao = %s")
@@ -721,7 +1502,9 @@ def update_progress(project_id):
         update_values.append(project_id)
         
         cur.execute(update_query, tuple(update_values))
+        audiencia = project_audience(cur, project_id)
         mysql.connection.commit()
+        publish_project_event(project_id, 'U', audiencia)
         
         log_change(session['user_name'], 'ANDAMENTO ATUALIZADO', f"Andamento do projeto '{project['titulo']}' foi atualizado.")
         return jsonify({'success': True, 'message': 'Andamento do projeto atualizado com sucesso!'})
@@ -733,19 +1516,186 @@ def update_progress(project_id):
     finally:
         if cur: cur.close()
 
+# =============================================================================
+# API - DISPONIBILIDADE DOS COLABORADORES
+# =============================================================================
+
+@app.route('/api/collaborators/availability', methods=['GET'])
+@metrics.query_budget(6)
+@login_required
+@solicitante_required
+def get_availability():
+    """Projetos em andamento de cada colaborador que se sobrepõem ao período.
+
+    Parâmetros: inicio e fim (aaaa-mm-dd; padrão: os próximos 30 dias),
+    capacidade (padrão MAX_PROJETOS_SIMULTANEOS), disponiveis=1 para listar só
+    quem ainda tem vaga e colaborador (id) para consultar uma pessoa.
+    """
+    cur = None
+    try:
+        try:
+            inicio = datetime.strptime(request.args['inicio'], '%Y-%m-%d').date() if request.args.get('inicio') else date.today()
+            fim = datetime.strptime(request.args['fim'], '%Y-%m-%d').date() if request.args.get('fim') else inicio + timedelta(days=30)
+        except ValueError:
+            return jsonify({'error': 'Formato de data inválido. Use aaaa-mm-dd.'}), 400
+        if fim < inicio:
+            return jsonify({'error': 'A data final deve ser posterior à inicial.'}), 400
+        capacidade = request.args.get('capacidade', MAX_PROJETOS_SIMULTANEOS, type=int)
+
+        cur = mysql.connection.cursor()
+        skill_index.sync(cur)
+        schedule_index.sync(cur, lookups.get_id(cur, 'status_demanda', 'EM ANDAMENTO'))
+
+        nomes = {colaborador_id: nome for colaborador_id, nome, _ in skill_index.snapshot()}
+        colaborador = request.args.get('colaborador', type=int)
+        if colaborador is not None:
+            if colaborador not in nomes:
+                return jsonify({'error': 'Colaborador não encontrado.'}), 404
+            nomes = {colaborador: nomes[colaborador]}
+
+        resultado = schedule_index.disponibilidade(nomes, inicio, fim, capacidade)
+        for item in resultado:
+            item['nome'] = nomes[item['idColaborador']]
+        if request.args.get('disponiveis') == '1':
+            resultado = [item for item in resultado if item['disponivel']]
+        resultado.sort(key=lambda item: (item['projetos_simultaneos'], item['nome']))
+        return jsonify({
+            'data': resultado,
+            'periodo': {'inicio': inicio.isoformat(), 'fim': fim.isoformat()},
+            'capacidade': capacidade
+        })
+    except Exception as e:
+        print(f"Erro em get_availability: {e}")
+        return jsonify({'error': f'Erro interno do servidor: {str(e)}'}), 500
+    finally:
+        if cur: cur.close()
+
 # =============================================================================
 # API - MACHINE LEARNING
 # =============================================================================
 
 @app.route('/api/project/<int:project_id>/adherence', methods=['GET'])
+@metrics.query_budget(3)
 @login_required
 @solicitante_required 
 def get_project_adherence(project_id):
-    suggestions = calcular_aderencia_projeto(project_id, mysql)
+    limit = request.args.get('limit', type=int)
+    if limit is not None and limit < 1:
+        return jsonify({'error': 'O parâmetro limit deve ser um inteiro positivo.'}), 400
+    modo = request.args.get('modo', 'habilidades')
+    if modo not in ('habilidades', 'semantico'):
+        return jsonify({'error': 'Modo de aderência inválido. Use "habilidades" ou "semantico".'}), 400
+    suggestions = calcular_aderencia_projeto(project_id, mysql, limit, modo)
     if suggestions is None:
         return jsonify({'error': 'Erro ao calcular aderência.'}), 500
     return jsonify(suggestions)
 
+@app.route('/api/projects/adherence', methods=['GET'])
+@metrics.query_budget(4)
+@login_required
+@solicitante_required
+def get_backlog_adherence():
+    """Aderência de todos os projetos não concluídos em uma única requisição (triagem do backlog)."""
+    cur = None
+    try:
+        limit = request.args.get('limit', 5, type=int)
+        if limit < 1:
+            return jsonify({'error': 'O parâmetro limit deve ser um inteiro positivo.'}), 400
+
+        cur = mysql.connection.cursor()
+        skill_index.sync(cur)
+
+        query = """
+            SELECT d.idDemandas, d.titulo, d.objetivo, d.descricao, s.status as status_nome
+            FROM Demandas d
+            JOIN StatusDemanda s ON d.idStatusDemanda = s.idStatusDemanda
+            WHERE d.idStatusDemanda != %s
+        """
+        params = [lookups.get_id(cur, 'status_demanda', 'CONCLUÍDO') or 0]
+        if session.get('user_role') == 'SOLICITANTE':
+            query += " AND d.idSolicitante IN (SELECT idSolicitante FROM Solicitante WHERE idColaborador = %s)"
+            params.append(session.get('user_colaborador_id'))
+        query += " ORDER BY d.dataAbertura DESC"
+        cur.execute(query, tuple(params))
+        projetos = cur.fetchall()
+
+        habilidades = [(p['idDemandas'], extrair_habilidades_projeto(p['objetivo'], p['descricao'])) for p in projetos]
+        sugestoes = aderencia_em_lote(skill_index, habilidades, limit)
+        return jsonify({'data': [{
+            'idDemandas': p['idDemandas'],
+            'titulo': p['titulo'],
+            'status_nome': p['status_nome'],
+            'sugestoes': sugestoes[p['idDemandas']]
+        } for p in projetos]})
+    except Exception as e:
+        print(f"Erro em get_backlog_adherence: {e}")
+        return jsonify({'error': 'Erro ao calcular aderência do backlog.'}), 500
+    finally:
+        if cur: cur.close()
+
+@app.route('/api/projects/allocation/preview', methods=['GET'])
+@metrics.query_budget(7)
+@login_required
+@admin_required
+def preview_allocation():
+    """Propõe responsáveis para os projetos 'NÃO INICIADO' sem gravar nada.
+
+    A capacidade de cada colaborador é MAX_PROJETOS_SIMULTANEOS menos os projetos
+    'EM ANDAMENTO' cuja janela inicio_projeto/previsao_termino cruza o período
+    planejado. A confirmação continua sendo feita pela rota de adesão.
+    """
+    cur = None
+    try:
+        try:
+            inicio = datetime.strptime(request.args['inicio'], '%Y-%m-%d').date() if request.args.get('inicio') else date.today()
+            fim = datetime.strptime(request.args['fim'], '%Y-%m-%d').date() if request.args.get('fim') else inicio + timedelta(days=30)
+        except ValueError:
+            return jsonify({'error': 'Formato de data inválido. Use aaaa-mm-dd.'}), 400
+        if fim < inicio:
+            return jsonify({'error': 'A data final deve ser posterior à inicial.'}), 400
+        capacidade_maxima = request.args.get('capacidade', MAX_PROJETOS_SIMULTANEOS, type=int)
+
+        cur = mysql.connection.cursor()
+        skill_index.sync(cur)
+
+        cur.execute("""
+            SELECT d.idDemandas, d.titulo, d.objetivo, d.descricao
+            FROM Demandas d
+            WHERE d.idStatusDemanda = %s
+            ORDER BY d.dataAbertura
+        """, (lookups.get_id(cur, 'status_demanda', 'NÃO INICIADO'),))
+        projetos = cur.fetchall()
+
+        # Carga atual: projetos em andamento que se sobrepõem ao período planejado
+        schedule_index.sync(cur, lookups.get_id(cur, 'status_demanda', 'EM ANDAMENTO'))
+        carga = {}
+        for colaborador_id, _, _ in skill_index.snapshot():
+            projetos_simultaneos = schedule_index.carga(colaborador_id, inicio, fim)
+            if projetos_simultaneos:
+                carga[colaborador_id] = projetos_simultaneos
+
+        capacidade = {colaborador_id: capacidade_maxima - carga.get(colaborador_id, 0)
+                      for colaborador_id, _, _ in skill_index.snapshot()}
+        habilidades = [(p['idDemandas'], extrair_habilidades_projeto(p['objetivo'], p['descricao'])) for p in projetos]
+        alocacao = propor_alocacao(skill_index, habilidades, capacidade)
+
+        propostas = [{
+            'idDemandas': p['idDemandas'],
+            'titulo': p['titulo'],
+            'responsavel': alocacao[p['idDemandas']]
+        } for p in projetos]
+        return jsonify({
+            'data': propostas,
+            'periodo': {'inicio_projeto': inicio.isoformat(), 'previsao_termino': fim.isoformat()},
+            'aderencia_total': round(sum(p['responsavel']['aderencia'] for p in propostas if p['responsavel']), 2),
+            'carga_atual': carga
+        })
+    except Exception as e:
+        print(f"Erro em preview_allocation: {e}")
+        return jsonify({'error': 'Erro ao calcular a proposta de alocação.'}), 500
+    finally:
+        if cur: cur.close()
+
 # def calcular_aderencia_projeto(project_id, db_connection):
 #     cur = None
 #     try:
@@ -771,92 +1721,28 @@ def get_project_adherence(project_id):
 #     finally:
 #         if cur: cur.close()
 
-def calcular_aderencia_projeto(project_id, db_connection):
+@metrics.timed('calcular_aderencia_projeto')
+def calcular_aderencia_projeto(project_id, db_connection, limit=None, modo='habilidades'):
     cur = None
     try:
         cur = db_connection.connection.cursor()
-        
+        skill_index.sync(cur)
+
         # Buscar dados do projeto
         cur.execute("SELECT objetivo, descricao FROM Demandas WHERE idDemandas = %s", (project_id,))
         project_data = cur.fetchone()
-        
-        if not project_data or (not project_data['objetivo'] and not project_data['descricao']): 
-            # Se não há dados do projeto, retorna apenas colaboradores (não administradores/solicitantes)
-            cur.execute("""
-                SELECT c.idColaborador, c.nome FROM Colaborador c
-                LEFT JOIN ADM a ON a.idColaborador = c.idColaborador 
-                WHERE a.idNivelAcesso = 3
-            """)
-            colaboradores = cur.fetchall()
-            return [{'id': c['idColaborador'], 'nome': c['nome'], 'aderencia': 0.0, 'habilidades_comuns': []} for c in colaboradores]
-        
-        # Extrair habilidades específicas da descrição do projeto
-        project_text = f"{project_data['objetivo'] or ''} {project_data['descricao'] or ''}"
-        
-        # Procurar por habilidades na descrição (padrão: "Habilidades Desejadas: ...")
-        import re
-        habilidades_match = re.search(r'Habilidades Desejadas:\s*(.+)', project_text, re.IGNORECASE)
-        
-        # Buscar apenas colaboradores (não administradores/solicitantes)
-        cur.execute("""
-            SELECT c.idColaborador, c.nome, 
-                GROUP_CONCAT(DISTINCT hs.habilidade SEPARATOR ', ') as habilidades 
-            FROM Colaborador c 
-            LEFT JOIN HardSkill hs ON c.idColaborador = hs.idColaborador 
-            INNER JOIN ADM adm ON c.idColaborador = adm.idColaborador
-            WHERE adm.idNivelAcesso = 3
-            GROUP BY c.idColaborador, c.nome
-        """)
-        colaboradores = cur.fetchall()
-        
-        if not colaboradores:
-            return []
-        
-        # Se não encontrou habilidades específicas no projeto, retorna todos colaboradores com 0%
-        if not habilidades_match:
-            return [{
-                'id': c['idColaborador'], 
-                'nome': c['nome'], 
-                'aderencia': 0.0, 
-                'habilidades_comuns': []
-            } for c in colaboradores]
-            
-        # Processar habilidades do projeto (limpar espaços e converter para minúsculas)
-        habilidades_projeto_raw = habilidades_match.group(1).split(',')
-        habilidades_projeto = [h.strip().lower() for h in habilidades_projeto_raw if h.strip()]
-        
-        # Criar resultados para TODOS os colaboradores
-        resultados = []
-        for colaborador in colaboradores:
-            # Processar habilidades do colaborador
-            habilidades_colab_raw = (colaborador['habilidades'] or '').split(',')
-            habilidades_colab = [h.strip().lower() for h in habilidades_colab_raw if h.strip()]
-            
-            # Encontrar habilidades em comum (comparação exata)
-            habilidades_comuns = []
-            for habilidade_projeto in habilidades_projeto:
-                for habilidade_colab in habilidades_colab:
-                    if habilidade_projeto == habilidade_colab:
-                        habilidades_comuns.append(habilidade_projeto)
-                        break
-            
-            # Calcular percentual de aderência
-            if habilidades_projeto:
-                percentual_aderencia = (len(habilidades_comuns) / len(habilidades_projeto)) * 100
-            else:
-                percentual_aderencia = 0.0
-            
-            resultados.append({
-                'id': colaborador['idColaborador'],
-                'nome': colaborador['nome'],
-                'aderencia': round(percentual_aderencia, 2),
-                'habilidades_comuns': habilidades_comuns
-            })
-        
-        # Ordenar por maior aderência
-        resultados.sort(key=lambda x: x['aderencia'], reverse=True)
-        return resultados
-        
+
+        # Modo semântico: compara o texto livre (objetivo + descrição) com a matriz TF-IDF
+        if modo == 'semantico':
+            project_text = f"{project_data['objetivo'] or ''} {project_data['descricao'] or ''}" if project_data else ''
+            return semantic_matrix.top_k(project_text, skill_index.snapshot, limit)
+
+        # Sem "Habilidades Desejadas" no projeto, todos os colaboradores ficam com 0%
+        habilidades_projeto = []
+        if project_data:
+            habilidades_projeto = extrair_habilidades_projeto(project_data['objetivo'], project_data['descricao'])
+        return skill_index.top_k(habilidades_projeto, limit)
+
     except Exception as e:
         print(f"ERRO CRÍTICO em calcular_aderencia_projeto: {e}")
         # Em caso de erro, retorna lista vazia para não quebrar a interface
@@ -865,47 +1751,197 @@ def calcular_aderencia_projeto(project_id, db_connection):
         if cur: 
             cur.close()
 
+# =============================================================================
+# API - INDICADORES DE ENTREGA
+# =============================================================================
+
+@app.route('/api/analytics/delivery', methods=['GET'])
+@metrics.query_budget(2)
+@login_required
+@solicitante_required
+def get_delivery_analytics():
+    """Lead time, tempo de ciclo, atrasos e conclusão das etapas por grupo.
+
+    Parâmetro agrupar: status, prioridade, solicitante ou periodo (mês de
+    abertura). Solicitantes veem apenas os indicadores das próprias demandas.
+    """
+    cur = None
+    try:
+        agrupamento = request.args.get('agrupar', 'status')
+        if agrupamento not in AGRUPAMENTOS:
+            return jsonify({'error': f"Agrupamento inválido. Use: {', '.join(AGRUPAMENTOS)}."}), 400
+        solicitante = session.get('user_colaborador_id') if session.get('user_role') == 'SOLICITANTE' else None
+
+        cur = mysql.connection.cursor()
+        return jsonify({'success': True, 'data': delivery_analytics.rollup(cur, agrupamento, solicitante)})
+    except Exception as e:
+        print(f"Erro em get_delivery_analytics: {e}")
+        return jsonify({'error': f'Erro interno do servidor: {str(e)}'}), 500
+    finally:
+        if cur: cur.close()
+
+# =============================================================================
+# API - EXPORTAÇÃO (EXTRAÇÃO DO POWER BI)
+# =============================================================================
+
+EXPORT_FETCH_SIZE = 500
+# dataAtualizacao é o horário do UPDATE, não do commit: uma transação aberta antes da
+# extração pode confirmar depois dela com um valor anterior. A marca devolvida recua
+# esta margem (maior que a transação de escrita mais longa) para a próxima extração
+# reler esse intervalo.
+EXPORT_WATERMARK_MARGIN = int(os.environ.get('EXPORT_WATERMARK_MARGIN', 60))
+EXPORT_COLUMNS = [
+    'idDemandas', 'titulo', 'descricao', 'objetivo', 'observacao', 'dataAbertura', 'dataLimite', 'dataConclusao',
+    'inicio_projeto', 'previsao_termino', 'status_nome', 'urgencia', 'idSolicitante', 'solicitante_nome',
+    'idColaborador', 'estagiario_responsavel', 'estagiario_corresponsavel', 'supervisor_responsavel',
+    'reuniao_requisitos', 'coleta_preparacao_dados', 'criacao_relatorio_dashboard', 'validacao_refinamento',
+    'documentacao', 'periodo', 'dataAtualizacao'
+]
+
+def export_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+@app.route('/api/projects/export', methods=['GET'])
+@metrics.query_budget(2)
+@login_required
+@admin_required
+def export_projects():
+    """Exporta as demandas em NDJSON (padrão) ou CSV, linha a linha.
+
+    Usa um cursor sem buffer (SSDictCursor) em uma conexão dedicada do pool, então
+    a memória não cresce com o tamanho da tabela. Com `since` (ISO 8601), só vêm as
+    linhas alteradas a partir desse instante; o cabeçalho X-Export-Watermark traz
+    o valor a ser usado como `since` na próxima extração. A marca fica
+    EXPORT_WATERMARK_MARGIN segundos antes do início da extração, então extrações
+    seguidas se sobrepõem: o consumidor deve gravar por idDemandas (upsert).
+    """
+    formato = request.args.get('formato', 'ndjson')
+    if formato not in ('ndjson', 'csv'):
+        return jsonify({'error': 'Formato inválido. Use "ndjson" ou "csv".'}), 400
+    since = None
+    if request.args.get('since'):
+        try:
+            since = datetime.fromisoformat(request.args['since'])
+        except ValueError:
+            return jsonify({'error': 'Parâmetro since inválido. Use o formato ISO 8601.'}), 400
+
+    entry = mysql.pool.acquire()
+    state = {'exhausted': False}
+    try:
+        cur = entry.conn.cursor()
+        cur.execute("SELECT NOW(6) as agora, NOW(6) - INTERVAL %s SECOND as watermark", (EXPORT_WATERMARK_MARGIN,))
+        limites = cur.fetchone()
+        cur.close()
+    except Exception:
+        mysql.pool.release(entry, discard=True)
+        raise
+
+    # Linhas alteradas depois do início da extração ficam para a próxima
+    query = """
+        SELECT d.idDemandas, d.titulo, d.descricao, d.objetivo, d.observacao, d.dataAbertura, d.dataLimite,
+               d.dataConclusao, d.inicio_projeto, d.previsao_termino, s.status as status_nome, p.prioridade as urgencia,
+               d.idSolicitante, sol.nome as solicitante_nome, d.idColaborador, d.estagiario_responsavel,
+               d.estagiario_corresponsavel, d.supervisor_responsavel, d.reuniao_requisitos, d.coleta_preparacao_dados,
+               d.criacao_relatorio_dashboard, d.validacao_refinamento, d.documentacao, d.periodo, d.dataAtualizacao
+        FROM Demandas d
+        LEFT JOIN StatusDemanda s ON d.idStatusDemanda = s.idStatusDemanda
+        LEFT JOIN PrioridadeDemanda p ON d.idPrioridadeDemanda = p.idPrioridadeDemanda
+        LEFT JOIN Solicitante sol ON d.idSolicitante = sol.idSolicitante
+        WHERE d.dataAtualizacao < %s
+    """
+    params = [limites['agora']]
+    if since is not None:
+        query += " AND d.dataAtualizacao >= %s"
+        params.append(since)
+    query += " ORDER BY d.dataAtualizacao, d.idDemandas"
+
+    def generate():
+        # O corpo é gerado depois do fim da requisição: atribui o SQL à rota explicitamente
+        with metrics.track('export_projects'):
+            ss_cur = entry.conn.cursor(MySQLdb.cursors.SSDictCursor)
+            ss_cur.execute(query, tuple(params))
+            if formato == 'csv':
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(EXPORT_COLUMNS)
+            while True:
+                rows = ss_cur.fetchmany(EXPORT_FETCH_SIZE)
+                if not rows:
+                    break
+                if formato == 'csv':
+                    writer.writerows([export_value(row[c]) for c in EXPORT_COLUMNS] for row in rows)
+                    chunk = buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+                else:
+                    chunk = ''.join(json.dumps({k: export_value(v) for k, v in row.items()}, ensure_ascii=False) + '\n' for row in rows)
+                yield chunk
+            if formato == 'csv' and buffer.getvalue():
+                yield buffer.getvalue()
+            ss_cur.close()
+            state['exhausted'] = True
+
+    def release_connection():
+        # Um cursor sem buffer interrompido deixa resultados pendentes na conexão: descarta
+        mysql.pool.release(entry, discard=not state['exhausted'])
+
+    extension = 'csv' if formato == 'csv' else 'ndjson'
+    response = Response(
+        generate(),
+        mimetype='text/csv' if formato == 'csv' else 'application/x-ndjson',
+        headers={
+            'X-Export-Watermark': limites['watermark'].isoformat(),
+            'Content-Disposition': f'attachment; filename=demandas.{extension}'
+        }
+    )
+    response.call_on_close(release_connection)
+    return response
+
 # =============================================================================
 # ROTAS DE UTILIDADE E DIAGNÓSTICO
 # =============================================================================
 
+# Contadores mantidos por triggers na tabela Contador (ver railway.sql):
+# 'demandas.status.<idStatusDemanda>' e 'adm'. A leitura é de poucas linhas, sem
+# varrer Demandas; o polling do dashboard é atendido pelo cache de respostas até a
+# próxima escrita em projetos ou usuários.
+def load_stats(cur):
+    cur.execute("SELECT chave, valor FROM Contador")
+    contadores = {row['chave']: row['valor'] for row in cur.fetchall()}
+    status_stats = []
+    for chave, valor in contadores.items():
+        if chave.startswith('demandas.status.') and valor > 0:
+            status_id = int(chave.rsplit('.', 1)[1])
+            status_stats.append({'status': lookups.get_label(cur, 'status_demanda', status_id), 'count': valor})
+    return {
+        'total_projetos': sum(s['count'] for s in status_stats),
+        'total_usuarios': contadores.get('adm', 0),
+        'status_stats': status_stats
+    }
+
 @app.route('/api/stats')
+@metrics.query_budget(1)
 @login_required
+@response_cache.cached('projects', 'users')
 def get_stats():
+    cur = None
     try:
         cur = mysql.connection.cursor()
-        
-        # Estatísticas básicas
-        cur.execute("SELECT COUNT(*) as total FROM Demandas")
-        total_projetos = cur.fetchone()['total']
-        
-        cur.execute("SELECT COUNT(*) as total FROM ADM")
-        total_usuarios = cur.fetchone()['total']
-        
-        cur.execute("""
-            SELECT s.status, COUNT(*) as count 
-            FROM Demandas d 
-            JOIN StatusDemanda s ON d.idStatusDemanda = s.idStatusDemanda 
-            GROUP BY s.status
-        """)
-        status_stats = cur.fetchall()
-        
-        cur.close()
-        
         return jsonify({
             'success': True,
-            'data': {
-                'total_projetos': total_projetos,
-                'total_usuarios': total_usuarios,
-                'status_stats': status_stats
-            }
+            'data': load_stats(cur)
         })
     
     except Exception as e:
         print(f"Erro em get_stats: {e}")
         return jsonify({'error': str(e)}), 500
+    finally:
+        if cur: cur.close()
 
 @app.route('/fix-passwords')
+@metrics.query_budget(3)
 def fix_passwords():
     """Rota temporária para corrigir senhas no banco"""
     try:
@@ -939,6 +1975,7 @@ def fix_passwords():
         return f"<h1>Erro ao corrigir senhas:</h1><p>{e}</p>"
 
 @app.route('/health')
+@metrics.query_budget(1)
 def health_check():
     """Rota para verificar status do sistema (Railway)"""
     try:
@@ -950,7 +1987,11 @@ def health_check():
             'status': 'healthy',
             'database': 'connected',
             'timestamp': datetime.now().isoformat(),
-            'environment': 'railway'
+            'environment': 'railway',
+            'audit_log': audit_log.stats(),
+            'db_pool': mysql.pool.stats(),
+            'sse_streams': event_broker.subscriber_count(),
+            'response_cache': response_cache.stats()
         })
     except Exception as e:
         return jsonify({
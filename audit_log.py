@@ -0,0 +1,213 @@
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+# =============================================================================
+# GRAVAÇÃO ASSÍNCRONA E EM LOTE DA TABELA Logs
+# =============================================================================
+
+
+class AuditLogWriter:
+    """Fila limitada de registros de auditoria, gravada em lote por uma thread.
+
+    `write_batch(rows)` recebe uma lista de (timestamp, usuario, acao, detalhes)
+    e deve gravá-la em uma única transação (um INSERT de várias linhas). A fila é
+    descarregada quando atinge `batch_size` registros ou a cada `flush_interval`
+    segundos. Se o banco estiver indisponível, ou a fila cheia, os registros vão
+    para um arquivo JSONL local e são reenviados depois da próxima gravação bem
+    sucedida.
+    """
+
+    def __init__(self, write_batch, spill_dir, max_queue=10000, batch_size=200, flush_interval=2.0):
+        self.write_batch = write_batch
+        self.spill_dir = spill_dir
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        self._stop = None
+        self._counters = dict.fromkeys(
+            ('enqueued', 'written', 'dropped', 'spilled', 'replayed', 'flushes', 'errors'), 0)
+
+    # ----- produção -----
+
+    def log(self, user, action, details):
+        self._ensure_started()
+        row = (datetime.now(), user, action, details)
+        try:
+            self._queue.put_nowait(row)
+            self._count('enqueued')
+        except queue.Full:
+            self._spill([row])
+
+    def _ensure_started(self):
+        # A thread é criada no próprio worker: threads não sobrevivem ao fork do gunicorn
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self.max_queue)
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    # ----- consumo -----
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+
+    def _collect(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0 or self._stop.is_set():
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch):
+        try:
+            self.write_batch(batch)
+        except Exception as e:
+            print(f"ERRO: Falha ao gravar {len(batch)} logs no banco, salvando em arquivo local: {e}")
+            self._count('errors')
+            self._spill(batch)
+            return
+        self._count('written', len(batch))
+        self._count('flushes')
+        self._replay_spilled()
+
+    def close(self, timeout=5.0):
+        """Para a thread e grava o que ainda estiver na fila (chamado no encerramento do worker)."""
+        if self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        pending = []
+        while True:
+            try:
+                pending.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        for start in range(0, len(pending), self.batch_size):
+            self._flush(pending[start:start + self.batch_size])
+
+    # ----- arquivo de contingência -----
+
+    def _spill_path(self):
+        return os.path.join(self.spill_dir, f'audit-spill-{os.getpid()}.jsonl')
+
+    def _spill(self, rows):
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            with self._spill_lock, open(self._spill_path(), 'a', encoding='utf-8') as f:
+                for timestamp, user, action, details in rows:
+                    f.write(json.dumps([timestamp.isoformat(), user, action, details], ensure_ascii=False) + '\n')
+            self._count('spilled', len(rows))
+        except Exception as e:
+            print(f"ERRO CRÍTICO: Falha ao salvar logs em arquivo local: {e}")
+            self._count('dropped', len(rows))
+
+    def _replay_spilled(self):
+        for claimed in self._claim_spilled():
+            try:
+                completo = self._replay_file(claimed)
+            except Exception as e:
+                # O arquivo continua como .replay e é retomado na próxima gravação bem sucedida
+                print(f"ERRO: Falha ao reenviar logs salvos em {claimed}: {e}")
+                self._count('errors')
+                return
+            if not completo:
+                return
+
+    def _claim_spilled(self):
+        """Renomeia para este processo os arquivos a reenviar: os de contingência e os
+        .replay deixados por um processo que parou no meio do reenvio (ou por este)."""
+        claimed = []
+        paths = glob.glob(os.path.join(self.spill_dir, 'audit-spill-*.jsonl'))
+        paths += glob.glob(os.path.join(self.spill_dir, 'audit-spill-*.jsonl.*.replay'))
+        for path in paths:
+            if path.endswith('.replay'):
+                path_original, dono, _ = path.rsplit('.', 2)
+                if int(dono) != os.getpid() and _processo_vivo(int(dono)):
+                    continue
+            else:
+                path_original = path
+            # Renomear primeiro garante que só um worker reenvie cada arquivo
+            destino = f'{path_original}.{os.getpid()}.replay'
+            try:
+                with self._spill_lock:
+                    os.rename(path, destino)
+            except OSError:
+                continue
+            claimed.append(destino)
+        return claimed
+
+    def _replay_file(self, claimed):
+        """Reenvia um arquivo já renomeado; retorna False se o banco falhou no meio
+        (o restante volta para o arquivo de contingência)."""
+        rows, invalidas = [], []
+        with open(claimed, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    timestamp, user, action, details = json.loads(line)
+                    rows.append((datetime.fromisoformat(timestamp), user, action, details))
+                except (ValueError, TypeError):
+                    invalidas.append(line if line.endswith('\n') else line + '\n')
+        if invalidas:
+            # Linhas corrompidas não entram mais no reenvio, mas ficam guardadas para análise
+            with open(os.path.join(self.spill_dir, f'audit-invalid-{os.getpid()}.jsonl'), 'a', encoding='utf-8') as f:
+                f.writelines(invalidas)
+            print(f"ERRO: {len(invalidas)} linha(s) inválida(s) em {claimed} movidas para audit-invalid-{os.getpid()}.jsonl")
+        replayed = 0
+        try:
+            for start in range(0, len(rows), self.batch_size):
+                self.write_batch(rows[start:start + self.batch_size])
+                replayed += len(rows[start:start + self.batch_size])
+        except Exception as e:
+            print(f"ERRO: Falha ao reenviar logs salvos em {claimed}: {e}")
+            self._spill(rows[replayed:])
+        os.remove(claimed)
+        self._count('replayed', replayed)
+        return replayed == len(rows)
+
+    # ----- métricas -----
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        counters['queued'] = self._queue.qsize() if self._pid == os.getpid() else 0
+        return counters
+
+
+def _processo_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
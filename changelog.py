@@ -0,0 +1,51 @@
+# =============================================================================
+# LEITURA DA ChangeLog ATÉ O PONTO SEGURO (versões confirmadas sem lacunas)
+# =============================================================================
+
+# A versão (AUTO_INCREMENT) é atribuída quando o trigger insere na ChangeLog, não
+# no commit: uma transação que recebeu a versão 41 pode confirmar depois de outra
+# que recebeu a 42. Quem avançasse o token até a 42 nunca veria a 41. Por isso o
+# token só avança até a primeira lacuna recente; uma lacuna com mais de `atraso`
+# segundos é tratada como transação desfeita (rollback, INSERT que falhou).
+#
+# Garantia: toda alteração confirmada em até `atraso` segundos depois de receber a
+# versão é entregue. Transações de escrita mais longas que isso podem ser perdidas
+# pela sincronização incremental (o cliente só as vê ao recarregar tudo).
+
+_DESDE_O_INICIO = """
+    versao >= COALESCE(
+        (SELECT c.versao FROM ChangeLog c WHERE c.criadoEm < NOW(6) - INTERVAL %s SECOND ORDER BY c.criadoEm DESC LIMIT 1),
+        (SELECT MIN(c.versao) FROM ChangeLog c))
+"""
+
+
+def ler_changelog(cursor, desde, atraso):
+    """Linhas da ChangeLog depois da versão `desde`, até o ponto seguro.
+
+    Retorna (token, linhas): `token` é a maior versão até a qual não há lacunas
+    recentes e `linhas` são os dicts {versao, tabela, idRegistro, operacao} até
+    ele, de todas as tabelas (a lacuna precisa ser vista em qualquer tabela).
+    Com `desde` None, parte da última versão anterior à janela de `atraso`:
+    serve para obter o token inicial de quem vai carregar tudo; as linhas, nesse
+    caso, não interessam.
+    """
+    if desde is None:
+        filtro, params = _DESDE_O_INICIO, (atraso, atraso)
+    else:
+        filtro, params = "versao > %s", (atraso, desde)
+    cursor.execute(f"""
+        SELECT versao, tabela, idRegistro, operacao, criadoEm < NOW(6) - INTERVAL %s SECOND as antiga
+        FROM ChangeLog WHERE {filtro} ORDER BY versao
+    """, params)
+    rows = cursor.fetchall()
+    if desde is None:
+        if not rows:
+            return 0, []
+        desde = rows[0]['versao'] - 1
+    token, linhas = desde, []
+    for row in rows:
+        if row['versao'] != token + 1 and not row['antiga']:
+            break
+        token = row['versao']
+        linhas.append(row)
+    return token, linhas
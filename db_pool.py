@@ -0,0 +1,283 @@
+import collections
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import MySQLdb
+import MySQLdb.cursors
+from flask import g
+
+# =============================================================================
+# POOL DE CONEXÕES MYSQL
+# =============================================================================
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class _PooledConnection:
+    __slots__ = ('conn', 'created_at', 'last_used')
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = self.last_used = time.monotonic()
+
+
+class ConnectionPool:
+    """Pool de conexões limitado a `max_size`, um por processo (worker).
+
+    - `min_size` conexões são abertas em `warm_up()`;
+    - no empréstimo, uma conexão ociosa há mais de `ping_after_idle` segundos é
+      testada com ping e substituída se estiver morta;
+    - conexões com mais de `max_lifetime` segundos são recicladas;
+    - se todas estiverem em uso, o empréstimo espera até `timeout` segundos.
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, max_lifetime=1800, ping_after_idle=30, timeout=10):
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.ping_after_idle = ping_after_idle
+        self.timeout = timeout
+        self._cond = threading.Condition(threading.RLock())
+        self._pid = None
+        self._reset()
+
+    def _reset(self):
+        self._idle = collections.deque()
+        self._size = 0
+        self._in_use = 0
+        self._waiters = 0
+        self._stats = dict.fromkeys(
+            ('borrows', 'timeouts', 'created', 'closed', 'recycled', 'health_check_failures', 'connect_errors'), 0)
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._pid = os.getpid()
+
+    def _check_fork(self):
+        # Sockets herdados do processo pai não podem ser compartilhados entre workers
+        if self._pid != os.getpid():
+            self._reset()
+
+    # ----- abertura e fechamento -----
+
+    def _open(self):
+        try:
+            entry = _PooledConnection(self._connect())
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._stats['connect_errors'] += 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats['created'] += 1
+        return entry
+
+    def _close(self, entry, reason='closed'):
+        try:
+            entry.conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._stats[reason] += 1
+            self._cond.notify()
+
+    def _expired(self, entry, now):
+        return self.max_lifetime and now - entry.created_at > self.max_lifetime
+
+    def warm_up(self):
+        """Abre conexões até `min_size` (chamado na inicialização do worker)."""
+        with self._cond:
+            self._check_fork()
+            missing = self.min_size - self._size
+            self._size += max(missing, 0)
+        opened = []
+        for _ in range(max(missing, 0)):
+            try:
+                opened.append(self._open())
+            except Exception as e:
+                print(f"Aviso: falha ao pré-abrir conexão MySQL: {e}")
+        with self._cond:
+            self._idle.extend(opened)
+            self._cond.notify(len(opened))
+        return len(opened)
+
+    # ----- empréstimo -----
+
+    def acquire(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        entry = None
+        with self._cond:
+            self._check_fork()
+            while entry is None:
+                now = time.monotonic()
+                while self._idle:
+                    candidate = self._idle.pop()
+                    if self._expired(candidate, now):
+                        self._close(candidate, 'recycled')
+                        continue
+                    entry = candidate
+                    break
+                if entry is not None:
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = timeout - (now - started)
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(f'Nenhuma conexão livre no pool após {timeout}s ({self.max_size} em uso).')
+                self._waiters += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiters -= 1
+            self._in_use += 1
+
+        try:
+            if entry is None:
+                entry = self._open()
+            elif self.ping_after_idle is not None and time.monotonic() - entry.last_used > self.ping_after_idle:
+                try:
+                    entry.conn.ping()
+                except Exception:
+                    # Substitui a conexão morta mantendo a vaga já reservada no pool
+                    try:
+                        entry.conn.close()
+                    except Exception:
+                        pass
+                    with self._cond:
+                        self._stats['health_check_failures'] += 1
+                    entry = self._open()
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+            raise
+
+        waited = time.monotonic() - started
+        with self._cond:
+            self._stats['borrows'] += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return entry
+
+    def release(self, entry, discard=False):
+        with self._cond:
+            if self._pid != os.getpid():
+                return
+            self._in_use -= 1
+        if not discard:
+            try:
+                # Encerra a transação aberta para o próximo uso não enxergar um snapshot antigo
+                entry.conn.rollback()
+            except Exception:
+                discard = True
+        now = time.monotonic()
+        if discard or self._expired(entry, now):
+            self._close(entry, 'recycled' if not discard else 'closed')
+            return
+        entry.last_used = now
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Empresta uma conexão fora do contexto de requisição (threads de fundo, scripts)."""
+        entry = self.acquire()
+        try:
+            yield entry.conn
+        finally:
+            self.release(entry)
+
+    # ----- métricas -----
+
+    def stats(self):
+        with self._cond:
+            borrows = self._stats['borrows']
+            return dict(
+                self._stats,
+                size=self._size,
+                idle=len(self._idle),
+                in_use=self._in_use,
+                waiters=self._waiters,
+                max_size=self.max_size,
+                saturation=round(self._in_use / self.max_size, 3) if self.max_size else 0.0,
+                wait_seconds_total=round(self._wait_total, 6),
+                wait_seconds_avg=round(self._wait_total / borrows, 6) if borrows else 0.0,
+                wait_seconds_max=round(self._wait_max, 6),
+            )
+
+
+# =============================================================================
+# INTEGRAÇÃO COM O FLASK (substitui o flask_mysqldb.MySQL)
+# =============================================================================
+
+class PooledMySQL:
+    """Expõe `mysql.connection` como o flask_mysqldb, mas emprestando do pool.
+
+    A conexão é emprestada no primeiro acesso dentro do contexto da aplicação e
+    devolvida no teardown, então os handlers continuam usando
+    `mysql.connection.cursor()` e `mysql.connection.commit()` sem alterações.
+    `wrap_connection`, se informado, envolve cada conexão nova (ex.: métricas).
+    """
+
+    def __init__(self, app=None, wrap_connection=None):
+        self.pool = None
+        self.wrap_connection = wrap_connection
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        config.setdefault('MYSQL_HOST', 'localhost')
+        config.setdefault('MYSQL_PORT', 3306)
+        config.setdefault('MYSQL_CHARSET', 'utf8')
+        config.setdefault('MYSQL_CONNECT_TIMEOUT', 10)
+        config.setdefault('MYSQL_POOL_MIN_SIZE', 2)
+        config.setdefault('MYSQL_POOL_MAX_SIZE', 10)
+        config.setdefault('MYSQL_POOL_MAX_LIFETIME', 1800)
+        config.setdefault('MYSQL_POOL_PING_AFTER_IDLE', 30)
+        config.setdefault('MYSQL_POOL_TIMEOUT', 10)
+
+        kwargs = {
+            'host': config['MYSQL_HOST'],
+            'port': config['MYSQL_PORT'],
+            'user': config.get('MYSQL_USER'),
+            'passwd': config.get('MYSQL_PASSWORD'),
+            'db': config.get('MYSQL_DB'),
+            'charset': config['MYSQL_CHARSET'],
+            'use_unicode': True,
+            'connect_timeout': config['MYSQL_CONNECT_TIMEOUT'],
+        }
+        if config.get('MYSQL_CURSORCLASS'):
+            kwargs['cursorclass'] = getattr(MySQLdb.cursors, config['MYSQL_CURSORCLASS'])
+
+        wrap = self.wrap_connection or (lambda conn: conn)
+        self.pool = ConnectionPool(
+            lambda: wrap(MySQLdb.connect(**kwargs)),
+            min_size=config['MYSQL_POOL_MIN_SIZE'],
+            max_size=config['MYSQL_POOL_MAX_SIZE'],
+            max_lifetime=config['MYSQL_POOL_MAX_LIFETIME'],
+            ping_after_idle=config['MYSQL_POOL_PING_AFTER_IDLE'],
+            timeout=config['MYSQL_POOL_TIMEOUT'],
+        )
+        app.teardown_appcontext(self.teardown)
+
+    @property
+    def connection(self):
+        entry = g.get('_mysql_pooled')
+        if entry is None:
+            entry = g._mysql_pooled = self.pool.acquire()
+        return entry.conn
+
+    def teardown(self, exception):
+        entry = g.pop('_mysql_pooled', None)
+        if entry is not None:
+            self.pool.release(entry)
@@ -0,0 +1,143 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime
+
+from changelog import ler_changelog
+
+# =============================================================================
+# ÍNDICE DE INTERVALOS DAS ALOCAÇÕES (inicio_projeto -> previsao_termino)
+# =============================================================================
+
+
+def _como_data(valor, padrao):
+    if valor is None:
+        return padrao
+    return valor.date() if isinstance(valor, datetime) else valor
+
+
+class ScheduleIndex:
+    """Períodos dos projetos em andamento de cada colaborador, em listas ordenadas.
+
+    Para cada colaborador são mantidas duas listas: inícios e términos, ambas
+    ordenadas. O número de projetos que se sobrepõem a [inicio, fim] é o total
+    menos os que terminam antes de `inicio` e os que começam depois de `fim`,
+    obtidos com duas buscas binárias.
+
+    O índice acompanha a ChangeLog: a cada consulta, lê as versões novas até o
+    ponto seguro (ver changelog.py) e, se houve escritas em Demandas (adesão,
+    mudança de status, ...), recarrega apenas os projetos alterados. Assim todos
+    os workers enxergam as alocações feitas pelos demais, inclusive as de
+    transações que confirmaram fora da ordem das versões.
+    """
+
+    def __init__(self, atraso=10):
+        self.atraso = atraso
+        self._lock = threading.RLock()
+        self._versao = None
+        self._projetos = {}     # idDemandas -> (inicio, fim, frozenset(idColaborador))
+        self._inicios = {}      # idColaborador -> [(inicio, idDemandas)]
+        self._fins = {}         # idColaborador -> [(fim, idDemandas)]
+
+    # ----- carga e sincronização -----
+
+    def _consultar(self, cursor, status_ativo_id, project_ids=None):
+        query = """
+            SELECT d.idDemandas, d.idStatusDemanda, d.dataAbertura, d.inicio_projeto, d.previsao_termino, di.idColaborador
+            FROM Demandas d
+            JOIN DemandaIntegrante di ON di.idDemandas = d.idDemandas
+        """
+        if project_ids is None:
+            cursor.execute(query + " WHERE d.idStatusDemanda = %s", (status_ativo_id,))
+        else:
+            cursor.execute(query + f" WHERE d.idDemandas IN ({', '.join(['%s'] * len(project_ids))})", tuple(project_ids))
+        projetos = {}
+        for row in cursor.fetchall():
+            if row['idStatusDemanda'] != status_ativo_id:
+                continue
+            inicio = _como_data(row['inicio_projeto'], _como_data(row['dataAbertura'], date.min))
+            fim = _como_data(row['previsao_termino'], date.max)
+            _, _, integrantes = projetos.get(row['idDemandas'], (inicio, fim, frozenset()))
+            projetos[row['idDemandas']] = (inicio, fim, integrantes | {row['idColaborador']})
+        return projetos
+
+    def load(self, cursor, status_ativo_id):
+        versao, _ = ler_changelog(cursor, None, self.atraso)
+        projetos = self._consultar(cursor, status_ativo_id)
+        with self._lock:
+            self._projetos, self._inicios, self._fins = {}, {}, {}
+            for project_id, periodo in projetos.items():
+                self._adicionar(project_id, *periodo)
+            self._versao = versao
+
+    def sync(self, cursor, status_ativo_id):
+        """Aplica as alterações de Demandas registradas na ChangeLog desde a última sincronização."""
+        if self._versao is None:
+            return self.load(cursor, status_ativo_id)
+        cursor.execute("SELECT MIN(versao) as minima, MAX(versao) as maxima FROM ChangeLog")
+        limites = cursor.fetchone()
+        maxima = limites['maxima'] or 0
+        if maxima == self._versao:
+            return
+        if limites['minima'] is not None and limites['minima'] > self._versao + 1:
+            # O histórico que faltava já foi podado: recarrega tudo
+            return self.load(cursor, status_ativo_id)
+        versao, linhas = ler_changelog(cursor, self._versao, self.atraso)
+        alterados = list({row['idRegistro'] for row in linhas if row['tabela'] == 'Demandas'})
+        projetos = self._consultar(cursor, status_ativo_id, alterados) if alterados else {}
+        with self._lock:
+            for project_id in alterados:
+                self._remover(project_id)
+                if project_id in projetos:
+                    self._adicionar(project_id, *projetos[project_id])
+            self._versao = versao
+
+    def _adicionar(self, project_id, inicio, fim, integrantes):
+        self._projetos[project_id] = (inicio, fim, integrantes)
+        for colaborador_id in integrantes:
+            insort(self._inicios.setdefault(colaborador_id, []), (inicio, project_id))
+            insort(self._fins.setdefault(colaborador_id, []), (fim, project_id))
+
+    def _remover(self, project_id):
+        periodo = self._projetos.pop(project_id, None)
+        if periodo is None:
+            return
+        inicio, fim, integrantes = periodo
+        for colaborador_id in integrantes:
+            self._inicios[colaborador_id].remove((inicio, project_id))
+            self._fins[colaborador_id].remove((fim, project_id))
+
+    # ----- consultas -----
+
+    def carga(self, colaborador_id, inicio, fim, ignorar=None):
+        """Quantos projetos em andamento do colaborador se sobrepõem a [inicio, fim]."""
+        with self._lock:
+            inicios = self._inicios.get(colaborador_id, [])
+            fins = self._fins.get(colaborador_id, [])
+            terminam_antes = bisect_left(fins, (inicio,))
+            comecam_depois = len(inicios) - bisect_right(inicios, (fim, float('inf')))
+            total = len(inicios) - terminam_antes - comecam_depois
+            if ignorar is not None and ignorar in self._projetos and colaborador_id in self._projetos[ignorar][2]:
+                p_inicio, p_fim, _ = self._projetos[ignorar]
+                if p_inicio <= fim and p_fim >= inicio:
+                    total -= 1
+            return total
+
+    def projetos(self, colaborador_id, inicio, fim):
+        """Ids dos projetos do colaborador que se sobrepõem a [inicio, fim]."""
+        with self._lock:
+            inicios = self._inicios.get(colaborador_id, [])
+            candidatos = inicios[:bisect_right(inicios, (fim, float('inf')))]
+            return [project_id for _, project_id in candidatos if self._projetos[project_id][1] >= inicio]
+
+    def disponibilidade(self, colaborador_ids, inicio, fim, capacidade):
+        """Carga de cada colaborador no período e se ele ainda tem vaga (carga < capacidade)."""
+        resultado = []
+        for colaborador_id in colaborador_ids:
+            carga = self.carga(colaborador_id, inicio, fim)
+            resultado.append({
+                'idColaborador': colaborador_id,
+                'projetos_simultaneos': carga,
+                'disponivel': carga < capacidade,
+                'projetos': self.projetos(colaborador_id, inicio, fim) if carga else []
+            })
+        return resultado
@@ -0,0 +1,174 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+# =============================================================================
+# BROKER DE EVENTOS ENTRE WORKERS (SERVER-SENT EVENTS)
+# =============================================================================
+
+
+class Subscription:
+    """Fila de eventos de uma conexão SSE.
+
+    `filtro(canal, dados)` decide se o evento é entregue. Se a fila encher (cliente
+    lento), a assinatura é marcada como `overflow` e o cliente deve recarregar tudo.
+    """
+
+    def __init__(self, filtro, max_queue):
+        self.filtro = filtro
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.last_id = 0
+        self.overflow = False
+
+    def offer(self, event_id, canal, dados):
+        if event_id <= self.last_id or self.overflow or not self.filtro(canal, dados):
+            return
+        try:
+            self.queue.put_nowait((event_id, canal, dados))
+        except queue.Full:
+            self.overflow = True
+
+    def get(self, timeout):
+        """Próximo evento ainda não entregue, ou None após `timeout` segundos."""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                event = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            if event[0] > self.last_id:
+                self.last_id = event[0]
+                return event
+
+
+class EventBroker:
+    """Publicação e assinatura de eventos compartilhadas pelos workers do servidor.
+
+    Os eventos são gravados em um arquivo SQLite local (modo WAL), que faz o papel
+    de um broker como o Redis Pub/Sub enquanto a aplicação roda em uma única
+    máquina. Cada worker tem uma única thread que lê os eventos novos a cada
+    `poll_interval` segundos e os distribui para as conexões SSE abertas nele, sem
+    consultar o MySQL. Os eventos ficam retidos por `retention` segundos para que
+    um cliente reconectando com Last-Event-ID receba o que perdeu.
+    """
+
+    def __init__(self, path, poll_interval=0.5, retention=300, max_queue=256):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.max_queue = max_queue
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pid = None
+        self._subscribers = set()
+        self._thread = None
+        self._pruned_at = 0.0
+        self._schema_ready = False
+
+    # ----- armazenamento -----
+
+    def _db(self):
+        # Conexões SQLite não podem ser compartilhadas entre threads nem entre processos
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            if not self._schema_ready:
+                db.execute("""
+                    CREATE TABLE IF NOT EXISTS eventos (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        canal TEXT NOT NULL,
+                        dados TEXT NOT NULL,
+                        criadoEm REAL NOT NULL
+                    )
+                """)
+                self._schema_ready = True
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    def publish(self, canal, dados):
+        """Publica um evento para todos os workers. Falhas são apenas registradas:
+        o evento é um aviso, a fonte da verdade continua sendo o banco."""
+        try:
+            db = self._db()
+            now = time.time()
+            db.execute("INSERT INTO eventos (canal, dados, criadoEm) VALUES (?, ?, ?)",
+                       (canal, json.dumps(dados, ensure_ascii=False, default=str), now))
+            if now - self._pruned_at > 60:
+                self._pruned_at = now
+                db.execute("DELETE FROM eventos WHERE criadoEm < ?", (now - self.retention,))
+        except Exception as e:
+            print(f"Aviso: falha ao publicar evento '{canal}': {e}")
+
+    def _read_after(self, db, last_id):
+        rows = db.execute("SELECT id, canal, dados FROM eventos WHERE id > ? ORDER BY id", (last_id,)).fetchall()
+        return [(event_id, canal, json.loads(dados)) for event_id, canal, dados in rows]
+
+    # ----- assinatura -----
+
+    def subscribe(self, filtro, last_event_id=None):
+        """Abre uma assinatura. Com `last_event_id`, reenvia os eventos posteriores
+        ainda retidos; se eles já tiverem sido descartados, retorna a assinatura
+        com `overflow` marcado para o cliente recarregar tudo."""
+        self._ensure_started()
+        sub = Subscription(filtro, self.max_queue)
+        with self._lock:
+            self._subscribers.add(sub)
+        db = self._db()
+        if last_event_id is None:
+            sub.last_id = db.execute("SELECT COALESCE(MAX(id), 0) FROM eventos").fetchone()[0]
+        else:
+            oldest = db.execute("SELECT MIN(id) FROM eventos").fetchone()[0]
+            if oldest is not None and last_event_id < oldest - 1:
+                sub.overflow = True
+            sub.last_id = last_event_id
+            # Eventos repetidos entre o replay e a thread de distribuição são descartados por id
+            for event_id, canal, dados in self._read_after(db, last_event_id):
+                sub.offer(event_id, canal, dados)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers) if self._pid == os.getpid() else 0
+
+    # ----- distribuição -----
+
+    def _ensure_started(self):
+        # Threads não sobrevivem ao fork do gunicorn: cada worker inicia a sua
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._subscribers = set()
+            start_id = self._db().execute("SELECT COALESCE(MAX(id), 0) FROM eventos").fetchone()[0]
+            self._thread = threading.Thread(target=self._run, args=(start_id,), name='event-broker', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _run(self, last_id):
+        while True:
+            try:
+                events = self._read_after(self._db(), last_id)
+                if events:
+                    last_id = events[-1][0]
+                    with self._lock:
+                        subscribers = list(self._subscribers)
+                    for event in events:
+                        for sub in subscribers:
+                            sub.offer(*event)
+            except Exception as e:
+                print(f"Aviso: falha ao ler eventos do broker: {e}")
+            time.sleep(self.poll_interval)
@@ -0,0 +1,103 @@
+import gc
+import math
+import os
+import shutil
+import tempfile
+import time
+
+# =============================================================================
+# CONFIGURAÇÃO DO GUNICORN (carregada automaticamente do diretório de trabalho)
+# =============================================================================
+
+_master_started = time.monotonic()
+
+# Diretório compartilhado pelas métricas de todos os workers (/metrics); precisa
+# ser definido no master, antes do fork, para que todos usem o mesmo. Os arquivos
+# de execuções anteriores são apagados aqui, antes do preload importar as métricas
+# (on_starting já seria tarde); recarregar a configuração (SIGHUP) não os apaga.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'ruby_metrics'))
+if os.environ.get('RUBY_METRICS_MASTER') != str(os.getpid()):
+    shutil.rmtree(os.environ['PROMETHEUS_MULTIPROC_DIR'], ignore_errors=True)
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+    os.environ['RUBY_METRICS_MASTER'] = str(os.getpid())
+
+# A aplicação é importada uma vez no master e compartilhada com os workers por
+# copy-on-write. As conexões MySQL não podem ser herdadas: o pool é aquecido em
+# cada worker (post_fork), não na importação.
+preload_app = True
+os.environ.setdefault('RUBY_POOL_WARMUP', os.environ.get('MYSQL_POOL_WARMUP', '1'))
+os.environ['MYSQL_POOL_WARMUP'] = '0'
+
+
+def _cgroup(path):
+    try:
+        with open(path) as f:
+            return f.read().split()
+    except OSError:
+        return None
+
+
+def _cpus():
+    """CPUs disponíveis, respeitando a cota do container (cgroup v2) e a afinidade."""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+    cota = _cgroup('/sys/fs/cgroup/cpu.max')
+    if cota and cota[0] != 'max':
+        cpus = min(cpus, math.ceil(int(cota[0]) / int(cota[1])))
+    return max(cpus, 1)
+
+
+def _memoria_mb():
+    """Memória do container (cgroup v2) ou da máquina, em MB; None se desconhecida."""
+    limite = _cgroup('/sys/fs/cgroup/memory.max')
+    if limite and limite[0] != 'max':
+        return int(limite[0]) // (1024 * 1024)
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def _workers():
+    # 2 x CPUs + 1, limitado pela memória: cada worker ocupa ~WEB_WORKER_MEMORY_MB além do master
+    por_cpu = 2 * _cpus() + 1
+    memoria = _memoria_mb()
+    if memoria is None:
+        return por_cpu
+    por_memoria = (memoria - int(os.environ.get('WEB_MASTER_MEMORY_MB', 250))) // int(os.environ.get('WEB_WORKER_MEMORY_MB', 150))
+    return max(1, min(por_cpu, por_memoria))
+
+
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY') or _workers())
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+
+def when_ready(server):
+    import metrics
+    metrics.MASTER_BOOT.set(time.monotonic() - _master_started)
+    # Objetos já carregados não são mais visitados pelo coletor: sem isso, a
+    # primeira coleta em cada worker tocaria todas as páginas e desfaria o copy-on-write
+    gc.freeze()
+
+
+def pre_fork(server, worker):
+    worker.forked_at = time.monotonic()
+
+
+def post_fork(server, worker):
+    if os.environ['RUBY_POOL_WARMUP'] == '1':
+        from app import mysql
+        mysql.pool.warm_up()
+
+
+def post_worker_init(worker):
+    import metrics
+    metrics.WORKER_BOOT.set(time.monotonic() - worker.forked_at)
+
+
+def child_exit(server, worker):
+    import metrics
+    metrics.mark_process_dead(worker.pid)
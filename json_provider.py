@@ -0,0 +1,49 @@
+from decimal import Decimal
+
+import orjson
+from flask.json.provider import JSONProvider
+
+# =============================================================================
+# SERIALIZAÇÃO JSON DAS RESPOSTAS (orjson)
+# =============================================================================
+
+_OPCOES = orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f'Objeto do tipo {type(obj).__name__} não é serializável em JSON')
+
+
+class OrjsonProvider(JSONProvider):
+    """JSON das respostas (jsonify) gerado pelo orjson, que codifica as listas
+    de linhas do banco em C.
+
+    date/datetime saem em ISO 8601, codificados pelo próprio orjson (datas de
+    alteração, cadastro e logs usadas como `since` pelos clientes). O formato
+    dd/mm/aaaa dos projetos vem pronto do SQL (PROJECT_FIELDS em app.py).
+    Decimal continua saindo como texto, como no provider padrão do Flask; chaves
+    não textuais (ids inteiros) são convertidas em texto. `sort_keys` e
+    `default` funcionam como no provider padrão.
+    """
+
+    mimetype = 'application/json'
+    sort_keys = True
+    default = staticmethod(_default)
+
+    def _dumps(self, obj, default, sort_keys):
+        opcoes = _OPCOES | orjson.OPT_SORT_KEYS if sort_keys else _OPCOES
+        return orjson.dumps(obj, default=default, option=opcoes)
+
+    def dumps(self, obj, **kwargs):
+        return self._dumps(obj, kwargs.get('default', self.default), kwargs.get('sort_keys', self.sort_keys)).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dumps(obj, self.default, self.sort_keys), mimetype=self.mimetype)
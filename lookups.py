@@ -0,0 +1,85 @@
+import threading
+import time
+
+from unidecode import unidecode
+
+# =============================================================================
+# CACHE DAS TABELAS DE REFERÊNCIA (status, prioridade, nível de acesso, ...)
+# =============================================================================
+
+# tabela lógica -> (tabela, coluna id, coluna rótulo)
+LOOKUP_TABLES = {
+    'status_demanda': ('StatusDemanda', 'idStatusDemanda', 'status'),
+    'prioridade': ('PrioridadeDemanda', 'idPrioridadeDemanda', 'prioridade'),
+    'nivel_acesso': ('NivelAcesso', 'idNivelAcesso', 'nivel'),
+    'departamento': ('Departamento', 'idDepartamento', 'nome'),
+    'status_colaborador': ('StatusColaborador', 'idStatusColaborador', 'status'),
+    'cargo': ('Cargo', 'idCargo', 'nome'),
+}
+
+
+def normalizar_rotulo(rotulo):
+    # Mesmo critério da collation *_ai_ci do MySQL: ignora caixa e acentos
+    return unidecode(str(rotulo)).strip().casefold()
+
+
+class LookupCache:
+    """Ids das tabelas de referência, carregados uma vez por worker.
+
+    Todas as tabelas vêm em uma única consulta (UNION ALL). O cache expira após
+    `ttl` segundos ou quando `invalidate()` é chamado; um rótulo desconhecido força
+    no máximo uma recarga a cada `miss_refresh_interval` segundos, para que valores
+    inválidos enviados pelo cliente não virem uma consulta por requisição.
+    """
+
+    def __init__(self, ttl=600, miss_refresh_interval=30):
+        self.ttl = ttl
+        self.miss_refresh_interval = miss_refresh_interval
+        self._lock = threading.Lock()
+        self._ids = {}      # tabela lógica -> {rótulo normalizado: id}
+        self._labels = {}   # tabela lógica -> {id: rótulo original}
+        self._loaded_at = None
+        self._last_miss_refresh = 0.0
+
+    def load(self, cursor):
+        query = " UNION ALL ".join(
+            f"SELECT '{nome}' as tabela, {coluna_id} as id, {coluna_rotulo} as rotulo FROM {tabela}"
+            for nome, (tabela, coluna_id, coluna_rotulo) in LOOKUP_TABLES.items()
+        )
+        cursor.execute(query)
+        ids = {nome: {} for nome in LOOKUP_TABLES}
+        labels = {nome: {} for nome in LOOKUP_TABLES}
+        for row in cursor.fetchall():
+            ids[row['tabela']][normalizar_rotulo(row['rotulo'])] = row['id']
+            labels[row['tabela']][row['id']] = row['rotulo']
+        with self._lock:
+            self._ids, self._labels = ids, labels
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def _ensure_loaded(self, cursor):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.ttl:
+            self.load(cursor)
+
+    def get_id(self, cursor, tabela, rotulo):
+        """Retorna o id de `rotulo` em `tabela` (ver LOOKUP_TABLES) ou None."""
+        self._ensure_loaded(cursor)
+        chave = normalizar_rotulo(rotulo)
+        found = self._ids[tabela].get(chave)
+        if found is None and time.monotonic() - self._last_miss_refresh > self.miss_refresh_interval:
+            self._last_miss_refresh = time.monotonic()
+            self.load(cursor)
+            found = self._ids[tabela].get(chave)
+        return found
+
+    def get_label(self, cursor, tabela, lookup_id):
+        self._ensure_loaded(cursor)
+        return self._labels[tabela].get(lookup_id)
+
+    def labels(self, cursor, tabela):
+        """Rótulos originais de `tabela`, para as mensagens de valor inválido."""
+        self._ensure_loaded(cursor)
+        return list(self._labels[tabela].values())
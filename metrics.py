@@ -0,0 +1,224 @@
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# O modo multiprocesso do prometheus_client é decidido na importação: o diretório
+# precisa existir antes (o gunicorn.conf.py o define no processo master).
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'ruby_metrics'))
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+
+# =============================================================================
+# MÉTRICAS POR ROTA (LATÊNCIA E SQL) NO FORMATO DO PROMETHEUS
+# =============================================================================
+
+REQUEST_LATENCY = Histogram(
+    'ruby_http_request_duration_seconds', 'Latência das requisições por rota',
+    ['endpoint', 'method', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+DB_STATEMENTS = Counter('ruby_db_statements_total', 'Comandos SQL executados', ['endpoint'])
+DB_TIME = Counter('ruby_db_time_seconds_total', 'Tempo gasto em comandos SQL', ['endpoint'])
+DB_ROWS = Counter('ruby_db_rows_total', 'Linhas lidas do banco', ['endpoint'])
+DB_COMMITS = Counter('ruby_db_commits_total', 'Commits realizados', ['endpoint'])
+DB_STATEMENTS_PER_REQUEST = Histogram(
+    'ruby_db_statements_per_request', 'Comandos SQL por requisição', ['endpoint'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100))
+DB_BUDGET_EXCEEDED = Counter('ruby_db_budget_exceeded_total', 'Requisições acima do orçamento de comandos SQL', ['endpoint'])
+FUNCTION_LATENCY = Histogram(
+    'ruby_function_duration_seconds', 'Duração de funções instrumentadas', ['function'],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5))
+PASSWORD_HASH_DURATION = Histogram(
+    'ruby_password_hash_seconds', 'Tempo de hash de senha, incluindo a espera na fila', ['operacao'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+PASSWORD_HASH_QUEUE = Gauge('ruby_password_hash_pending', 'Operações de hash de senha em execução ou na fila',
+                            multiprocess_mode='livesum')
+PASSWORD_HASH_REJECTED = Counter('ruby_password_hash_rejected_total', 'Operações de hash recusadas por fila cheia ou prazo', ['operacao'])
+RESPONSE_CACHE = Counter('ruby_response_cache_total', 'Consultas ao cache de respostas (hit, miss, stale)',
+                         ['endpoint', 'resultado'])
+RESPONSE_CACHE_BYTES = Gauge('ruby_response_cache_bytes', 'Memória ocupada pelas respostas em cache',
+                             multiprocess_mode='livesum')
+MASTER_BOOT = Gauge('ruby_master_boot_seconds', 'Inicialização do master do gunicorn, incluindo importar a aplicação',
+                    multiprocess_mode='max')
+WORKER_BOOT = Gauge('ruby_worker_boot_seconds', 'Tempo entre o fork e o worker ficar pronto', multiprocess_mode='liveall')
+
+_local = threading.local()
+
+
+def mark_process_dead(pid):
+    multiprocess.mark_process_dead(pid)
+
+
+def _endpoint():
+    return getattr(_local, 'endpoint', None) or 'background'
+
+
+@contextmanager
+def track(endpoint):
+    """Atribui os comandos SQL executados no bloco a `endpoint` (threads de fundo, scripts)."""
+    anterior = getattr(_local, 'endpoint', None)
+    _local.endpoint = endpoint
+    try:
+        yield
+    finally:
+        _local.endpoint = anterior
+
+
+@contextmanager
+def capture():
+    """Registra os comandos SQL executados na thread atual durante o bloco.
+
+    Produz uma lista de dicts {'sql', 'args', 'segundos'}; os commits aparecem
+    com sql 'COMMIT'. Usado por scripts/orcamento_consultas.py.
+    """
+    anterior = getattr(_local, 'captured', None)
+    _local.captured = capturados = []
+    try:
+        yield capturados
+    finally:
+        _local.captured = anterior
+
+
+def query_budget(limite):
+    """Declara quantos comandos SQL a rota pode executar por requisição.
+
+    Deve ficar logo abaixo do @app.route. Requisições acima do limite são
+    registradas em ruby_db_budget_exceeded_total e verificadas pelo
+    scripts/orcamento_consultas.py.
+    """
+    def decorator(f):
+        f.query_budget = limite
+        return f
+    return decorator
+
+
+def timed(name):
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                FUNCTION_LATENCY.labels(name).observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+# ----- wrappers de conexão e cursor -----
+
+class InstrumentedCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def _record(self, started, query, args):
+        elapsed = time.perf_counter() - started
+        endpoint = _endpoint()
+        DB_STATEMENTS.labels(endpoint).inc()
+        DB_TIME.labels(endpoint).inc(elapsed)
+        stats = getattr(_local, 'request_stats', None)
+        if stats is not None:
+            stats['statements'] += 1
+        captured = getattr(_local, 'captured', None)
+        if captured is not None:
+            captured.append({'sql': query, 'args': args, 'segundos': elapsed})
+
+    def execute(self, query, args=None):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(query, args)
+        finally:
+            self._record(started, query, args)
+
+    def executemany(self, query, args):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(query, args)
+        finally:
+            self._record(started, query, args)
+
+    def _rows(self, rows):
+        if rows:
+            DB_ROWS.labels(_endpoint()).inc(len(rows))
+        return rows
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            DB_ROWS.labels(_endpoint()).inc()
+        return row
+
+    def fetchmany(self, size=None):
+        return self._rows(self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany())
+
+    def fetchall(self):
+        return self._rows(self._cursor.fetchall())
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs))
+
+    def commit(self):
+        DB_COMMITS.labels(_endpoint()).inc()
+        captured = getattr(_local, 'captured', None)
+        if captured is not None:
+            captured.append({'sql': 'COMMIT', 'args': None, 'segundos': 0.0})
+        return self._conn.commit()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+# ----- integração com o Flask -----
+
+def init_app(app, token=None):
+    """Registra os hooks de requisição e a rota /metrics (protegida por `token`, se informado)."""
+    from flask import Response, abort, request
+
+    @app.before_request
+    def _start_request_metrics():
+        _local.endpoint = request.endpoint or 'not_found'
+        _local.request_stats = {'statements': 0}
+        _local.started = time.perf_counter()
+
+    @app.after_request
+    def _record_request_metrics(response):
+        started = getattr(_local, 'started', None)
+        if started is not None:
+            endpoint = _local.endpoint
+            statements = _local.request_stats['statements']
+            REQUEST_LATENCY.labels(endpoint, request.method, str(response.status_code)).observe(time.perf_counter() - started)
+            DB_STATEMENTS_PER_REQUEST.labels(endpoint).observe(statements)
+            budget = getattr(app.view_functions.get(request.endpoint), 'query_budget', None)
+            if budget is not None and statements > budget:
+                DB_BUDGET_EXCEEDED.labels(endpoint).inc()
+                print(f"Aviso: {endpoint} executou {statements} comandos SQL (orçamento: {budget})")
+        return response
+
+    @app.teardown_request
+    def _reset_request_metrics(exception):
+        _local.endpoint = None
+        _local.request_stats = None
+        _local.started = None
+
+    @app.route('/metrics')
+    @query_budget(0)
+    def prometheus_metrics():
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            abort(401)
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
@@ -0,0 +1,8 @@
+USE railway;
+
+-- Marca de atualização usada pela extração incremental do Power BI
+-- (GET /api/projects/export?since=...). Linhas existentes recebem o instante da migração.
+ALTER TABLE Demandas
+    ADD COLUMN dataAtualizacao TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6);
+
+CREATE INDEX idx_demandas_atualizacao ON Demandas(dataAtualizacao, idDemandas);
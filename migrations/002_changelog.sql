@@ -0,0 +1,36 @@
+USE railway;
+
+-- Histórico de alterações para a sincronização incremental (GET /api/projects/changes e /api/users/changes).
+-- Cada INSERT/UPDATE/DELETE em Demandas, Colaborador e ADM gera uma versão nova via trigger.
+-- A versão é atribuída no INSERT, não no commit, e pode confirmar fora de ordem: os leitores
+-- não avançam além da primeira lacuna recente (ver changelog.py e CHANGELOG_COMMIT_LAG).
+CREATE TABLE IF NOT EXISTS ChangeLog (
+    versao BIGINT AUTO_INCREMENT PRIMARY KEY,
+    tabela VARCHAR(20) NOT NULL,
+    idRegistro INT NOT NULL,
+    operacao CHAR(1) NOT NULL, -- 'I', 'U', 'D'
+    criadoEm TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    INDEX idx_changelog_tabela (tabela, versao),
+    INDEX idx_changelog_criado (criadoEm)
+);
+
+CREATE TRIGGER trg_demandas_ins AFTER INSERT ON Demandas FOR EACH ROW
+    INSERT INTO ChangeLog (tabela, idRegistro, operacao) VALUES ('Demandas', NEW.idDemandas, 'I');
+CREATE TRIGGER trg_demandas_upd AFTER UPDATE ON Demandas FOR EACH ROW
+    INSERT INTO ChangeLog (tabela, idRegistro, operacao) VALUES ('Demandas', NEW.idDemandas, 'U');
+CREATE TRIGGER trg_demandas_del AFTER DELETE ON Demandas FOR EACH ROW
+    INSERT INTO ChangeLog (tabela, idRegistro, operacao) VALUES ('Demandas', OLD.idDemandas, 'D');
+
+CREATE TRIGGER trg_colaborador_ins AFTER INSERT ON Colaborador FOR EACH ROW
+    INSERT INTO ChangeLog (tabela, idRegistro, operacao) VALUES ('Colaborador', NEW.idColaborador, 'I');
+CREATE TRIGGER trg_colaborador_upd AFTER UPDATE ON Colaborador FOR EACH ROW
+    INSERT INTO ChangeLog (tabela, idRegistro, operacao) VALUES ('Colaborador', NEW.idColaborador, 'U');
+CREATE TRIGGER trg_colaborador_del AFTER DELETE ON Colaborador FOR EACH ROW
+    INSERT INTO ChangeLog (tabela, idRegistro, operacao) VALUES ('Colaborador', OLD.idColaborador, 'D');
+
+CREATE TRIGGER trg_adm_ins AFTER INSERT ON ADM FOR EACH ROW
+    INSERT INTO ChangeLog (tabela, idRegistro, operacao) VALUES ('ADM', NEW.idADM, 'I');
+CREATE TRIGGER trg_adm_upd AFTER UPDATE ON ADM FOR EACH ROW
+    INSERT INTO ChangeLog (tabela, idRegistro, operacao) VALUES ('ADM', NEW.idADM, 'U');
+CREATE TRIGGER trg_adm_del AFTER DELETE ON ADM FOR EACH ROW
+    INSERT INTO ChangeLog (tabela, idRegistro, operacao) VALUES ('ADM', OLD.idADM, 'D');
@@ -0,0 +1,33 @@
+USE railway;
+
+-- Integrantes de cada demanda (responsável e corresponsáveis). Substitui o LIKE em
+-- estagiario_corresponsavel no filtro "meus projetos"; os nomes continuam em Demandas só para exibição.
+CREATE TABLE IF NOT EXISTS DemandaIntegrante (
+    idDemandas INT NOT NULL,
+    idColaborador INT NOT NULL,
+    papel VARCHAR(20) NOT NULL, -- 'RESPONSAVEL', 'CORRESPONSAVEL'
+    PRIMARY KEY (idDemandas, idColaborador),
+    INDEX idx_integrante_colaborador (idColaborador, idDemandas),
+    CONSTRAINT fk_DemandaIntegrante_Demandas
+        FOREIGN KEY (idDemandas) REFERENCES Demandas(idDemandas)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE,
+    CONSTRAINT fk_DemandaIntegrante_Colaborador
+        FOREIGN KEY (idColaborador) REFERENCES Colaborador(idColaborador)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE
+);
+
+-- Carga inicial a partir das colunas de texto: o responsável vem de Demandas.idColaborador
+-- e os corresponsáveis de estagiario_corresponsavel (nomes separados por ", ").
+INSERT IGNORE INTO DemandaIntegrante (idDemandas, idColaborador, papel)
+SELECT d.idDemandas, d.idColaborador, 'RESPONSAVEL'
+FROM Demandas d
+WHERE d.idColaborador IS NOT NULL;
+
+INSERT IGNORE INTO DemandaIntegrante (idDemandas, idColaborador, papel)
+SELECT d.idDemandas, MIN(c.idColaborador), 'CORRESPONSAVEL'
+FROM Demandas d
+JOIN Colaborador c ON FIND_IN_SET(c.nome, REPLACE(d.estagiario_corresponsavel, ', ', ',')) > 0
+WHERE d.estagiario_corresponsavel IS NOT NULL AND d.estagiario_corresponsavel != ''
+GROUP BY d.idDemandas, c.nome;
@@ -0,0 +1,4 @@
+USE railway;
+
+-- Busca textual de projetos (GET /api/projects/search)
+CREATE FULLTEXT INDEX ft_demandas_busca ON Demandas(titulo, descricao, objetivo);
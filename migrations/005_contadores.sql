@@ -0,0 +1,38 @@
+USE railway;
+
+-- Contadores de GET /api/stats mantidos por triggers: 'demandas.status.<idStatusDemanda>' e 'adm'
+CREATE TABLE IF NOT EXISTS Contador (
+    chave VARCHAR(50) PRIMARY KEY,
+    valor BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER trg_contador_demandas_ins AFTER INSERT ON Demandas FOR EACH ROW
+    INSERT INTO Contador (chave, valor) VALUES (CONCAT('demandas.status.', NEW.idStatusDemanda), 1)
+    ON DUPLICATE KEY UPDATE valor = valor + VALUES(valor);
+CREATE TRIGGER trg_contador_demandas_upd AFTER UPDATE ON Demandas FOR EACH ROW
+    INSERT INTO Contador (chave, valor)
+    SELECT delta.chave, delta.valor FROM (
+        SELECT CONCAT('demandas.status.', OLD.idStatusDemanda) AS chave, -1 AS valor
+        UNION ALL
+        SELECT CONCAT('demandas.status.', NEW.idStatusDemanda), 1
+    ) delta
+    WHERE OLD.idStatusDemanda <> NEW.idStatusDemanda
+    ON DUPLICATE KEY UPDATE valor = Contador.valor + VALUES(valor);
+CREATE TRIGGER trg_contador_demandas_del AFTER DELETE ON Demandas FOR EACH ROW
+    INSERT INTO Contador (chave, valor) VALUES (CONCAT('demandas.status.', OLD.idStatusDemanda), -1)
+    ON DUPLICATE KEY UPDATE valor = valor + VALUES(valor);
+
+CREATE TRIGGER trg_contador_adm_ins AFTER INSERT ON ADM FOR EACH ROW
+    INSERT INTO Contador (chave, valor) VALUES ('adm', 1)
+    ON DUPLICATE KEY UPDATE valor = valor + VALUES(valor);
+CREATE TRIGGER trg_contador_adm_del AFTER DELETE ON ADM FOR EACH ROW
+    INSERT INTO Contador (chave, valor) VALUES ('adm', -1)
+    ON DUPLICATE KEY UPDATE valor = valor + VALUES(valor);
+
+-- Carga inicial a partir dos dados existentes
+INSERT INTO Contador (chave, valor)
+SELECT CONCAT('demandas.status.', idStatusDemanda), COUNT(*) FROM Demandas GROUP BY idStatusDemanda
+ON DUPLICATE KEY UPDATE valor = VALUES(valor);
+INSERT INTO Contador (chave, valor)
+SELECT 'adm', COUNT(*) FROM ADM
+ON DUPLICATE KEY UPDATE valor = VALUES(valor);
@@ -0,0 +1,10 @@
+USE railway;
+
+-- Poda do histórico da ChangeLog, feita pelo agendador do MySQL em vez das leituras de
+-- /api/projects/changes e /api/users/changes (que assim não gravam nada). Clientes com um
+-- token anterior ao histórico retido recebem reset=true e recarregam tudo.
+-- Requer event_scheduler=ON (padrão do MySQL 8.0). Para mudar a retenção:
+-- ALTER EVENT ev_changelog_retencao DO DELETE FROM ChangeLog WHERE criadoEm < NOW() - INTERVAL <n> DAY;
+CREATE EVENT IF NOT EXISTS ev_changelog_retencao
+    ON SCHEDULE EVERY 1 HOUR
+    DO DELETE FROM ChangeLog WHERE criadoEm < NOW() - INTERVAL 7 DAY;
@@ -0,0 +1,27 @@
+USE railway;
+
+-- Exclusões em cascata (ON DELETE CASCADE) não disparam os triggers das tabelas filhas: ao
+-- excluir um Solicitante ou Colaborador, as demandas e logins que vão junto são descontados
+-- aqui, antes da exclusão. Se a exclusão falhar, o comando inteiro é desfeito com o desconto.
+CREATE TRIGGER trg_contador_solicitante_del BEFORE DELETE ON Solicitante FOR EACH ROW
+    INSERT INTO Contador (chave, valor)
+    SELECT CONCAT('demandas.status.', d.idStatusDemanda), -COUNT(*)
+    FROM Demandas d
+    WHERE d.idSolicitante = OLD.idSolicitante
+    GROUP BY d.idStatusDemanda
+    ON DUPLICATE KEY UPDATE valor = Contador.valor + VALUES(valor);
+CREATE TRIGGER trg_contador_colaborador_del BEFORE DELETE ON Colaborador FOR EACH ROW
+    INSERT INTO Contador (chave, valor)
+    SELECT delta.chave, delta.valor FROM (
+        SELECT CONCAT('demandas.status.', d.idStatusDemanda) AS chave, -COUNT(*) AS valor
+        FROM Demandas d
+        WHERE d.idColaborador = OLD.idColaborador
+        GROUP BY d.idStatusDemanda
+        UNION ALL
+        SELECT 'adm', -COUNT(*) FROM ADM a WHERE a.idColaborador = OLD.idColaborador
+    ) delta
+    WHERE delta.valor <> 0
+    ON DUPLICATE KEY UPDATE valor = Contador.valor + VALUES(valor);
+
+-- Recontagem completa (ex.: depois de alterações feitas com os triggers desativados): rode de
+-- novo a carga inicial de 005_contadores.sql.
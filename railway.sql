@@ -110,6 +110,7 @@ CREATE TABLE IF NOT EXISTS Demandas (
     periodo VARCHAR(100),
     objetivo TEXT,
     observacao TEXT,
+    dataAtualizacao TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
     
     CONSTRAINT fk_Demandas_Solicitante
         FOREIGN KEY (idSolicitante) REFERENCES Solicitante(idSolicitante)
@@ -174,4 +175,124 @@ CREATE INDEX idx_demandas_status ON Demandas(idStatusDemanda);
 CREATE INDEX idx_demandas_prioridade ON Demandas(idPrioridadeDemanda);
 CREATE INDEX idx_demandas_data ON Demandas(dataAbertura);
 CREATE INDEX idx_adm_email ON ADM(email);
-CREATE INDEX idx_logs_timestamp ON Logs(timestamp);
\ No newline at end of file
+CREATE INDEX idx_logs_timestamp ON Logs(timestamp);
+
+-- Índices para paginação por chave e filtros de GET /api/projects
+CREATE INDEX idx_demandas_status_data ON Demandas(idStatusDemanda, dataAbertura, idDemandas);
+CREATE INDEX idx_demandas_prioridade_data ON Demandas(idPrioridadeDemanda, dataAbertura, idDemandas);
+CREATE INDEX idx_demandas_solicitante_data ON Demandas(idSolicitante, dataAbertura, idDemandas);
+
+
+-- Extração incremental (GET /api/projects/export?since=...)
+CREATE INDEX idx_demandas_atualizacao ON Demandas(dataAtualizacao, idDemandas);
+
+-- Histórico de alterações para a sincronização incremental (GET /api/projects/changes e /api/users/changes).
+-- Cada INSERT/UPDATE/DELETE em Demandas, Colaborador e ADM gera uma versão nova via trigger.
+CREATE TABLE IF NOT EXISTS ChangeLog (
+    versao BIGINT AUTO_INCREMENT PRIMARY KEY,
+    tabela VARCHAR(20) NOT NULL,
+    idRegistro INT NOT NULL,
+    operacao CHAR(1) NOT NULL, -- 'I', 'U', 'D'
+    criadoEm TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    INDEX idx_changelog_tabela (tabela, versao),
+    INDEX idx_changelog_criado (criadoEm)
+);
+
+CREATE TRIGGER trg_demandas_ins AFTER INSERT ON Demandas FOR EACH ROW
+    INSERT INTO ChangeLog (tabela, idRegistro, operacao) VALUES ('Demandas', NEW.idDemandas, 'I');
+CREATE TRIGGER trg_demandas_upd AFTER UPDATE ON Demandas FOR EACH ROW
+    INSERT INTO ChangeLog (tabela, idRegistro, operacao) VALUES ('Demandas', NEW.idDemandas, 'U');
+CREATE TRIGGER trg_demandas_del AFTER DELETE ON Demandas FOR EACH ROW
+    INSERT INTO ChangeLog (tabela, idRegistro, operacao) VALUES ('Demandas', OLD.idDemandas, 'D');
+
+CREATE TRIGGER trg_colaborador_ins AFTER INSERT ON Colaborador FOR EACH ROW
+    INSERT INTO ChangeLog (tabela, idRegistro, operacao) VALUES ('Colaborador', NEW.idColaborador, 'I');
+CREATE TRIGGER trg_colaborador_upd AFTER UPDATE ON Colaborador FOR EACH ROW
+    INSERT INTO ChangeLog (tabela, idRegistro, operacao) VALUES ('Colaborador', NEW.idColaborador, 'U');
+CREATE TRIGGER trg_colaborador_del AFTER DELETE ON Colaborador FOR EACH ROW
+    INSERT INTO ChangeLog (tabela, idRegistro, operacao) VALUES ('Colaborador', OLD.idColaborador, 'D');
+
+CREATE TRIGGER trg_adm_ins AFTER INSERT ON ADM FOR EACH ROW
+    INSERT INTO ChangeLog (tabela, idRegistro, operacao) VALUES ('ADM', NEW.idADM, 'I');
+CREATE TRIGGER trg_adm_upd AFTER UPDATE ON ADM FOR EACH ROW
+    INSERT INTO ChangeLog (tabela, idRegistro, operacao) VALUES ('ADM', NEW.idADM, 'U');
+CREATE TRIGGER trg_adm_del AFTER DELETE ON ADM FOR EACH ROW
+    INSERT INTO ChangeLog (tabela, idRegistro, operacao) VALUES ('ADM', OLD.idADM, 'D');
+
+-- Poda do histórico (7 dias) pelo agendador do MySQL; requer event_scheduler=ON
+CREATE EVENT IF NOT EXISTS ev_changelog_retencao
+    ON SCHEDULE EVERY 1 HOUR
+    DO DELETE FROM ChangeLog WHERE criadoEm < NOW() - INTERVAL 7 DAY;
+
+-- Integrantes de cada demanda (responsável e corresponsáveis). Substitui o LIKE em
+-- estagiario_corresponsavel no filtro "meus projetos"; os nomes continuam em Demandas só para exibição.
+CREATE TABLE IF NOT EXISTS DemandaIntegrante (
+    idDemandas INT NOT NULL,
+    idColaborador INT NOT NULL,
+    papel VARCHAR(20) NOT NULL, -- 'RESPONSAVEL', 'CORRESPONSAVEL'
+    PRIMARY KEY (idDemandas, idColaborador),
+    INDEX idx_integrante_colaborador (idColaborador, idDemandas),
+    CONSTRAINT fk_DemandaIntegrante_Demandas
+        FOREIGN KEY (idDemandas) REFERENCES Demandas(idDemandas)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE,
+    CONSTRAINT fk_DemandaIntegrante_Colaborador
+        FOREIGN KEY (idColaborador) REFERENCES Colaborador(idColaborador)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE
+);
+
+-- Busca textual de projetos (GET /api/projects/search)
+CREATE FULLTEXT INDEX ft_demandas_busca ON Demandas(titulo, descricao, objetivo);
+
+-- Contadores de GET /api/stats mantidos por triggers: 'demandas.status.<idStatusDemanda>' e 'adm'
+CREATE TABLE IF NOT EXISTS Contador (
+    chave VARCHAR(50) PRIMARY KEY,
+    valor BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER trg_contador_demandas_ins AFTER INSERT ON Demandas FOR EACH ROW
+    INSERT INTO Contador (chave, valor) VALUES (CONCAT('demandas.status.', NEW.idStatusDemanda), 1)
+    ON DUPLICATE KEY UPDATE valor = valor + VALUES(valor);
+CREATE TRIGGER trg_contador_demandas_upd AFTER UPDATE ON Demandas FOR EACH ROW
+    INSERT INTO Contador (chave, valor)
+    SELECT delta.chave, delta.valor FROM (
+        SELECT CONCAT('demandas.status.', OLD.idStatusDemanda) AS chave, -1 AS valor
+        UNION ALL
+        SELECT CONCAT('demandas.status.', NEW.idStatusDemanda), 1
+    ) delta
+    WHERE OLD.idStatusDemanda <> NEW.idStatusDemanda
+    ON DUPLICATE KEY UPDATE valor = Contador.valor + VALUES(valor);
+CREATE TRIGGER trg_contador_demandas_del AFTER DELETE ON Demandas FOR EACH ROW
+    INSERT INTO Contador (chave, valor) VALUES (CONCAT('demandas.status.', OLD.idStatusDemanda), -1)
+    ON DUPLICATE KEY UPDATE valor = valor + VALUES(valor);
+
+CREATE TRIGGER trg_contador_adm_ins AFTER INSERT ON ADM FOR EACH ROW
+    INSERT INTO Contador (chave, valor) VALUES ('adm', 1)
+    ON DUPLICATE KEY UPDATE valor = valor + VALUES(valor);
+CREATE TRIGGER trg_contador_adm_del AFTER DELETE ON ADM FOR EACH ROW
+    INSERT INTO Contador (chave, valor) VALUES ('adm', -1)
+    ON DUPLICATE KEY UPDATE valor = valor + VALUES(valor);
+
+-- Exclusões em cascata (ON DELETE CASCADE) não disparam os triggers das tabelas filhas: ao
+-- excluir um Solicitante ou Colaborador, as demandas e logins que vão junto são descontados
+-- aqui, antes da exclusão. Se a exclusão falhar, o comando inteiro é desfeito com o desconto.
+CREATE TRIGGER trg_contador_solicitante_del BEFORE DELETE ON Solicitante FOR EACH ROW
+    INSERT INTO Contador (chave, valor)
+    SELECT CONCAT('demandas.status.', d.idStatusDemanda), -COUNT(*)
+    FROM Demandas d
+    WHERE d.idSolicitante = OLD.idSolicitante
+    GROUP BY d.idStatusDemanda
+    ON DUPLICATE KEY UPDATE valor = Contador.valor + VALUES(valor);
+CREATE TRIGGER trg_contador_colaborador_del BEFORE DELETE ON Colaborador FOR EACH ROW
+    INSERT INTO Contador (chave, valor)
+    SELECT delta.chave, delta.valor FROM (
+        SELECT CONCAT('demandas.status.', d.idStatusDemanda) AS chave, -COUNT(*) AS valor
+        FROM Demandas d
+        WHERE d.idColaborador = OLD.idColaborador
+        GROUP BY d.idStatusDemanda
+        UNION ALL
+        SELECT 'adm', -COUNT(*) FROM ADM a WHERE a.idColaborador = OLD.idColaborador
+    ) delta
+    WHERE delta.valor <> 0
+    ON DUPLICATE KEY UPDATE valor = Contador.valor + VALUES(valor);
\ No newline at end of file
@@ -0,0 +1,154 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+
+import metrics
+
+# =============================================================================
+# CACHE DE RESPOSTAS DAS ROTAS DE LEITURA (INVALIDADO PELAS ESCRITAS)
+# =============================================================================
+
+
+class ResponseCache:
+    """Respostas JSON das rotas de leitura, guardadas por worker.
+
+    A chave é (rota com parâmetros, perfil, colaborador logado), então cada perfil
+    só recebe o que a própria consulta devolveria. Cada resposta fica associada aos
+    contadores de geração dos escopos de que depende ('projects', 'users'); as
+    rotas de escrita chamam `bump()` depois do commit e as respostas gravadas com
+    uma geração anterior deixam de valer.
+
+    Os contadores ficam em um arquivo SQLite local (modo WAL), compartilhado pelos
+    workers do gunicorn como o EventBroker, fazendo o papel de um cache como o
+    Redis enquanto a aplicação roda em uma única máquina: uma escrita em um worker
+    invalida as respostas de todos na requisição seguinte, sem consultar o MySQL.
+    As respostas são descartadas em ordem LRU quando passam de `max_bytes`, e
+    expiram após `ttl` segundos para cobrir alterações feitas fora da aplicação.
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, ttl=300):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # chave -> (gerações, expira, status, mimetype, corpo)
+        self._bytes = 0
+        self._schema_ready = False
+
+    # ----- contadores de geração -----
+
+    def _db(self):
+        # Conexões SQLite não podem ser compartilhadas entre threads nem entre processos
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            if not self._schema_ready:
+                db.execute("""
+                    CREATE TABLE IF NOT EXISTS geracoes (
+                        escopo TEXT PRIMARY KEY,
+                        valor INTEGER NOT NULL
+                    )
+                """)
+                self._schema_ready = True
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    def generations(self, escopos):
+        """Gerações atuais de `escopos`, na mesma ordem; None se o arquivo não puder ser lido."""
+        try:
+            rows = dict(self._db().execute(
+                f"SELECT escopo, valor FROM geracoes WHERE escopo IN ({', '.join(['?'] * len(escopos))})",
+                escopos).fetchall())
+        except Exception as e:
+            print(f"Aviso: falha ao ler gerações do cache de respostas: {e}")
+            return None
+        return tuple(rows.get(escopo, 0) for escopo in escopos)
+
+    def bump(self, *escopos):
+        """Invalida, em todos os workers, as respostas que dependem de `escopos`.
+        Deve ser chamado depois do commit."""
+        try:
+            db = self._db()
+            for escopo in escopos:
+                db.execute("INSERT INTO geracoes (escopo, valor) VALUES (?, 1) "
+                           "ON CONFLICT(escopo) DO UPDATE SET valor = valor + 1", (escopo,))
+        except Exception as e:
+            # Sem o contador, os outros workers só percebem a alteração quando o ttl vencer
+            print(f"Aviso: falha ao invalidar o cache de respostas {escopos}: {e}")
+            self.clear()
+
+    # ----- respostas -----
+
+    def _get(self, chave, geracoes):
+        with self._lock:
+            entrada = self._entries.get(chave)
+            if entrada is None:
+                return None, 'miss'
+            if entrada[0] != geracoes or time.monotonic() > entrada[1]:
+                self._discard(chave)
+                return None, 'stale'
+            self._entries.move_to_end(chave)
+            return entrada, 'hit'
+
+    def _put(self, chave, geracoes, status, mimetype, corpo):
+        tamanho = len(corpo)
+        if tamanho > self.max_bytes // 4:
+            return
+        with self._lock:
+            if chave in self._entries:
+                self._discard(chave)
+            self._entries[chave] = (geracoes, time.monotonic() + self.ttl, status, mimetype, corpo)
+            self._bytes += tamanho
+            while self._bytes > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+            metrics.RESPONSE_CACHE_BYTES.set(self._bytes)
+
+    def _discard(self, chave):
+        # Chamado com self._lock adquirido
+        self._bytes -= len(self._entries.pop(chave)[4])
+        metrics.RESPONSE_CACHE_BYTES.set(self._bytes)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            metrics.RESPONSE_CACHE_BYTES.set(0)
+
+    def stats(self):
+        with self._lock:
+            return {'respostas': len(self._entries), 'bytes': self._bytes, 'max_bytes': self.max_bytes}
+
+    def cached(self, *escopos):
+        """Decorator das rotas de leitura; deve ficar abaixo dos decorators de acesso
+        (login_required, admin_required), que continuam sendo verificados a cada
+        requisição. Só respostas 200 são guardadas."""
+        def decorator(f):
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                geracoes = self.generations(escopos)
+                if geracoes is None:
+                    return f(*args, **kwargs)
+                chave = (request.path, tuple(sorted(request.args.items(multi=True))),
+                         session.get('user_role'), session.get('user_colaborador_id'))
+                entrada, resultado = self._get(chave, geracoes)
+                metrics.RESPONSE_CACHE.labels(request.endpoint, resultado).inc()
+                if entrada is not None:
+                    return current_app.response_class(entrada[4], status=entrada[2], mimetype=entrada[3])
+
+                # As gerações lidas antes da consulta: uma escrita concluída durante
+                # ela deixa a resposta já vencida para a próxima requisição
+                response = make_response(f(*args, **kwargs))
+                if response.status_code == 200 and not response.is_streamed:
+                    self._put(chave, geracoes, response.status_code, response.mimetype, response.get_data())
+                return response
+            return wrapper
+        return decorator
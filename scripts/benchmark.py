@@ -0,0 +1,275 @@
+"""Benchmark HTTP reprodutível da aplicação.
+
+Simula usuários concorrentes dos três perfis (ADMINISTRADOR, SOLICITANTE e
+COLABORADOR) contra um servidor em execução: cada usuário virtual faz login,
+carrega a lista de projetos e, até o fim da duração, executa um roteiro
+ponderado de leituras (projetos, aderência, estatísticas) e escritas (cadastro
+de projeto, urgência, andamento). Ao final grava um JSON com requisições,
+erros, vazão e latências p50/p95/p99 por endpoint.
+
+Com --baseline, compara o p95 de cada endpoint com um relatório anterior e
+termina com código 1 se algum piorar mais que --tolerancia por cento.
+
+Uso (com a massa de scripts/gerar_dados.py):
+    python scripts/benchmark.py --url http://localhost:8000 --concorrencia 20 --duracao 60
+    python scripts/benchmark.py --saida atual.json --baseline benchmark.json
+
+Usa apenas a biblioteca padrão, para rodar de qualquer máquina.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from http.cookiejar import CookieJar
+
+PERFIS = ('ADMINISTRADOR', 'SOLICITANTE', 'COLABORADOR')
+EMAILS_PADRAO = {
+    'ADMINISTRADOR': 'bench.admin@ruby.com',
+    'SOLICITANTE': 'bench.solicitante@ruby.com',
+    'COLABORADOR': 'bench.colaborador@ruby.com',
+}
+
+# Roteiro de cada perfil: (ação, peso). Ações de escrita só entram sem --sem-escritas.
+ROTEIROS = {
+    'ADMINISTRADOR': [('projetos', 30), ('projetos_pagina', 15), ('aderencia_projeto', 15), ('aderencia_lote', 5),
+                      ('estatisticas', 15), ('cadastrar_projeto', 5), ('urgencia', 10), ('andamento', 5)],
+    'SOLICITANTE': [('projetos', 35), ('projetos_pagina', 15), ('aderencia_projeto', 15), ('estatisticas', 15),
+                    ('cadastrar_projeto', 10), ('urgencia', 10)],
+    'COLABORADOR': [('projetos', 45), ('projetos_pagina', 20), ('estatisticas', 20), ('andamento', 15)],
+}
+ESCRITAS = {'cadastrar_projeto', 'urgencia', 'andamento'}
+URGENCIAS = ['Baixa', 'Média', 'Alta', 'Urgente']
+ETAPAS = ['reuniao_requisitos', 'coleta_preparacao_dados', 'criacao_relatorio_dashboard', 'validacao_refinamento', 'documentacao']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--concorrencia', type=int, default=10, help='Usuários virtuais simultâneos')
+    parser.add_argument('--duracao', type=float, default=60, help='Segundos de carga após o aquecimento')
+    parser.add_argument('--aquecimento', type=float, default=5, help='Segundos iniciais descartados das estatísticas')
+    parser.add_argument('--perfis', default=','.join(PERFIS), help='Perfis simulados, separados por vírgulas')
+    parser.add_argument('--senha', default='cah@123')
+    parser.add_argument('--sem-escritas', action='store_true', help='Executa apenas leituras')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--saida', default='benchmark.json')
+    parser.add_argument('--baseline', help='Relatório anterior para comparar o p95')
+    parser.add_argument('--tolerancia', type=float, default=20, help='Piora máxima do p95, em %%')
+    for perfil in PERFIS:
+        parser.add_argument(f'--email-{perfil.lower()}', default=EMAILS_PADRAO[perfil])
+    return parser.parse_args()
+
+
+class _SemRedirecionamento(urllib.request.HTTPRedirectHandler):
+    # O login responde com 302 para /dashboard; seguir o redirecionamento mediria a página também
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class Resultados:
+    """Latências coletadas por endpoint, compartilhadas entre as threads."""
+
+    def __init__(self, inicio_medicao):
+        self.inicio_medicao = inicio_medicao
+        self._lock = threading.Lock()
+        self.latencias = {}
+        self.erros = {}
+
+    def registrar(self, endpoint, iniciado, latencia, ok):
+        # O login acontece uma vez por usuário virtual, no início: nunca é descartado
+        if iniciado < self.inicio_medicao and endpoint != 'login':
+            return
+        with self._lock:
+            self.latencias.setdefault(endpoint, []).append(latencia)
+            self.erros.setdefault(endpoint, 0)
+            if not ok:
+                self.erros[endpoint] += 1
+
+
+class UsuarioVirtual:
+    def __init__(self, args, perfil, resultados, rnd):
+        self.args = args
+        self.perfil = perfil
+        self.resultados = resultados
+        self.rnd = rnd
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()), _SemRedirecionamento())
+        self.projetos = []
+
+    def _requisitar(self, endpoint, metodo, caminho, corpo=None, formulario=None, esperado=(200,)):
+        headers, dados = {}, None
+        if corpo is not None:
+            dados = json.dumps(corpo).encode()
+            headers['Content-Type'] = 'application/json'
+        elif formulario is not None:
+            dados = urllib.parse.urlencode(formulario).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        req = urllib.request.Request(self.args.url.rstrip('/') + caminho, data=dados, headers=headers, method=metodo)
+        iniciado = time.monotonic()
+        resposta, status = b'', 0
+        try:
+            with self.opener.open(req, timeout=self.args.timeout) as r:
+                status, resposta = r.status, r.read()
+        except urllib.error.HTTPError as e:
+            status, resposta = e.code, e.read()
+        except (urllib.error.URLError, OSError):
+            status = 0
+        self.resultados.registrar(endpoint, iniciado, time.monotonic() - iniciado, status in esperado)
+        return status, resposta
+
+    def _json(self, endpoint, metodo, caminho, corpo=None):
+        status, resposta = self._requisitar(endpoint, metodo, caminho, corpo=corpo)
+        if status != 200:
+            return None
+        try:
+            return json.loads(resposta)
+        except ValueError:
+            return None
+
+    def login(self):
+        email = getattr(self.args, f'email_{self.perfil.lower()}')
+        status, _ = self._requisitar('login', 'POST', '/login', formulario={'username': email, 'password': self.args.senha},
+                                     esperado=(302,))
+        if status != 302:
+            return False
+        lista = self._json(f'carga_inicial_{self.perfil.lower()}', 'GET', '/api/projects?fields=idDemandas,status_nome&limit=500')
+        itens = lista.get('data', []) if isinstance(lista, dict) else []
+        self.projetos = [p['idDemandas'] for p in itens]
+        return True
+
+    def _projeto(self):
+        return self.rnd.choice(self.projetos) if self.projetos else None
+
+    def executar(self, acao):
+        sufixo = self.perfil.lower()
+        if acao == 'projetos':
+            self._requisitar(f'projetos_{sufixo}', 'GET', '/api/projects')
+        elif acao == 'projetos_pagina':
+            self._requisitar(f'projetos_pagina_{sufixo}', 'GET', '/api/projects?limit=50')
+        elif acao == 'estatisticas':
+            self._requisitar('estatisticas', 'GET', '/api/stats')
+        elif acao == 'aderencia_projeto' and self.projetos:
+            self._requisitar('aderencia_projeto', 'GET', f'/api/project/{self._projeto()}/adherence')
+        elif acao == 'aderencia_lote':
+            self._requisitar('aderencia_lote', 'GET', '/api/projects/adherence?limit=5')
+        elif acao == 'cadastrar_projeto':
+            limite = (date.today() + timedelta(days=self.rnd.randint(30, 120))).strftime('%d/%m/%Y')
+            self._requisitar('cadastrar_projeto', 'POST', '/api/projects', esperado=(200, 201), corpo={
+                'titulo': f'Benchmark {datetime.now():%H%M%S} #{self.rnd.randint(1, 10**6)}',
+                'descricao': 'Projeto criado pelo benchmark.',
+                'objetivo': 'Medir o desempenho.\nHabilidades Desejadas: Python, BI',
+                'dataLimite': limite,
+            })
+        elif acao == 'urgencia' and self.projetos:
+            self._requisitar('urgencia', 'PUT', f'/api/projects/{self._projeto()}/urgency',
+                             corpo={'urgencia': self.rnd.choice(URGENCIAS)})
+        elif acao == 'andamento' and self.projetos:
+            self._requisitar('andamento', 'PUT', f'/api/projects/{self._projeto()}/status',
+                             corpo={self.rnd.choice(ETAPAS): self.rnd.choice(['EM ANDAMENTO', 'REALIZADO'])})
+
+    def rodar(self, fim):
+        if not self.login():
+            print(f"Aviso: login do perfil {self.perfil} falhou; usuário virtual encerrado.", file=sys.stderr)
+            return
+        roteiro = [(acao, peso) for acao, peso in ROTEIROS[self.perfil]
+                   if not (self.args.sem_escritas and acao in ESCRITAS)]
+        acoes, pesos = zip(*roteiro)
+        while time.monotonic() < fim:
+            self.executar(self.rnd.choices(acoes, weights=pesos)[0])
+
+
+def percentil(ordenados, p):
+    """Percentil pelo método do rank mais próximo."""
+    if not ordenados:
+        return None
+    indice = max(0, min(len(ordenados) - 1, int(round(p / 100.0 * len(ordenados) + 0.5)) - 1))
+    return ordenados[indice]
+
+
+def resumir(latencias, erros, duracao):
+    ordenados = sorted(latencias)
+    ms = lambda valor: round(valor * 1000, 2) if valor is not None else None
+    return {
+        'requisicoes': len(ordenados),
+        'erros': erros,
+        'rps': round(len(ordenados) / duracao, 2) if duracao else None,
+        'media_ms': ms(sum(ordenados) / len(ordenados)) if ordenados else None,
+        'p50_ms': ms(percentil(ordenados, 50)),
+        'p95_ms': ms(percentil(ordenados, 95)),
+        'p99_ms': ms(percentil(ordenados, 99)),
+        'max_ms': ms(ordenados[-1]) if ordenados else None,
+    }
+
+
+def comparar(relatorio, caminho_baseline, tolerancia):
+    """Lista os endpoints cujo p95 piorou mais que `tolerancia` por cento."""
+    with open(caminho_baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressoes = []
+    for endpoint, atual in relatorio['endpoints'].items():
+        anterior = baseline.get('endpoints', {}).get(endpoint)
+        if not anterior or not anterior.get('p95_ms') or atual['p95_ms'] is None:
+            continue
+        variacao = (atual['p95_ms'] - anterior['p95_ms']) / anterior['p95_ms'] * 100
+        print(f"  {endpoint:<32} p95 {anterior['p95_ms']:>9.2f} -> {atual['p95_ms']:>9.2f} ms ({variacao:+.1f}%)")
+        if variacao > tolerancia:
+            regressoes.append(endpoint)
+    return regressoes
+
+
+def main():
+    args = parse_args()
+    perfis = [p.strip().upper() for p in args.perfis.split(',') if p.strip()]
+    invalidos = [p for p in perfis if p not in PERFIS]
+    if invalidos or not perfis:
+        sys.exit(f"Perfis inválidos: {', '.join(invalidos) or '(nenhum)'}")
+
+    inicio = time.monotonic()
+    resultados = Resultados(inicio + args.aquecimento)
+    fim = inicio + args.aquecimento + args.duracao
+    usuarios = [UsuarioVirtual(args, perfis[i % len(perfis)], resultados, random.Random(args.semente + i))
+                for i in range(args.concorrencia)]
+    print(f"Executando {args.concorrencia} usuários virtuais ({', '.join(perfis)}) contra {args.url} "
+          f"por {args.aquecimento:g}s + {args.duracao:g}s...")
+    with ThreadPoolExecutor(max_workers=args.concorrencia) as executor:
+        for futuro in [executor.submit(u.rodar, fim) for u in usuarios]:
+            futuro.result()
+
+    duracao = time.monotonic() - resultados.inicio_medicao
+    todas = [lat for lats in resultados.latencias.values() for lat in lats]
+    relatorio = {
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'configuracao': {'url': args.url, 'concorrencia': args.concorrencia, 'duracao': args.duracao,
+                         'aquecimento': args.aquecimento, 'perfis': perfis, 'escritas': not args.sem_escritas,
+                         'semente': args.semente},
+        'total': resumir(todas, sum(resultados.erros.values()), duracao),
+        'endpoints': {endpoint: resumir(lats, resultados.erros[endpoint], duracao)
+                      for endpoint, lats in sorted(resultados.latencias.items())},
+    }
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+
+    print(f"\n{'endpoint':<32} {'req':>7} {'erros':>6} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for endpoint, r in list(relatorio['endpoints'].items()) + [('TOTAL', relatorio['total'])]:
+        print(f"{endpoint:<32} {r['requisicoes']:>7} {r['erros']:>6} {r['rps'] or 0:>8.1f} "
+              f"{r['p50_ms'] or 0:>9.2f} {r['p95_ms'] or 0:>9.2f} {r['p99_ms'] or 0:>9.2f}")
+    print(f"\n✔ Relatório gravado em {args.saida}")
+
+    if args.baseline:
+        print(f"\nComparando com {args.baseline} (tolerância de {args.tolerancia:g}% no p95):")
+        regressoes = comparar(relatorio, args.baseline, args.tolerancia)
+        if regressoes:
+            print(f"✖ Regressão de p95 em: {', '.join(regressoes)}")
+            sys.exit(1)
+        print("✔ Nenhuma regressão acima da tolerância.")
+
+
+if __name__ == '__main__':
+    main()
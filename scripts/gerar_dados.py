@@ -0,0 +1,234 @@
+"""Gera uma massa de dados sintética para testes de carga.
+
+Preenche um MySQL/MariaDB local (criado com railway.sql e as migrations) com
+colaboradores, hard skills, usuários, solicitantes, demandas e logs em volumes
+configuráveis. A geração é determinística para a mesma --semente, então dois
+bancos gerados com os mesmos parâmetros são idênticos e os benchmarks são
+comparáveis entre si.
+
+Também cria três usuários fixos para o benchmark (senha --senha):
+bench.admin@ruby.com, bench.solicitante@ruby.com e bench.colaborador@ruby.com.
+
+Uso:
+    python scripts/gerar_dados.py --tamanho medio
+    python scripts/gerar_dados.py --colaboradores 5000 --demandas 50000 --logs 1000000
+
+O banco deve estar vazio (ou ser usado só por este script durante a carga): os
+ids são atribuídos a partir do maior id existente em cada tabela.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import MySQLdb
+from unidecode import unidecode
+from werkzeug.security import generate_password_hash
+
+TAMANHOS = {
+    'pequeno': {'colaboradores': 300, 'demandas': 2000, 'logs': 20000},
+    'medio': {'colaboradores': 2000, 'demandas': 20000, 'logs': 200000},
+    'grande': {'colaboradores': 10000, 'demandas': 100000, 'logs': 2000000},
+}
+
+HABILIDADES = [
+    'Frontend', 'Backend', 'Banco de Dados SQL', 'NoSQL', 'API REST', 'Mobile', 'Testes QA', 'DevOps', 'Cloud AWS', 'Cloud Azure',
+    'Análise de Dados', 'Machine Learning', 'BI', 'Power BI', 'Python', 'JavaScript', 'Java', 'C#', '.NET', 'React', 'Angular', 'Vue.js',
+    'UI/UX Design', 'Design Gráfico', 'Gestão de Projetos', 'Marketing Digital', 'SEO', 'Análise de Requisitos', 'Suporte Técnico'
+]
+NOMES = ['Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela', 'João', 'Larissa',
+         'Lucas', 'Mariana', 'Mateus', 'Natália', 'Otávio', 'Paula', 'Rafael', 'Sofia', 'Thiago', 'Vitória', 'William']
+SOBRENOMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira', 'Lima', 'Gomes',
+              'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Lopes', 'Soares', 'Fernandes', 'Vieira', 'Barbosa']
+TEMAS = ['Dashboard de vendas', 'Relatório financeiro', 'Painel de RH', 'Automação de planilhas', 'Indicadores de qualidade',
+         'Previsão de demanda', 'Integração com ERP', 'Portal do cliente', 'Análise de churn', 'Controle de estoque']
+AREAS = ['regional', 'mensal', 'da diretoria', 'operacional', 'comercial', 'de logística', 'de marketing', 'corporativo']
+ACOES_LOG = ['LOGIN', 'LOGOUT', 'PROJETO CADASTRADO', 'URGÊNCIA ATUALIZADA', 'ADESÃO REALIZADA', 'ANDAMENTO ATUALIZADO']
+ETAPAS = ['reuniao_requisitos', 'coleta_preparacao_dados', 'criacao_relatorio_dashboard', 'validacao_refinamento', 'documentacao']
+
+REFERENCIAS = {
+    'StatusColaborador': ('status', ['ativo', 'inativo']),
+    'Departamento': ('nome', ['TI']),
+    'Cargo': ('nome', ['ADMINISTRADOR', 'SOLICITANTE', 'COLABORADOR']),
+    'StatusDemanda': ('status', ['NÃO INICIADO', 'EM ANDAMENTO', 'CONCLUÍDO']),
+    'PrioridadeDemanda': ('prioridade', ['Baixa', 'Média', 'Alta', 'Urgente']),
+    'NivelAcesso': ('nivel', ['ADMINISTRADOR', 'SOLICITANTE', 'COLABORADOR']),
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--tamanho', choices=TAMANHOS, default='pequeno')
+    parser.add_argument('--colaboradores', type=int)
+    parser.add_argument('--demandas', type=int)
+    parser.add_argument('--logs', type=int)
+    parser.add_argument('--dias', type=int, default=730, help='Janela de datas de abertura das demandas')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--lote', type=int, default=1000, help='Linhas por INSERT')
+    parser.add_argument('--senha', default='cah@123', help='Senha de todos os usuários gerados')
+    parser.add_argument('--host', default=os.environ.get('MYSQL_HOST', 'localhost'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('MYSQL_PORT', 3306)))
+    parser.add_argument('--user', default=os.environ.get('MYSQL_USER', 'root'))
+    parser.add_argument('--password', default=os.environ.get('MYSQL_PASSWORD', ''))
+    parser.add_argument('--db', default=os.environ.get('MYSQL_DB', 'railway'))
+    args = parser.parse_args()
+    for campo, valor in TAMANHOS[args.tamanho].items():
+        if getattr(args, campo) is None:
+            setattr(args, campo, valor)
+    return args
+
+
+def inserir(conn, tabela, colunas, linhas, lote):
+    cur = conn.cursor()
+    query = f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({', '.join(['%s'] * len(colunas))})"
+    for inicio in range(0, len(linhas), lote):
+        cur.executemany(query, linhas[inicio:inicio + lote])
+        conn.commit()
+    cur.close()
+
+
+def proximo_id(conn, tabela, coluna):
+    cur = conn.cursor()
+    cur.execute(f"SELECT COALESCE(MAX({coluna}), 0) FROM {tabela}")
+    valor = cur.fetchone()[0]
+    cur.close()
+    return valor + 1
+
+
+def garantir_referencias(conn):
+    """Cria as linhas das tabelas de referência que faltarem e retorna {tabela: {rótulo: id}}."""
+    cur = conn.cursor()
+    ids = {}
+    for tabela, (coluna, rotulos) in REFERENCIAS.items():
+        cur.executemany(f"INSERT IGNORE INTO {tabela} ({coluna}) VALUES (%s)", [(r,) for r in rotulos])
+        cur.execute(f"SELECT id{tabela}, {coluna} FROM {tabela}")
+        ids[tabela] = {rotulo: id_ for id_, rotulo in cur.fetchall()}
+    conn.commit()
+    cur.close()
+    return ids
+
+
+def gerar(args):
+    rnd = random.Random(args.semente)
+    conn = MySQLdb.connect(host=args.host, port=args.port, user=args.user, passwd=args.password, db=args.db,
+                           charset='utf8mb4', use_unicode=True)
+    ref = garantir_referencias(conn)
+    hoje = date.today()
+    senha = generate_password_hash(args.senha)
+    inicio_geracao = time.monotonic()
+
+    # ----- colaboradores, hard skills e usuários -----
+    primeiro_colaborador = proximo_id(conn, 'Colaborador', 'idColaborador')
+    primeiro_adm = proximo_id(conn, 'ADM', 'idADM')
+    colaboradores, skills, usuarios = [], [], []
+    perfis = {'ADMINISTRADOR': [], 'SOLICITANTE': [], 'COLABORADOR': []}
+    fixos = [('bench.admin', 'Bench Admin', 'ADMINISTRADOR'),
+             ('bench.solicitante', 'Bench Solicitante', 'SOLICITANTE'),
+             ('bench.colaborador', 'Bench Colaborador', 'COLABORADOR')]
+    for i in range(args.colaboradores + len(fixos)):
+        colaborador_id = primeiro_colaborador + i
+        if i < len(fixos):
+            local, nome, perfil = fixos[i]
+        else:
+            primeiro, ultimo = rnd.choice(NOMES), rnd.choice(SOBRENOMES)
+            nome = f'{primeiro} {ultimo}'
+            local = unidecode(f'{primeiro[:10]}.{ultimo[:9]}{colaborador_id}').lower()
+            perfil = rnd.choices(list(perfis), weights=[2, 15, 83])[0]
+        email = f'{local}@ruby.com'
+        colaboradores.append((colaborador_id, nome, email, f'11 9{rnd.randint(1000, 9999)}-{rnd.randint(1000, 9999)}',
+                              hoje - timedelta(days=rnd.randint(30, 3000)), ref['Cargo'][perfil], ref['Departamento']['TI'],
+                              ref['StatusColaborador']['ativo']))
+        for habilidade in rnd.sample(HABILIDADES, rnd.randint(2, 6)):
+            skills.append((colaborador_id, habilidade))
+        usuarios.append((primeiro_adm + i, nome.split()[0] if i >= len(fixos) else nome, email, senha, datetime.now(),
+                         colaborador_id, ref['NivelAcesso'][perfil], 'OK'))
+        perfis[perfil].append((colaborador_id, nome))
+
+    inserir(conn, 'Colaborador', ['idColaborador', 'nome', 'email', 'telefone', 'dataAdmissao', 'idCargo', 'idDepartamento',
+                                  'idStatusColaborador'], colaboradores, args.lote)
+    inserir(conn, 'HardSkill', ['idColaborador', 'habilidade'], skills, args.lote)
+    inserir(conn, 'ADM', ['idADM', 'nome', 'email', 'senha', 'dataCadastro', 'idColaborador', 'idNivelAcesso', 'status'],
+            usuarios, args.lote)
+    print(f"✔ {len(colaboradores)} colaboradores, {len(skills)} hard skills e {len(usuarios)} usuários")
+
+    # ----- solicitantes (um por usuário com perfil SOLICITANTE ou ADMINISTRADOR) -----
+    primeiro_solicitante = proximo_id(conn, 'Solicitante', 'idSolicitante')
+    solicitantes = []
+    for i, (colaborador_id, nome) in enumerate(perfis['SOLICITANTE'] + perfis['ADMINISTRADOR']):
+        solicitantes.append((primeiro_solicitante + i, nome, f'sol{primeiro_solicitante + i}@ruby.com', hoje, colaborador_id))
+    inserir(conn, 'Solicitante', ['idSolicitante', 'nome', 'email', 'dataCadastro', 'idColaborador'], solicitantes, args.lote)
+    print(f"✔ {len(solicitantes)} solicitantes")
+
+    # ----- demandas e integrantes -----
+    primeira_demanda = proximo_id(conn, 'Demandas', 'idDemandas')
+    status = ref['StatusDemanda']
+    demandas, integrantes = [], []
+    executores = perfis['COLABORADOR']
+    for i in range(args.demandas):
+        demanda_id = primeira_demanda + i
+        # O solicitante e o colaborador fixos do benchmark participam de ~1% das demandas
+        solicitante = solicitantes[0] if rnd.random() < 0.01 else rnd.choice(solicitantes)
+        equipe = rnd.sample(executores, min(len(executores), rnd.randint(1, 3)))
+        if rnd.random() < 0.01 and executores[0] not in equipe:
+            equipe[0] = executores[0]
+        situacao = rnd.choices(['NÃO INICIADO', 'EM ANDAMENTO', 'CONCLUÍDO'], weights=[20, 30, 50])[0]
+        abertura = datetime.combine(hoje - timedelta(days=rnd.randint(0, args.dias)), datetime.min.time()) + timedelta(minutes=rnd.randint(0, 1439))
+        limite = abertura.date() + timedelta(days=rnd.randint(30, 120))
+        inicio = previsao = conclusao = None
+        if situacao != 'NÃO INICIADO':
+            inicio = abertura.date() + timedelta(days=rnd.randint(0, 20))
+            previsao = inicio + timedelta(days=rnd.randint(10, 90))
+        if situacao == 'CONCLUÍDO':
+            conclusao = datetime.combine(inicio + timedelta(days=rnd.randint(5, 120)), datetime.min.time())
+        if situacao == 'CONCLUÍDO':
+            etapas = ['REALIZADO'] * len(ETAPAS)
+        elif situacao == 'EM ANDAMENTO':
+            feitas = rnd.randint(0, len(ETAPAS))
+            etapas = ['REALIZADO'] * feitas + ['EM ANDAMENTO'] + ['NÃO REALIZADO'] * (len(ETAPAS) - feitas - 1)
+            etapas = etapas[:len(ETAPAS)]
+        else:
+            etapas = ['NÃO REALIZADO'] * len(ETAPAS)
+        habilidades = ', '.join(rnd.sample(HABILIDADES, rnd.randint(1, 4)))
+        atribuida = situacao != 'NÃO INICIADO'
+        demandas.append((
+            demanda_id, f'{rnd.choice(TEMAS)} {rnd.choice(AREAS)} #{demanda_id}'[:100],
+            f'Demanda gerada para teste de carga com base no tema {rnd.choice(TEMAS).lower()}.',
+            abertura, limite, conclusao, solicitante[0], equipe[0][0], status[situacao], rnd.choice(list(ref['PrioridadeDemanda'].values())),
+            solicitante[1], equipe[0][1] if atribuida else '', ', '.join(n for _, n in equipe[1:]) if atribuida else '',
+            inicio, previsao, *etapas, '', f'Entregar {rnd.choice(TEMAS).lower()}.\nHabilidades Desejadas: {habilidades}', ''
+        ))
+        if atribuida:
+            for posicao, (colaborador_id, _) in enumerate(equipe):
+                integrantes.append((demanda_id, colaborador_id, 'RESPONSAVEL' if posicao == 0 else 'CORRESPONSAVEL'))
+    inserir(conn, 'Demandas', ['idDemandas', 'titulo', 'descricao', 'dataAbertura', 'dataLimite', 'dataConclusao', 'idSolicitante',
+                               'idColaborador', 'idStatusDemanda', 'idPrioridadeDemanda', 'supervisor_responsavel',
+                               'estagiario_responsavel', 'estagiario_corresponsavel', 'inicio_projeto', 'previsao_termino',
+                               *ETAPAS, 'periodo', 'objetivo', 'observacao'], demandas, args.lote)
+    inserir(conn, 'DemandaIntegrante', ['idDemandas', 'idColaborador', 'papel'], integrantes, args.lote)
+    print(f"✔ {len(demandas)} demandas e {len(integrantes)} integrantes")
+
+    # ----- logs -----
+    nomes_usuarios = [u[1] for u in usuarios]
+    logs = []
+    for _ in range(args.logs):
+        momento = datetime.now() - timedelta(seconds=rnd.randint(0, args.dias * 86400))
+        logs.append((momento, rnd.choice(nomes_usuarios), rnd.choice(ACOES_LOG), 'Registro gerado para teste de carga.'))
+        if len(logs) >= args.lote * 10:
+            inserir(conn, 'Logs', ['timestamp', 'usuario', 'acao', 'detalhes'], logs, args.lote)
+            logs = []
+    inserir(conn, 'Logs', ['timestamp', 'usuario', 'acao', 'detalhes'], logs, args.lote)
+    print(f"✔ {args.logs} logs")
+
+    conn.close()
+    print(f"Concluído em {time.monotonic() - inicio_geracao:.1f}s. Usuários do benchmark: "
+          f"bench.admin@ruby.com, bench.solicitante@ruby.com, bench.colaborador@ruby.com / {args.senha}")
+
+
+if __name__ == '__main__':
+    try:
+        gerar(parse_args())
+    except MySQLdb.Error as e:
+        print(f"Erro no banco de dados: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,278 @@
+"""Confere o orçamento de comandos SQL de cada rota.
+
+Executa as rotas da aplicação (via test client do Flask, no mesmo processo)
+contra um banco local — o mesmo preparado para o benchmark com railway.sql, as
+migrations e scripts/gerar_dados.py — e registra os comandos SQL e commits de
+cada requisição. Cada cenário roda uma vez para aquecer os caches e outra para
+a medição (com o cache de respostas vazio); se a medição passar do orçamento declarado na rota com
+@metrics.query_budget, o script termina com código 1. Também falha se alguma rota
+de app.url_map não declarar orçamento ou não tiver cenário (nem estiver em
+SEM_CENARIO, com o motivo).
+
+Uso:
+    MYSQL_HOST=localhost MYSQL_DB=railway python scripts/orcamento_consultas.py
+    python scripts/orcamento_consultas.py --sql                # lista os comandos de cada rota
+    python scripts/orcamento_consultas.py --explain            # EXPLAIN dos SELECTs com varredura completa
+    python scripts/orcamento_consultas.py --filtro projects --saida orcamento.json
+
+As rotas de escrita alteram o banco: use uma base descartável.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics
+from app import USER_IMPORT_CHUNK_SIZE, app, mysql, response_cache
+
+EMAILS = {
+    'ADMINISTRADOR': 'bench.admin@ruby.com',
+    'SOLICITANTE': 'bench.solicitante@ruby.com',
+    'COLABORADOR': 'bench.colaborador@ruby.com',
+}
+
+HOJE = date.today()
+
+
+class Formulario(dict):
+    """Corpo enviado como formulário HTML em vez de JSON (ex.: /login)."""
+
+
+# Arquivo JSONL da importação em lote: um bloco completo e mais uma linha, para que
+# um comando por linha (em vez de por bloco) estoure o orçamento
+IMPORTACAO = ''.join(json.dumps({
+    'nome_login': f'OrcamentoImport{i}', 'nome_completo': f'Orcamento Importacao {i:04d}', 'role': 'COLABORADOR',
+    'admission_date': HOJE.isoformat(), 'phone': '11 99999-0002', 'skills': ['Python', 'SQL']
+}) + '\n' for i in range(USER_IMPORT_CHUNK_SIZE + 1)).encode()
+
+# (perfil, método, caminho, corpo, aquecer). Os campos entre chaves vêm de carregar_referencias().
+# Cenários que não podem ser repetidos (exclusão) rodam uma única vez, já com os caches quentes.
+# O corpo é enviado como JSON; Formulario vira formulário e bytes, JSONL. O perfil ANONIMO
+# usa um cliente sem sessão.
+CENARIOS = [
+    ('ANONIMO', 'GET', '/', None, True),
+    ('ANONIMO', 'POST', '/login', Formulario(username=EMAILS['COLABORADOR'], password='{senha}'), False),
+    ('ANONIMO', 'GET', '/logout', None, False),
+    ('COLABORADOR', 'GET', '/change_password_first', None, True),
+    ('COLABORADOR', 'GET', '/dashboard', None, True),
+    ('COLABORADOR', 'GET', '/api/session', None, True),
+    ('ADMINISTRADOR', 'GET', '/metrics', None, True),
+    ('ADMINISTRADOR', 'GET', '/api/projects', None, True),
+    ('SOLICITANTE', 'GET', '/api/projects', None, True),
+    ('COLABORADOR', 'GET', '/api/projects', None, True),
+    ('ADMINISTRADOR', 'GET', '/api/projects?limit=50&status=EM%20ANDAMENTO', None, True),
+    ('ADMINISTRADOR', 'GET', '/api/projects/search?q=dashboard', None, True),
+    ('ADMINISTRADOR', 'GET', '/api/projects/changes?since={versao}', None, True),
+    ('ADMINISTRADOR', 'GET', '/api/users', None, True),
+    ('ADMINISTRADOR', 'GET', '/api/users/changes?since={versao}', None, True),
+    ('ADMINISTRADOR', 'GET', '/api/users/{usuario}', None, True),
+    ('ADMINISTRADOR', 'GET', '/api/stats', None, True),
+    ('SOLICITANTE', 'GET', '/api/analytics/delivery?agrupar=status', None, True),
+    ('SOLICITANTE', 'GET', '/api/collaborators/availability', None, True),
+    ('ADMINISTRADOR', 'GET', '/api/project/{projeto}/adherence', None, True),
+    ('ADMINISTRADOR', 'GET', '/api/projects/adherence', None, True),
+    ('ADMINISTRADOR', 'GET', '/api/projects/allocation/preview', None, True),
+    ('ADMINISTRADOR', 'GET', '/api/projects/export', None, True),
+    ('ADMINISTRADOR', 'GET', '/health', None, True),
+    ('SOLICITANTE', 'POST', '/api/projects', {
+        'titulo': 'Projeto do orçamento de SQL', 'descricao': 'Criado por scripts/orcamento_consultas.py.',
+        'objetivo': 'Conferir consultas.\nHabilidades Desejadas: Python, BI',
+        'dataLimite': (HOJE + timedelta(days=60)).strftime('%d/%m/%Y')}, True),
+    ('SOLICITANTE', 'PUT', '/api/projects/{projeto_solicitante}/urgency', {'urgencia': 'Alta'}, True),
+    ('ADMINISTRADOR', 'POST', '/api/projects/{projeto}/adhere', {
+        'integrantes': ['{colaborador}'], 'inicio_projeto': HOJE.isoformat(),
+        'previsao_termino': (HOJE + timedelta(days=30)).isoformat(), 'forcar': True}, True),
+    ('COLABORADOR', 'PUT', '/api/projects/{projeto}/status', {'reuniao_requisitos': 'REALIZADO'}, True),
+    ('ADMINISTRADOR', 'POST', '/api/users', {
+        'nome_login': 'Orcamento', 'nome_completo': 'Orcamento Consultas', 'role': 'COLABORADOR',
+        'admission_date': HOJE.isoformat(), 'phone': '11 99999-0000', 'skills': ['Python', 'BI']}, True),
+    ('ADMINISTRADOR', 'PUT', '/api/users/{usuario_criado}', {
+        'nome_login': 'Orcamento', 'nome_completo': 'Orcamento Consultas', 'role': 'COLABORADOR',
+        'admission_date': HOJE.isoformat(), 'phone': '11 99999-0001', 'skills': ['Python']}, True),
+    ('ADMINISTRADOR', 'DELETE', '/api/users/{usuario_criado}', None, False),
+    ('ADMINISTRADOR', 'POST', '/api/users/import', IMPORTACAO, False),
+]
+
+# Rotas sem cenário, com o motivo; continuam precisando de @metrics.query_budget
+SEM_CENARIO = {
+    'static': 'arquivos estáticos do Flask, sem banco',
+    'stream_events': 'SSE: a resposta não termina',
+    'fix_passwords': 'regrava as senhas de usuários reais',
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--senha', default='cah@123', help='Senha dos usuários bench.* de gerar_dados.py')
+    parser.add_argument('--filtro', help='Executa só os cenários cujo caminho contém este texto')
+    parser.add_argument('--sql', action='store_true', help='Mostra os comandos SQL de cada requisição')
+    parser.add_argument('--explain', action='store_true', help='Mostra o EXPLAIN dos SELECTs com varredura completa')
+    parser.add_argument('--explain-min-linhas', type=int, default=100,
+                        help='Ignora varreduras completas de tabelas menores que isto (tabelas de referência)')
+    parser.add_argument('--saida', help='Grava o resultado em JSON')
+    return parser.parse_args()
+
+
+def consultar(sql, args=()):
+    with mysql.pool.connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(sql, args)
+            return cur.fetchall()
+        finally:
+            cur.close()
+
+
+def carregar_referencias():
+    """Ids usados nos caminhos dos cenários, lidos do banco antes da execução."""
+    usuarios = {row['email']: row for row in consultar(
+        f"SELECT a.idADM, a.email, a.idColaborador, c.nome FROM ADM a JOIN Colaborador c ON a.idColaborador = c.idColaborador "
+        f"WHERE a.email IN ({', '.join(['%s'] * len(EMAILS))})", tuple(EMAILS.values()))}
+    faltando = [email for email in EMAILS.values() if email not in usuarios]
+    if faltando:
+        sys.exit(f"Usuários não encontrados: {', '.join(faltando)}. Gere a massa com scripts/gerar_dados.py.")
+    colaborador = usuarios[EMAILS['COLABORADOR']]
+    solicitante = usuarios[EMAILS['SOLICITANTE']]
+    projeto = consultar("SELECT MIN(idDemandas) as id FROM DemandaIntegrante WHERE idColaborador = %s",
+                        (colaborador['idColaborador'],))[0]['id']
+    projeto_solicitante = consultar("""
+        SELECT MIN(d.idDemandas) as id FROM Demandas d JOIN Solicitante s ON d.idSolicitante = s.idSolicitante
+        WHERE s.idColaborador = %s
+    """, (solicitante['idColaborador'],))[0]['id']
+    if projeto is None or projeto_solicitante is None:
+        sys.exit("Os usuários bench.* não participam de nenhum projeto. Gere a massa com scripts/gerar_dados.py.")
+    return {
+        'usuario': usuarios[EMAILS['ADMINISTRADOR']]['idADM'],
+        'colaborador': colaborador['nome'],
+        'projeto': projeto,
+        'projeto_solicitante': projeto_solicitante,
+        'versao': consultar("SELECT COALESCE(MAX(versao), 0) as versao FROM ChangeLog")[0]['versao'],
+    }
+
+
+def preencher(valor, referencias):
+    if isinstance(valor, str):
+        return valor.format(**referencias)
+    if isinstance(valor, list):
+        return [preencher(v, referencias) for v in valor]
+    if isinstance(valor, dict):
+        return type(valor)({k: preencher(v, referencias) for k, v in valor.items()})
+    return valor
+
+
+def explain(sql, args, min_linhas):
+    """Linhas do EXPLAIN com varredura completa (type = ALL) em tabelas com pelo menos `min_linhas`."""
+    if not sql.lstrip().upper().startswith('SELECT') or isinstance(args, list):
+        return []
+    try:
+        plano = consultar('EXPLAIN ' + sql, args)
+    except Exception as e:
+        print(f"    Aviso: EXPLAIN falhou: {e}")
+        return []
+    return [linha for linha in plano if linha.get('type') == 'ALL' and (linha.get('rows') or 0) >= min_linhas]
+
+
+def executar(cliente, metodo, caminho, corpo):
+    if isinstance(corpo, Formulario):
+        envio = {'data': dict(corpo)}
+    elif isinstance(corpo, bytes):
+        envio = {'data': corpo, 'content_type': 'application/x-ndjson'}
+    else:
+        envio = {'json': corpo}
+    if os.environ.get('METRICS_TOKEN'):
+        envio['headers'] = {'Authorization': f"Bearer {os.environ['METRICS_TOKEN']}"}
+    with metrics.capture() as comandos:
+        resposta = cliente.open(caminho, method=metodo, **envio)
+        resposta.get_data()  # rotas em streaming (export) executam SQL ao gerar o corpo
+    return resposta.status_code, comandos
+
+
+def main():
+    args = parse_args()
+    referencias = dict(carregar_referencias(), senha=args.senha)
+    clientes = {'ANONIMO': app.test_client()}
+    for perfil, email in EMAILS.items():
+        cliente = app.test_client()
+        resposta = cliente.post('/login', data={'username': email, 'password': args.senha})
+        if resposta.status_code != 302:
+            sys.exit(f"Falha no login de {email}: verifique --senha.")
+        clientes[perfil] = cliente
+
+    adapter = app.url_map.bind('localhost')
+    resultados, falhas = [], []
+    print(f"{'rota':<28} {'método':<7} {'status':>6} {'frio':>5} {'SQL':>4} {'orçam.':>6} {'commits':>7}  caminho")
+    for perfil, metodo, caminho, corpo, aquecer in CENARIOS:
+        if args.filtro and args.filtro not in caminho:
+            continue
+        if '{usuario_criado}' in caminho:
+            referencias['usuario_criado'] = consultar("SELECT MAX(idADM) as id FROM ADM WHERE nome = 'Orcamento'")[0]['id']
+        caminho, corpo = preencher(caminho, referencias), preencher(corpo, referencias)
+        endpoint, _ = adapter.match(caminho.split('?')[0], method=metodo)
+        orcamento = getattr(app.view_functions[endpoint], 'query_budget', None)
+
+        frio = None
+        if aquecer:
+            _, comandos_frio = executar(clientes[perfil], metodo, caminho, corpo)
+            frio = sum(1 for c in comandos_frio if c['sql'] != 'COMMIT')
+        # A medição é da consulta, não da resposta guardada no cache de respostas
+        response_cache.clear()
+        status, comandos = executar(clientes[perfil], metodo, caminho, corpo)
+        sqls = [c for c in comandos if c['sql'] != 'COMMIT']
+        commits = len(comandos) - len(sqls)
+
+        problemas = []
+        if status >= 400:
+            problemas.append(f'status {status}')
+        if orcamento is None:
+            problemas.append('rota sem @metrics.query_budget')
+        elif len(sqls) > orcamento:
+            problemas.append(f'{len(sqls)} comandos SQL, orçamento {orcamento}')
+        print(f"{endpoint:<28} {metodo:<7} {status:>6} {frio if frio is not None else '-':>5} {len(sqls):>4} "
+              f"{orcamento if orcamento is not None else '-':>6} {commits:>7}  {caminho}{'  ✖ ' + '; '.join(problemas) if problemas else ''}")
+
+        varreduras = []
+        for comando in sqls:
+            if args.sql:
+                print(f"    {comando['segundos'] * 1000:7.2f} ms  {' '.join(comando['sql'].split())}")
+            if args.explain:
+                for linha in explain(comando['sql'], comando['args'], args.explain_min_linhas):
+                    varreduras.append({'sql': ' '.join(comando['sql'].split()), 'tabela': linha.get('table'),
+                                       'linhas': linha.get('rows'), 'extra': linha.get('Extra')})
+                    print(f"    varredura completa em {linha.get('table')} (~{linha.get('rows')} linhas, "
+                          f"{linha.get('Extra') or 'sem extra'}): {' '.join(comando['sql'].split())[:160]}")
+
+        resultados.append({'endpoint': endpoint, 'metodo': metodo, 'caminho': caminho, 'perfil': perfil, 'status': status,
+                           'comandos_frio': frio, 'comandos': len(sqls), 'commits': commits, 'orcamento': orcamento,
+                           'sql': [' '.join(c['sql'].split()) for c in sqls], 'varreduras_completas': varreduras,
+                           'problemas': problemas})
+        if problemas:
+            falhas.append(endpoint)
+
+    if not args.filtro:
+        # Rotas novas não escapam da conferência: toda rota precisa de orçamento e de cenário
+        cobertos = {resultado['endpoint'] for resultado in resultados}
+        for endpoint in sorted({regra.endpoint for regra in app.url_map.iter_rules()}):
+            problemas = []
+            if endpoint != 'static' and getattr(app.view_functions[endpoint], 'query_budget', None) is None:
+                problemas.append('rota sem @metrics.query_budget')
+            if endpoint not in cobertos and endpoint not in SEM_CENARIO:
+                problemas.append('rota sem cenário (ou motivo em SEM_CENARIO)')
+            if problemas:
+                print(f"{endpoint:<28} ✖ {'; '.join(problemas)}")
+                falhas.append(endpoint)
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump({'cenarios': resultados}, f, ensure_ascii=False, indent=2)
+
+    if falhas:
+        print(f"\n✖ {len(falhas)} cenário(s) com problema: {', '.join(falhas)}")
+        sys.exit(1)
+    print(f"\n✔ {len(resultados)} cenários dentro do orçamento.")
+
+
+if __name__ == '__main__':
+    main()
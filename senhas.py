@@ -0,0 +1,170 @@
+import multiprocessing
+import os
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows (servidor de desenvolvimento): limites só do processo
+    fcntl = None
+
+# =============================================================================
+# HASH DE SENHAS EM UM POOL DE PROCESSOS (LOGIN E TROCA DE SENHA)
+# =============================================================================
+
+
+class HashingBusy(Exception):
+    """Fila de hashing cheia ou resultado não ficou pronto no prazo."""
+
+
+class VagasDaMaquina:
+    """Semáforo compartilhado pelos processos da máquina: `total` arquivos de trava
+    (flock) em `diretorio`, uma vaga por arquivo.
+
+    O kernel solta a trava quando o processo termina, então um worker encerrado no
+    meio de um hash (timeout do gunicorn, OOM) não leva a vaga com ele.
+    """
+
+    INTERVALO = 0.01
+
+    def __init__(self, diretorio, nome, total):
+        os.makedirs(diretorio, mode=0o700, exist_ok=True)
+        self._caminhos = [os.path.join(diretorio, f'{nome}-{i}.lock') for i in range(total)]
+
+    def adquirir(self, prazo):
+        """Ocupa uma vaga até o instante `prazo` (time.monotonic()); retorna a vaga ou None."""
+        while True:
+            inicio = random.randrange(len(self._caminhos))
+            for i in range(len(self._caminhos)):
+                fd = os.open(self._caminhos[(inicio + i) % len(self._caminhos)], os.O_RDWR | os.O_CREAT, 0o600)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return fd
+                except BlockingIOError:
+                    os.close(fd)
+            if time.monotonic() >= prazo:
+                return None
+            time.sleep(self.INTERVALO)
+
+    def liberar(self, vaga):
+        os.close(vaga)
+
+
+class VagasDoProcesso:
+    """Mesma interface de VagasDaMaquina, com o limite valendo só neste processo."""
+
+    def __init__(self, total):
+        self._semaforo = threading.BoundedSemaphore(total)
+
+    def adquirir(self, prazo):
+        return True if self._semaforo.acquire(timeout=max(0.0, prazo - time.monotonic())) else None
+
+    def liberar(self, vaga):
+        self._semaforo.release()
+
+
+class PasswordHasher:
+    """Executa a derivação de chave das senhas fora das threads de requisição.
+
+    `workers` e `max_pending` são limites da máquina inteira, não de cada worker
+    do gunicorn: no máximo `workers` hashes executam ao mesmo tempo e no máximo
+    `max_pending` operações ficam entre executando e aguardando, somando todos os
+    workers. Os limites são vagas em arquivos de trava em `diretorio`
+    (VagasDaMaquina); sem `diretorio` ou sem flock, valem só para o processo.
+    Cada worker tem um pool de até `workers` processos (criados sob demanda,
+    depois do fork), de modo que um worker sozinho pode usar todas as vagas
+    quando os outros estão ociosos. Quando não há vaga em `timeout` segundos,
+    levanta HashingBusy em vez de segurar a thread: numa rajada de logins, o
+    custo da KDF fica limitado a esses processos e o resto da API continua
+    respondendo.
+
+    `method` segue o formato do Werkzeug com todos os parâmetros explícitos
+    (ex.: 'pbkdf2:sha256:600000', 'scrypt:32768:8:1'); hashes gravados com outros
+    parâmetros são refeitos no próximo login (ver `verify`).
+    """
+
+    def __init__(self, method='pbkdf2:sha256:600000', workers=2, max_pending=16, timeout=10.0, diretorio=None):
+        self.method = method
+        self.workers = workers
+        self.timeout = timeout
+        if diretorio and fcntl is not None:
+            self._fila = VagasDaMaquina(diretorio, 'fila', max_pending)
+            self._execucao = VagasDaMaquina(diretorio, 'execucao', workers)
+        else:
+            self._fila = VagasDoProcesso(max_pending)
+            self._execucao = VagasDoProcesso(workers)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def _pool(self):
+        # Processos e threads do pool não sobrevivem ao fork do gunicorn: cada worker cria o seu
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    # forkserver: os processos não herdam as threads do worker (broker, pool MySQL)
+                    # e só importam o werkzeug, não a aplicação
+                    contexto = multiprocessing.get_context('forkserver')
+                    contexto.set_forkserver_preload(['werkzeug.security'])
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=contexto)
+                    self._pid = os.getpid()
+        return self._executor
+
+    def _liberar(self, fila, execucao):
+        metrics.PASSWORD_HASH_QUEUE.dec()
+        self._execucao.liberar(execucao)
+        self._fila.liberar(fila)
+
+    def _executar(self, operacao, funcao, *args):
+        inicio = time.perf_counter()
+        prazo = time.monotonic() + self.timeout
+        fila = self._fila.adquirir(prazo)
+        if fila is None:
+            metrics.PASSWORD_HASH_REJECTED.labels(operacao).inc()
+            raise HashingBusy('Fila de hashing de senhas cheia.')
+        metrics.PASSWORD_HASH_QUEUE.inc()
+        execucao = self._execucao.adquirir(prazo)
+        if execucao is None:
+            metrics.PASSWORD_HASH_QUEUE.dec()
+            self._fila.liberar(fila)
+            metrics.PASSWORD_HASH_REJECTED.labels(operacao).inc()
+            raise HashingBusy('Hash de senha não concluído no prazo.')
+        try:
+            futuro = self._pool().submit(funcao, *args)
+        except Exception:
+            self._liberar(fila, execucao)
+            raise
+        # As vagas só são devolvidas quando o processo termina, mesmo que a requisição desista antes
+        futuro.add_done_callback(lambda _futuro: self._liberar(fila, execucao))
+        try:
+            return futuro.result(timeout=max(0.0, prazo - time.monotonic()))
+        except FutureTimeoutError:
+            metrics.PASSWORD_HASH_REJECTED.labels(operacao).inc()
+            raise HashingBusy('Hash de senha não concluído no prazo.')
+        except BrokenProcessPool:
+            # Um processo do pool morreu (ex.: OOM): o próximo uso cria um pool novo
+            with self._lock:
+                self._pid = None
+            raise HashingBusy('Pool de hashing reiniciado.')
+        finally:
+            metrics.PASSWORD_HASH_DURATION.labels(operacao).observe(time.perf_counter() - inicio)
+
+    def hash(self, password):
+        return self._executar('gerar', generate_password_hash, password, self.method)
+
+    def verify(self, hashed, password):
+        """Retorna (senha confere, hash precisa ser refeito com os parâmetros atuais)."""
+        valido = self._executar('verificar', check_password_hash, hashed, password)
+        return valido, valido and hashed.split('$', 1)[0] != self.method
+
+    def shutdown(self):
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=False, cancel_futures=True)